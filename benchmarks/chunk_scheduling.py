@@ -0,0 +1,60 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Compares throughput of `parallel.shared.execute` with one image per task
+(the previous fixed chunksize) against the automatically chosen chunksize,
+for a cheap kernel (the flat-fielding division) and an expensive one (median filter).
+
+The default shape needs 16 GB of memory for the stack.
+
+Usage: python -m benchmarks.chunk_scheduling [--shape 1000 2048 2048] [--cores N]
+"""
+import argparse
+import time
+
+import numpy as np
+import scipy.ndimage as scipy_ndimage
+
+from mantidimaging.core.operations.flat_fielding.flat_fielding import _divide
+from mantidimaging.core.parallel import manager, shared as ps, utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+
+def run(name: str, data: np.ndarray, partial_func, second, cores: int, chunksize):
+    # start the workers before timing, so that only the scheduling is measured
+    manager.get_pool(cores)
+    start = time.perf_counter()
+    ps.execute(partial_func,
+               data.shape[0],
+               progress=Progress(),
+               cores=cores,
+               chunksize=chunksize,
+               arrays=[data] if second is None else [data, second])
+    elapsed = time.perf_counter() - start
+    label = chunksize if chunksize else "auto"
+    print(f"{name:8} chunksize {label:>4}: {elapsed:8.3f} s, {data.shape[0] / elapsed:10.1f} images/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[1000, 2048, 2048])
+    parser.add_argument("--cores", type=int, default=max(pu.get_cores(), 2))
+    args = parser.parse_args()
+
+    data = pu.create_array(tuple(args.shape), np.float32)
+    data[:] = np.random.rand(*args.shape[1:]).astype(np.float32)
+    norm_divide = pu.create_array(tuple(args.shape[1:]), np.float32)
+    norm_divide[:] = 1.0
+    print(f"Shape {tuple(args.shape)}, {args.cores} cores")
+
+    divide = ps.create_partial(_divide, ps.inplace_second_2d)
+    median = ps.create_partial(scipy_ndimage.median_filter, ps.return_to_self, size=3, mode="reflect")
+    for chunksize in [1, None]:
+        run("divide", data, divide, norm_divide, args.cores, chunksize)
+    for chunksize in [1, None]:
+        run("median", data, median, None, args.cores, chunksize)
+    manager.end_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Compares the "process", "thread" and "serial" execution backends for every
+filter in `core/operations` that runs its kernel through `parallel.shared.execute`.
+
+Every run is given a fresh copy of the same stack, the copy is not timed.
+Filters whose optional dependencies are missing are reported as unavailable.
+
+With --trace the timings of every chunk of images are saved in the Chrome trace event format,
+which can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Usage: python -m benchmarks.filter_backends [--shape 100 512 512] [--cores N] [--filters Gaussian Median ...]
+                                            [--trace trace.json]
+"""
+import argparse
+import importlib
+import time
+from functools import partial
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.monitor_normalisation.monitor_normalisation import _divide_by_counts
+from mantidimaging.core.parallel import manager, shared as ps, utility as pu
+from mantidimaging.core.parallel.timing import ExecutionTimings, save_chrome_trace
+from mantidimaging.core.parallel.utility import ExecutionBackend
+from mantidimaging.core.utility.progress_reporting import Progress
+from mantidimaging.core.utility.registrator import get_package_children
+from mantidimaging.core.utility.sensible_roi import SensibleROI
+
+
+def _monitor_normalisation(images: Images, cores: int, progress: Progress):
+    # the filter reads the counts from a log file, time its kernel the way filter_func runs it
+    from mantidimaging.core.operations.monitor_normalisation import MonitorNormalisation
+    counts = np.linspace(1, 2, images.num_projections)
+    ps.execute(ps.create_partial(_divide_by_counts, fwd_function=ps.inplace2),
+               images.num_projections,
+               progress,
+               cores=cores,
+               arrays=[images.data, counts],
+               backend=MonitorNormalisation.parallel_backend)
+
+
+def filter_runs(shape) -> Dict[str, Callable]:
+    """
+    :return: For each filter name, a function taking (images, cores, progress) that applies the filter
+    """
+    flat = Images(np.full((4, ) + tuple(shape[1:]), 2, dtype=np.float32))
+    dark = Images(np.full((4, ) + tuple(shape[1:]), 0.1, dtype=np.float32))
+    roi = SensibleROI(0, 0, shape[2] // 4, shape[1] // 4)
+    return {
+        "Flat-fielding": lambda f: partial(f, flat_before=flat, dark_before=dark, selected_flat_fielding="Only Before"),
+        "Gaussian": lambda f: partial(f, size=3, mode="reflect", order=0),
+        "Median": lambda f: partial(f, size=3, mode="reflect"),
+        "Monitor Normalisation": lambda f: _monitor_normalisation,
+        "Remove Outliers": lambda f: partial(f, diff=0.5, radius=3),
+        "Rebin": lambda f: partial(f, rebin_param=0.5, mode="reflect"),
+        "ROI Normalisation": lambda f: partial(f, region_of_interest=roi, normalisation_mode="Stack Average"),
+        "Rotate Stack": lambda f: partial(f, angle=30),
+        "Remove all stripes": lambda f: f,
+        "Remove dead stripes": lambda f: f,
+        "Remove large stripes": lambda f: f,
+        "Remove stripes with filtering": lambda f: f,
+        "Remove stripes with sorting and fitting": lambda f: f,
+    }
+
+
+def load_filters() -> Dict[str, BaseFilter]:
+    """
+    Imports the filter packages one by one, so a missing optional dependency only skips that filter.
+    """
+    filters = {}
+    for package in get_package_children("mantidimaging.core.operations", packages=True):
+        try:
+            module = importlib.import_module(package.name)
+        except ImportError:
+            continue
+        if hasattr(module, "FILTER_CLASS"):
+            filters[module.FILTER_CLASS.filter_name] = module.FILTER_CLASS
+    return filters
+
+
+def time_filter(filter_class: BaseFilter, run: Callable, source: np.ndarray, cores: int, backend: ExecutionBackend,
+                timings: List[ExecutionTimings]):
+    images = Images(pu.create_array(source.shape, source.dtype))
+    images.data[:] = source
+    original = filter_class.parallel_backend
+    filter_class.parallel_backend = backend
+    progress = Progress()
+    progress.record_timings = True
+    try:
+        start = time.perf_counter()
+        run(images, cores=cores, progress=progress)
+        return time.perf_counter() - start
+    finally:
+        filter_class.parallel_backend = original
+        for execution in progress.execution_timings:
+            execution.msg = f"{filter_class.filter_name} {backend.value}"
+        timings.extend(progress.execution_timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[100, 512, 512])
+    parser.add_argument("--cores", type=int, default=max(pu.get_cores(), 2))
+    parser.add_argument("--filters", nargs="*", default=None)
+    parser.add_argument("--trace", default=None, help="Save the timings of the chunks to this JSON file")
+    args = parser.parse_args()
+
+    source = np.random.rand(*args.shape).astype(np.float32)
+    runs = filter_runs(args.shape)
+    available = load_filters()
+    # start the workers before timing, so that only the execution is measured
+    manager.get_pool(args.cores)
+
+    timings: List[ExecutionTimings] = []
+    print(f"Shape {tuple(args.shape)}, {args.cores} cores")
+    print(f"{'filter':42}" + "".join(f"{backend.value:>12}" for backend in ExecutionBackend) + "     default")
+    for name, make_run in runs.items():
+        if args.filters is not None and name not in args.filters:
+            continue
+        if name not in available:
+            print(f"{name:42}  unavailable")
+            continue
+        filter_class = available[name]
+        run = make_run(filter_class.filter_func)
+        times = [time_filter(filter_class, run, source, args.cores, backend, timings) for backend in ExecutionBackend]
+        print(f"{name:42}" + "".join(f"{t:11.3f}s" for t in times) + f"{filter_class.parallel_backend.value:>12}")
+    manager.end_pool()
+    if args.trace is not None:
+        save_chrome_trace(timings, args.trace)
+        print(f"Saved the timings of {sum(len(execution.chunks) for execution in timings)} chunks to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
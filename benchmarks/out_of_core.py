@@ -0,0 +1,73 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Runs flat-fielding and a median filter out of core on a stack of TIFF files
+(only the median filter for slabs of sinograms, as the flats are projections),
+and reports the peak resident memory against the memory budget.
+
+The stack is written to a temporary directory first, that is not timed or measured,
+apart from the peak memory of writing a single image.
+
+Usage: python -m benchmarks.out_of_core [--shape 200 1024 1024] [--budget-mb 256] [--axis 0|1]
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.io.saver import write_img
+from mantidimaging.core.operations import out_of_core
+from mantidimaging.core.operations.flat_fielding import FlatFieldFilter
+from mantidimaging.core.operations.median_filter import MedianFilter
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[200, 1024, 1024])
+    parser.add_argument("--budget-mb", type=float, default=256)
+    parser.add_argument("--axis", type=int, default=out_of_core.PROJECTIONS)
+    args = parser.parse_args()
+
+    num_images, height, width = args.shape
+    flat = Images(np.full((4, height, width), 2, dtype=np.float32))
+    dark = Images(np.full((4, height, width), 0.1, dtype=np.float32))
+    operations = [partial(MedianFilter.filter_func, size=3, mode="reflect")]
+    if args.axis == out_of_core.PROJECTIONS:
+        operations.insert(
+            0,
+            partial(FlatFieldFilter.filter_func,
+                    flat_before=flat,
+                    dark_before=dark,
+                    selected_flat_fielding="Only Before"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_names = [os.path.join(directory, f"image_{i:05}.tif") for i in range(num_images)]
+        for file_name in file_names:
+            write_img(np.random.rand(height, width).astype(np.float32), file_name)
+        baseline = peak_rss_mb()
+
+        start = time.perf_counter()
+        slabs = out_of_core.run_out_of_core(file_names,
+                                            operations,
+                                            os.path.join(directory, "output.npy"),
+                                            axis=args.axis,
+                                            memory_budget_mb=args.budget_mb)
+        elapsed = time.perf_counter() - start
+
+    stack_mb = num_images * height * width * 4 / 1024 / 1024
+    print(f"Shape {tuple(args.shape)} ({stack_mb:.0f} MB), {len(slabs)} slabs along axis {args.axis}")
+    print(f"Time {elapsed:.2f}s, peak RSS {peak_rss_mb():.0f} MB "
+          f"(before processing {baseline:.0f} MB, budget {args.budget_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
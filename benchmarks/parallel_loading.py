@@ -0,0 +1,81 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Compares loading a stack of TIFF or FITS files with different numbers of readers, see `img_loader.READERS`.
+
+Loads the files in --directory, or writes --count random TIFF images of --shape and --file-dtype to a
+temporary directory when none is given. The stack is loaded as float32, so uint16 files measure the
+conversion done while decoding, see `loader.get_loader_func`. Every number of readers is run --repeats
+times with the best time reported. The files are in the page cache after the first read, so to measure
+the storage rather than the decoding, point --directory at a dataset larger than the free memory or drop
+the caches between runs.
+
+Usage: python -m benchmarks.parallel_loading [--directory DIR --prefix PREFIX --format tif]
+                                             [--count 200] [--shape 1024 1024] [--file-dtype uint16]
+                                             [--readers 1 4 8 16] [--repeats 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from mantidimaging.core.io.loader import img_loader
+from mantidimaging.core.io.loader.loader import get_loader_func
+from mantidimaging.core.io.saver import write_img
+from mantidimaging.core.io.utility import get_file_names, storage_type
+from mantidimaging.core.utility.progress_reporting import Progress
+
+
+def write_images(directory: str, count: int, shape, dtype) -> str:
+    image = (np.random.rand(*shape) * 1000).astype(dtype)
+    for i in range(count):
+        write_img(image, os.path.join(directory, f"image_{i:05}.tif"))
+    return "image"
+
+
+def best_time(files, load_func, image_shape, readers: int, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        # a progress without handlers, so no progress bar is printed
+        progress = Progress(num_steps=len(files))
+        loader = img_loader.ImageLoader(load_func, None, image_shape, np.float32, None, progress, readers=readers)
+        start = time.perf_counter()
+        loader.load_files(files)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory")
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--format", default="tif")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--shape", type=int, nargs=2, default=[1024, 1024])
+    parser.add_argument("--file-dtype", default="uint16")
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        directory, prefix, in_format = args.directory, args.prefix, args.format
+        if directory is None:
+            directory, in_format = temp_directory, "tif"
+            prefix = write_images(temp_directory, args.count, args.shape, args.file_dtype)
+
+        files = get_file_names(directory, in_format, prefix)
+        load_func = get_loader_func(in_format)
+        image_shape = load_func(files[0]).shape
+        size_gb = len(files) * int(np.prod(image_shape)) * 4 / 1024**3
+
+        print(f"{len(files)} images of {image_shape}, {size_gb:.2f}GB as float32, "
+              f"storage type {storage_type(directory)}, default readers {img_loader.default_readers(files[0])}")
+        for readers in args.readers:
+            elapsed = best_time(files, load_func, image_shape, readers, args.repeats)
+            print(f"{readers:3} readers{elapsed:9.3f}s{size_gb / elapsed:9.2f}GB/s")
+
+
+if __name__ == "__main__":
+    main()
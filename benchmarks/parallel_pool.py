@@ -0,0 +1,68 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Measures the per-call overhead of `parallel.shared.execute` with a fresh
+process pool per call (previous behaviour) against the persistent pool.
+
+The kernel does no work, so the time per call is the overhead of the executor.
+
+The persistent pool can be started with any start method, the arrays are
+attached by name in the workers.
+
+Usage: python -m benchmarks.parallel_pool [--shape 50 512 512] [--cores N] [--repeats 10]
+                                          [--start-method fork|spawn|forkserver]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mantidimaging.core.parallel import manager, shared as ps, utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+
+def _noop(data):
+    pass
+
+
+def run_fresh_pool(data: np.ndarray, cores: int) -> float:
+    f = ps.create_partial(_noop, ps.inplace1)
+    start = time.perf_counter()
+    ps.execute(f, data.shape[0], progress=Progress(), cores=cores, arrays=[data])
+    # the next call has to start the workers again
+    manager.end_pool()
+    return time.perf_counter() - start
+
+
+def run_persistent_pool(data: np.ndarray, cores: int) -> float:
+    f = ps.create_partial(_noop, ps.inplace1)
+    start = time.perf_counter()
+    ps.execute(f, data.shape[0], progress=Progress(), cores=cores, arrays=[data])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[50, 512, 512])
+    parser.add_argument("--cores", type=int, default=max(pu.get_cores(), 2))
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--start-method", default=None)
+    args = parser.parse_args()
+    manager.set_start_method(args.start_method)
+
+    data = pu.create_array(tuple(args.shape), np.float32)
+    print(f"Shape {tuple(args.shape)}, {args.cores} cores, {args.repeats} repeats, "
+          f"start method {args.start_method or 'default'}")
+
+    fresh = [run_fresh_pool(data, args.cores) for _ in range(args.repeats)]
+    print(f"Fresh pool per call:  mean {np.mean(fresh) * 1000:8.2f} ms, min {np.min(fresh) * 1000:8.2f} ms")
+
+    # the first call starts the workers, later calls reuse them
+    run_persistent_pool(data, args.cores)
+    persistent = [run_persistent_pool(data, args.cores) for _ in range(args.repeats)]
+    print(f"Persistent pool:      mean {np.mean(persistent) * 1000:8.2f} ms, min {np.min(persistent) * 1000:8.2f} ms")
+    manager.end_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Compares copying a stack with its first two axes swapped, as done when creating sinograms,
+with `np.swapaxes` against the tiled parallel copy of `parallel.transpose.swap_first_axes`.
+
+The output array is allocated before timing, and every method is run --repeats times
+with the best time reported.
+
+Usage: python -m benchmarks.swap_axes [--shape 400 1024 1024] [--cores N] [--repeats 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.parallel.transpose import swap_first_axes
+
+
+def swapaxes_copy(source: np.ndarray, output: np.ndarray, cores: int):
+    output[:] = np.swapaxes(source, 0, 1)
+
+
+def tiled_copy(source: np.ndarray, output: np.ndarray, cores: int):
+    swap_first_axes(source, output, cores=cores)
+
+
+def best_time(method, source: np.ndarray, output: np.ndarray, cores: int, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        method(source, output, cores)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[400, 1024, 1024])
+    parser.add_argument("--cores", type=int, default=pu.get_cores())
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    source = pu.create_array(tuple(args.shape), np.float32)
+    source[:] = np.random.rand(*args.shape[1:]).astype(np.float32)
+    output = pu.create_array((args.shape[1], args.shape[0], args.shape[2]), np.float32)
+    size_gb = source.nbytes / 1024**3
+
+    print(f"Shape {tuple(args.shape)}, {size_gb:.2f}GB, {args.cores} cores")
+    reference = None
+    for name, method in (("np.swapaxes", swapaxes_copy), ("tiled parallel", tiled_copy)):
+        elapsed = best_time(method, source, output, args.cores, args.repeats)
+        print(f"{name:16}{elapsed:9.3f}s{size_gb / elapsed:9.2f}GB/s")
+        if reference is None:
+            reference = np.copy(output)
+        else:
+            np.testing.assert_equal(output, reference)
+
+
+if __name__ == "__main__":
+    main()
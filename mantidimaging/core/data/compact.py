@@ -0,0 +1,94 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Storage of stacks in 16 bits per value, half the memory of float32.
+
+Raw detector data is usually 16-bit integers, which are kept as uint16 without any loss. Float
+data can be stored as float16, or as uint16 scaled to the range of the stack, with the offset
+and slope recorded so the values can be recovered. Filters that can't run on the compact
+values upcast the stack to float32 first, one chunk of images at a time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+
+COMPACT_DTYPES = ("uint16", "float16")
+WORKING_DTYPE = np.float32
+
+# Size of the float32 chunks converted by each thread, so the conversion doesn't need temporaries of the whole stack
+CONVERT_CHUNK_BYTES = 64 * 1024 * 1024
+
+UINT16_MAX = np.iinfo(np.uint16).max
+
+
+class ValueScale(NamedTuple):
+    """
+    The values of a scaled uint16 stack are offset + slope * stored value
+    """
+    offset: float
+    slope: float
+
+    @staticmethod
+    def for_range(minimum: float, maximum: float) -> 'ValueScale':
+        return ValueScale(float(minimum), float(maximum - minimum) / UINT16_MAX if maximum > minimum else 1.0)
+
+    def expand(self, stored: np.ndarray, output: Optional[np.ndarray] = None) -> np.ndarray:
+        output = np.multiply(stored, WORKING_DTYPE(self.slope), out=output, dtype=WORKING_DTYPE)
+        output += WORKING_DTYPE(self.offset)
+        return output
+
+    def quantise(self, values: np.ndarray, output: np.ndarray) -> np.ndarray:
+        scaled = (values - WORKING_DTYPE(self.offset)) / WORKING_DTYPE(self.slope)
+        np.clip(np.rint(scaled, out=scaled), 0, UINT16_MAX, out=scaled)
+        output[:] = scaled
+        return output
+
+
+def is_compact(dtype) -> bool:
+    return np.dtype(dtype).name in COMPACT_DTYPES
+
+
+def to_values(stored: np.ndarray, scale: Optional[ValueScale] = None) -> np.ndarray:
+    """
+    :param scale: The scale of the stored values if they are scaled uint16
+    :return: The values of compact data upcast to float32, other data is returned as is
+    """
+    if scale is not None:
+        return scale.expand(stored)
+    if is_compact(stored.dtype):
+        return stored.astype(WORKING_DTYPE)
+    return stored
+
+
+def _chunks(shape):
+    image_bytes = int(np.prod(shape[1:])) * np.dtype(WORKING_DTYPE).itemsize
+    step = max(1, CONVERT_CHUNK_BYTES // max(1, image_bytes))
+    return [slice(start, min(start + step, shape[0])) for start in range(0, shape[0], step)]
+
+
+def convert(source: np.ndarray,
+            output: np.ndarray,
+            source_scale: Optional[ValueScale] = None,
+            output_scale: Optional[ValueScale] = None,
+            cores: Optional[int] = None) -> np.ndarray:
+    """
+    Copies the values of the source into the output, which can have a different dtype, a chunk of images at a time.
+
+    :param source_scale: The scale of the source if it is scaled uint16
+    :param output_scale: The scale to store the output with if it is scaled uint16
+    :return: The output array
+    """
+    def convert_chunk(chunk: slice):
+        values = source[chunk] if source_scale is None else source_scale.expand(source[chunk])
+        if output_scale is None:
+            output[chunk] = values
+        else:
+            output_scale.quantise(values, output[chunk])
+
+    # the conversions release the GIL, so the chunks are converted in parallel
+    with ThreadPoolExecutor(cores or pu.get_cores()) as executor:
+        list(executor.map(convert_chunk, _chunks(source.shape)))
+    return output
@@ -6,6 +6,9 @@ from typing import Optional
 
 from mantidimaging.core.data import Images
 
+# Names of the stacks of flat and dark images in a dataset
+REFERENCE_STACKS = ("flat_before", "flat_after", "dark_before", "dark_after")
+
 
 @dataclass
 class Dataset:
@@ -4,17 +4,25 @@
 import datetime
 import json
 from copy import deepcopy
-from typing import List, Tuple, Optional, Any, Dict
+from logging import getLogger
+from typing import Iterable, List, Tuple, Optional, Any, Dict
 
 import numpy as np
 
 from mantidimaging.core.data.utility import mark_cropped
 from mantidimaging.core.operation_history import const
 from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.data.compact import COMPACT_DTYPES, UINT16_MAX, WORKING_DTYPE, ValueScale, convert, \
+    is_compact
+from mantidimaging.core.data.pyramid import ImagePyramid
+from mantidimaging.core.data.statistics import StackStatistics
+from mantidimaging.core.parallel.transpose import swap_first_axes
 from mantidimaging.core.utility.data_containers import ProjectionAngles, Counts
 from mantidimaging.core.utility.imat_log_file_parser import IMATLogFile
 from mantidimaging.core.utility.sensible_roi import SensibleROI
 
+LOG = getLogger(__name__)
+
 
 class Images:
     NO_FILENAME_IMAGE_TITLE_STRING = "Image: {}"
@@ -44,13 +52,20 @@ class Images:
         self._proj180deg: Optional[Images] = None
         self._log_file: Optional[IMATLogFile] = None
         self._projection_angles: Optional[ProjectionAngles] = None
+        self._pyramid: Optional[ImagePyramid] = None
+        self._cached_data: Optional[np.ndarray] = None
 
     def __eq__(self, other):
+        if other is self:
+            return True
         if isinstance(other, Images):
-            return np.array_equal(self.data, other.data) \
-                   and self.is_sinograms == other.is_sinograms \
+            # the cheap checks are done first, so the data is only read for stacks that could be equal
+            return self.is_sinograms == other.is_sinograms \
+                   and self.indices == other.indices \
                    and self.metadata == other.metadata \
-                   and self.indices == other.indices
+                   and self.data.shape == other.data.shape \
+                   and self.data.dtype == other.data.dtype \
+                   and (self.data is other.data or np.array_equal(self.data, other.data))
         elif isinstance(other, np.ndarray):
             return np.array_equal(self.data, other)
         else:
@@ -62,6 +77,47 @@ class Images:
     def __str__(self):
         return f'Image Stack: data={self.data.shape} | properties|={len(self.metadata)}'
 
+    def _check_cached_data(self):
+        if self._cached_data is not self.data:
+            self._pyramid = None
+            self._cached_data = self.data
+
+    def read_statistics(self, cores: Optional[int] = None) -> StackStatistics:
+        """
+        Reads the min, max, mean and NaN count of the data in one parallel pass. They are not kept,
+        as the data can be changed in place without the stack knowing.
+        """
+        return StackStatistics(self.data, cores)
+
+    @property
+    def pyramid(self) -> ImagePyramid:
+        """
+        Reduced resolution copies of the images, for display. The images are reduced when they are first
+        requested, and reduced again after the data is replaced, an operation is recorded,
+        or `invalidate_caches` is called.
+        """
+        self._check_cached_data()
+        if self._pyramid is None:
+            self._pyramid = ImagePyramid(self.data)
+        return self._pyramid
+
+    def invalidate_caches(self, indices: Optional[Iterable[int]] = None):
+        """
+        Marks the images of the pyramid to be reduced again, after the data has been changed in place.
+
+        :param indices: The images along the first axis that changed, only these are read again.
+                        If None every image is reduced again on next use.
+        """
+        if self._cached_data is None:
+            return
+        if self._cached_data is not self.data:
+            self._check_cached_data()
+            return
+
+        # the pyramid is kept, the stack visualiser draws from it
+        if self._pyramid is not None:
+            self._pyramid.invalidate(indices)
+
     def count(self) -> int:
         return len(self._filenames) if self._filenames else 0
 
@@ -84,9 +140,11 @@ class Images:
         if rescale_params is not None:
             self.metadata[const.RESCALED] = rescale_params
 
-        json.dump(self.metadata, f, indent=4)
+        # the values of scaled stacks are saved, not the stored values
+        json.dump({k: v for k, v in self.metadata.items() if k != const.VALUE_SCALE}, f, indent=4)
 
     def record_operation(self, func_name: str, display_name, *args, **kwargs):
+        self.invalidate_caches()
         if const.OPERATION_HISTORY not in self.metadata:
             self.metadata[const.OPERATION_HISTORY] = []
 
@@ -110,11 +168,19 @@ class Images:
             display_name
         })
 
-    def copy(self, flip_axes=False) -> 'Images':
+    def copy(self, flip_axes=False, storage: Optional[pu.StorageMode] = None) -> 'Images':
+        """
+        :param flip_axes: Swap the first two axes, turning projections into sinograms and vice versa
+        :param storage: Whether the copy is kept in RAM or backed by a file, the same as this stack if None
+        """
         shape = (self.data.shape[1], self.data.shape[0], self.data.shape[2]) if flip_axes else self.data.shape
-        data_copy = pu.create_array(shape, self.data.dtype)
+        storage = storage if storage is not None else self.storage
+        if flip_axes and storage == pu.StorageMode.SHARED and not pu.enough_memory(shape, self.data.dtype, storage):
+            LOG.warning("Not enough memory to swap the axes of the stack, the copy is backed by a file instead")
+            storage = pu.StorageMode.FILE
+        data_copy = pu.create_array(shape, self.data.dtype, storage)
         if flip_axes:
-            data_copy[:] = np.swapaxes(self.data, 0, 1)
+            swap_first_axes(self.data, data_copy)
         else:
             data_copy[:] = self.data[:]
 
@@ -127,7 +193,7 @@ class Images:
     def copy_roi(self, roi: SensibleROI):
         shape = (self.data.shape[0], roi.height, roi.width)
 
-        data_copy = pu.create_array(shape, self.data.dtype)
+        data_copy = pu.create_array(shape, self.data.dtype, self.storage)
         data_copy[:] = self.data[:, roi.top:roi.bottom, roi.left:roi.right]
 
         images = Images(data_copy,
@@ -232,9 +298,104 @@ class Images:
     def dtype(self):
         return self._data.dtype
 
+    @property
+    def storage(self) -> pu.StorageMode:
+        """
+        Whether the data is kept in RAM or backed by a file in the scratch directory, see `pu.create_array`
+        """
+        return pu.storage_of(self._data)
+
+    def move_to(self, storage: pu.StorageMode):
+        """
+        Copies the data into a new array kept in RAM or backed by a file, and frees the current one.
+        The pyramid is kept, as the values don't change.
+        """
+        if storage == self.storage:
+            return
+        data = pu.create_array(self.data.shape, self.dtype, storage)
+        data[:] = self.data
+        caches_valid = self._cached_data is not None and self._cached_data is self.data
+        self.free_memory()
+        self.data = data
+        if caches_valid:
+            self._cached_data = data
+            if self._pyramid is not None:
+                self._pyramid.source = data
+
+    def free_memory(self):
+        """
+        Unlinks the shared memory or the file of the data, so it is returned to the system as soon as
+        the last reference to the array is dropped instead of when it is garbage collected.
+        Worker processes can no longer attach to the data afterwards.
+        """
+        pu.free_shared_array(self._data)
+
+    @property
+    def is_compact(self) -> bool:
+        """
+        Whether the data is stored in 16 bits per value, see `data.compact`
+        """
+        return is_compact(self.dtype)
+
+    @property
+    def value_scale(self) -> Optional[ValueScale]:
+        """
+        The offset and slope of the values of a stack stored as scaled uint16, None for any other stack
+        """
+        scale = self.metadata.get(const.VALUE_SCALE)
+        return ValueScale(*scale) if scale is not None else None
+
+    def _replace_data(self, data: np.ndarray, value_scale: Optional[ValueScale]):
+        self.free_memory()
+        self.data = data
+        if value_scale is not None:
+            self.metadata[const.VALUE_SCALE] = list(value_scale)
+        else:
+            self.metadata.pop(const.VALUE_SCALE, None)
+
+    def to_compact(self, dtype: str = "uint16", cores: Optional[int] = None):
+        """
+        Converts the data to 16 bits per value, halving the memory of a float32 stack.
+        Integer data in the uint16 range is kept as it is, other data is stored as uint16
+        scaled to the range of the stack, or as float16.
+
+        :param dtype: One of COMPACT_DTYPES
+        :raises ValueError: If the values can't be stored in the dtype
+        """
+        if dtype not in COMPACT_DTYPES:
+            raise ValueError(f"{dtype} is not a compact dtype, expected one of {COMPACT_DTYPES}")
+        if self.dtype.name == dtype:
+            return
+        self.to_working_dtype(cores)
+
+        statistics = self.read_statistics(cores)
+        value_scale = None
+        if dtype == "uint16":
+            in_range = np.issubdtype(self.dtype, np.integer) and statistics.min >= 0 and statistics.max <= UINT16_MAX
+            if not in_range:
+                if statistics.nan_count:
+                    raise ValueError("The stack has NaNs, which can't be stored as scaled uint16")
+                value_scale = ValueScale.for_range(statistics.min, statistics.max)
+        elif max(abs(statistics.min), abs(statistics.max)) > np.finfo(np.float16).max:
+            raise ValueError(f"The values of the stack are outside of the float16 range, from "
+                             f"{statistics.min} to {statistics.max}")
+
+        output = pu.create_array(self.data.shape, np.dtype(dtype), self.storage)
+        self._replace_data(convert(self.data, output, output_scale=value_scale, cores=cores), value_scale)
+
+    def to_working_dtype(self, cores: Optional[int] = None):
+        """
+        Upcasts compact data to float32, applying the value scale of scaled uint16.
+        Does nothing if the data isn't compact.
+        """
+        if not self.is_compact:
+            return
+        output = pu.create_array(self.data.shape, WORKING_DTYPE, self.storage)
+        self._replace_data(convert(self.data, output, source_scale=self.value_scale, cores=cores), None)
+
     @staticmethod
-    def create_empty_images(shape, dtype, metadata):
-        arr = pu.create_array(shape, dtype)
+    def create_empty_images(shape, dtype, metadata, storage: pu.StorageMode = pu.StorageMode.SHARED):
+        arr = pu.create_array(shape, dtype, storage)
         return Images(arr, metadata=metadata)
 
     @property
@@ -260,6 +421,12 @@ class Images:
 
         self._projection_angles = angles
 
+    def has_projection_angles(self) -> bool:
+        """
+        :return: Whether the angles were given by a log or a file, rather than generated
+        """
+        return self._log_file is not None or self._projection_angles is not None
+
     def projection_angles(self, max_angle: float = 360.0) -> ProjectionAngles:
         """
         Return projection angles, in priority order:
@@ -0,0 +1,259 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Stacks of projections that are decoded from their files when they are first used,
+instead of all of them when the stack is loaded.
+"""
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from logging import getLogger
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.data.images import Images
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+# Memory used by the decoded images kept by each lazy stack
+DEFAULT_CACHE_MB = 512
+
+
+class FrameCache:
+    """
+    Least recently used cache of the decoded images of a stack, bounded by the number of images.
+    """
+    def __init__(self, max_frames: int):
+        self.max_frames = max(1, max_frames)
+        self._frames: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, index: int, decode: Callable[[int], np.ndarray]) -> np.ndarray:
+        """
+        :return: The cached image, or the image returned by decode(index), which is then cached
+        """
+        with self._lock:
+            frame = self._frames.get(index)
+            if frame is not None:
+                self._frames.move_to_end(index)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        # decoded outside of the lock, so other threads can use the cache meanwhile
+        frame = decode(index)
+        with self._lock:
+            self._frames[index] = frame
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+        return frame
+
+    def peek(self, index: int) -> Optional[np.ndarray]:
+        """
+        :return: The cached image without marking it as used, or None
+        """
+        with self._lock:
+            return self._frames.get(index)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+class LazyImages(Images):
+    """
+    A stack of projections that only holds the names of its files until it is used.
+
+    Each image is decoded when it is first accessed through `projection` or `index_as_images`,
+    and is kept in a least recently used cache bounded by cache_mb. This is enough for scrolling
+    through the stack and for the previews of the operations.
+
+    Anything that uses `data` loads the whole stack first, see `materialise`,
+    after which the stack behaves like `Images`.
+
+    :param load_func: Reads a file into a 2D array
+    :param filenames: The file of each image of the stack
+    :param image_shape: The shape of every image
+    :param cache_mb: The memory used by the decoded images kept before the stack is loaded
+    :param storage: Where the whole stack is allocated when it is loaded
+    """
+    def __init__(self,
+                 load_func: Callable[[str], np.ndarray],
+                 filenames: List[str],
+                 image_shape: Tuple[int, int],
+                 dtype=np.float32,
+                 indices: Optional[Tuple[int, int, int]] = None,
+                 metadata=None,
+                 cache_mb: float = DEFAULT_CACHE_MB,
+                 storage: pu.StorageMode = pu.StorageMode.SHARED):
+        super().__init__(None, filenames, indices, metadata)  # type: ignore
+        self._load_func = load_func
+        self._image_shape = tuple(image_shape)
+        self._lazy_dtype = np.dtype(dtype)
+        self._storage = storage
+
+        image_mb = int(np.prod(self._image_shape)) * self._lazy_dtype.itemsize / 1024 / 1024
+        self.cache = FrameCache(int(cache_mb // image_mb) if image_mb > 0 else 1)
+        self._materialise_lock = threading.Lock()
+
+    def __str__(self):
+        return f'Lazy Image Stack: data={self.shape} | loaded={self.is_materialised} | properties|={len(self.metadata)}'
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self._data is not None:
+            return self._data.shape
+        return (len(self._filenames or []), ) + self._image_shape
+
+    @property
+    def is_materialised(self) -> bool:
+        return self._data is not None
+
+    def _decode(self, index: int) -> np.ndarray:
+        image = np.asarray(self._load_func(self._filenames[index]), dtype=self._lazy_dtype)  # type: ignore
+        if image.shape != self._image_shape:
+            raise ValueError(f"An image has different width and/or height dimensions! All images must have the same "
+                             f"dimensions. Expected dimensions: {self._image_shape}, found {image.shape} "
+                             f"in {self._filenames[index]}")  # type: ignore
+        return image
+
+    def materialise(self, progress: Optional[Progress] = None) -> np.ndarray:
+        """
+        Loads the whole stack, reusing the images that are in the cache. Only the first call loads the images,
+        any call made from another thread meanwhile waits for it to finish.
+
+        :return: The data of the stack
+        """
+        with self._materialise_lock:
+            if self._data is None:
+                LOG.info(f"Loading all {self.shape[0]} images of the lazy stack")
+                progress = Progress.ensure_instance(progress, num_steps=self.shape[0], task_name='Loading')
+                data = pu.create_array(self.shape, self._lazy_dtype, self._storage)
+                with progress:
+                    for index in range(self.shape[0]):
+                        cached = self.cache.peek(index)
+                        data[index] = cached if cached is not None else self._decode(index)
+                        progress.update(msg='Image')
+                self._data = data
+                self.cache.clear()
+        return self._data
+
+    @property
+    def data(self) -> np.ndarray:
+        return self.materialise()
+
+    @data.setter
+    def data(self, other: np.ndarray):
+        self._data = other
+
+    @property
+    def lazy_stack(self) -> 'LazyStack':
+        return LazyStack(self)
+
+    @property
+    def dtype(self):
+        return self._lazy_dtype if self._data is None else self._data.dtype
+
+    @property
+    def storage(self) -> pu.StorageMode:
+        return self._storage if self._data is None else pu.storage_of(self._data)
+
+    @property
+    def height(self):
+        return self.shape[1] if not self._is_sinograms else self.shape[0]
+
+    @property
+    def width(self):
+        return self.shape[2]
+
+    @property
+    def num_images(self) -> int:
+        return self.shape[0]
+
+    @property
+    def num_projections(self) -> int:
+        return self.shape[0] if not self._is_sinograms else self.shape[1]
+
+    @property
+    def projections(self):
+        return self.data if not self._is_sinograms else np.swapaxes(self.data, 0, 1)
+
+    @property
+    def sinograms(self):
+        return self.data if self._is_sinograms else np.swapaxes(self.data, 0, 1)
+
+    def image(self, index: int) -> np.ndarray:
+        """
+        :return: The image at the index of the first axis, decoded if the stack hasn't been loaded
+        """
+        if self._data is not None:
+            return self._data[index]
+        return self.cache.get(index, self._decode)
+
+    def projection(self, projection_idx) -> np.ndarray:
+        if self._data is None and not self._is_sinograms:
+            return self.image(projection_idx)
+        return super().projection(projection_idx)
+
+    def index_as_images(self, index) -> Images:
+        return Images(np.asarray([self.image(index)]), metadata=deepcopy(self.metadata), sinograms=self.is_sinograms)
+
+    def free_memory(self):
+        self.cache.clear()
+        if self._data is not None:
+            super().free_memory()
+
+
+class LazyStack:
+    """
+    Read only array-like view of a lazy stack, for displaying it without loading it.
+
+    Indexing a single image only decodes that image, anything else loads the whole stack.
+    """
+    ndim = 3
+
+    def __init__(self, images: LazyImages):
+        self.images = images
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.images.shape
+
+    @property
+    def dtype(self):
+        return self.images.dtype
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        first, rest = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if isinstance(first, (int, np.integer)):
+            return self.images.image(int(first))[rest]
+        return self.images.data[key]
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.images.data, dtype=dtype)
+
+    def transpose(self, axes):
+        if list(axes) == list(range(self.ndim)):
+            return self
+        return self.images.data.transpose(axes)
+
+    def min(self, *args, **kwargs):
+        return self.images.data.min(*args, **kwargs)
+
+    def max(self, *args, **kwargs):
+        return self.images.data.max(*args, **kwargs)
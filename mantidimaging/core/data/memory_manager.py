@@ -0,0 +1,183 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+A budget for the memory that the arrays of the application take in RAM.
+
+Every array `pu.create_array` allocates in RAM is checked against the budget, counting everything
+the application already holds: the open stacks, copies made while applying operations, reconstructions.
+When the new array would go over the budget, the stacks that were used least recently are moved to
+file backed storage in the scratch directory to make room, see `pu.StorageMode`.
+"""
+import itertools
+import threading
+import weakref
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from mantidimaging.core.data.images import Images
+from mantidimaging.core.data.lazy_images import LazyImages
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.memory_usage import system_total_memory
+
+LOG = getLogger(__name__)
+
+# Fraction of the physical memory used as the budget when no budget is set
+DEFAULT_BUDGET_FRACTION = 0.8
+
+MB = 1024 * 1024
+
+
+class StackUsage(NamedTuple):
+    name: str
+    nbytes: int
+    storage: pu.StorageMode
+    in_use: bool
+
+
+class _Entry:
+    def __init__(self, images: Images, name: Callable[[], str], last_used: int):
+        self.images = weakref.ref(images)
+        self.name = name
+        self.last_used = last_used
+        self.in_use = 0
+
+
+def _stack_bytes(images: Images) -> int:
+    if isinstance(images, LazyImages) and not images.is_materialised:
+        return 0
+    return images.data.nbytes
+
+
+def _bytes_in_memory(images: Images) -> int:
+    return _stack_bytes(images) if images.storage == pu.StorageMode.SHARED else 0
+
+
+class MemoryManager:
+    """
+    Keeps the arrays allocated in RAM by `pu.create_array` within the budget, by moving the least
+    recently used stacks that have been registered to file backed storage.
+
+    Only takes effect after `install`, which makes `pu.create_array` report its allocations.
+
+    :param budget_mb: The memory the arrays in RAM can take, DEFAULT_BUDGET_FRACTION of the physical memory if None
+    """
+    def __init__(self, budget_mb: Optional[float] = None):
+        self.budget_mb = budget_mb
+        self._entries: Dict[int, _Entry] = {}
+        self._clock = itertools.count()
+        self._lock = threading.RLock()
+        # called with the stacks that were moved, so that views of the old arrays can be refreshed
+        self.moved_callbacks: List[Callable[[Images], None]] = []
+
+    @property
+    def budget_bytes(self) -> int:
+        if self.budget_mb is None:
+            return int(system_total_memory() * DEFAULT_BUDGET_FRACTION)
+        return int(self.budget_mb * MB)
+
+    @staticmethod
+    def in_memory_bytes() -> int:
+        return pu.shared_memory_in_use()
+
+    def install(self):
+        pu.set_allocation_listener(self.make_room)
+
+    @staticmethod
+    def uninstall():
+        pu.set_allocation_listener(None)
+
+    def register(self, images: Images, name: Callable[[], str]):
+        """
+        :param name: Returns the current name of the stack, for the usage panel
+        """
+        with self._lock:
+            self._entries[id(images)] = _Entry(images, name, next(self._clock))
+        weakref.finalize(images, self.unregister_id, id(images))
+
+    def unregister(self, images: Images):
+        self.unregister_id(id(images))
+
+    def unregister_id(self, images_id: int):
+        with self._lock:
+            self._entries.pop(images_id, None)
+
+    def _entry(self, images: Images) -> Optional[_Entry]:
+        entry = self._entries.get(id(images))
+        return entry if entry is not None and entry.images() is images else None
+
+    def touch(self, images: Images):
+        """
+        Marks the stack as the most recently used one
+        """
+        with self._lock:
+            entry = self._entry(images)
+            if entry is not None:
+                entry.last_used = next(self._clock)
+
+    @contextmanager
+    def in_use(self, *stacks: Images):
+        """
+        Stops the stacks being moved while the block runs, e.g. while an operation writes into their arrays
+        """
+        with self._lock:
+            entries = [entry for entry in (self._entry(images) for images in stacks) if entry is not None]
+            for entry in entries:
+                entry.in_use += 1
+                entry.last_used = next(self._clock)
+        try:
+            yield
+        finally:
+            with self._lock:
+                for entry in entries:
+                    entry.in_use -= 1
+
+    def usage(self) -> List[StackUsage]:
+        """
+        :return: The registered stacks, the most recently used first
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.last_used, reverse=True)
+            stacks = [(entry, entry.images()) for entry in entries]
+        return [
+            StackUsage(entry.name(), _stack_bytes(images), images.storage, entry.in_use > 0) for entry, images in stacks
+            if images is not None
+        ]
+
+    def make_room(self, nbytes: int):
+        """
+        Moves the least recently used stacks that aren't in use to file backed storage,
+        until an array of nbytes fits in the budget. A stack is in use inside `in_use`,
+        or while its data is written by `ps.execute`, see `pu.arrays_in_use`.
+
+        :raises RuntimeError: If the array doesn't fit in the budget after moving every stack that can be moved
+        """
+        with self._lock:
+            excess = self.in_memory_bytes() + nbytes - self.budget_bytes
+            if excess <= 0:
+                return
+            candidates = sorted(self._entries.values(), key=lambda e: e.last_used)
+            for entry in candidates:
+                images = entry.images()
+                if excess <= 0:
+                    break
+                if images is None or entry.in_use or not _bytes_in_memory(images) \
+                        or pu.is_array_in_use(images.data):
+                    continue
+                freed = _bytes_in_memory(images)
+                LOG.info(f"Moving stack {entry.name()} of {freed / MB:.1f}MB to the scratch directory "
+                         f"to stay within the memory budget of {self.budget_bytes / MB:.0f}MB")
+                self.move_to_file(images)
+                excess -= freed
+            if excess > 0:
+                raise RuntimeError(f"Allocating {nbytes / MB:.1f}MB would go over the memory budget of "
+                                   f"{self.budget_bytes / MB:.0f}MB, even after moving the unused stacks "
+                                   "to the scratch directory.")
+
+    def move_to_file(self, images: Images):
+        images.move_to(pu.StorageMode.FILE)
+        for callback in list(self.moved_callbacks):
+            callback(images)
+
+
+memory_manager = MemoryManager()
@@ -0,0 +1,138 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Compressed storage of images in a file of the scratch directory, so that keeping
+old versions of a stack costs disk space rather than memory.
+"""
+import os
+import tempfile
+import threading
+import zlib
+from typing import Dict, Hashable, NamedTuple, Tuple
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+
+# zlib level, the fastest one is used as the data is usually noisy floats that don't compress much further
+COMPRESSION_LEVEL = 1
+
+
+class _Page(NamedTuple):
+    offset: int
+    length: int
+    shape: Tuple[int, ...]
+    dtype: np.dtype
+    checksum: int
+
+
+def checksum(image: np.ndarray) -> int:
+    return zlib.crc32(np.ascontiguousarray(image).view(np.uint8))
+
+
+def compress(image: np.ndarray) -> bytes:
+    """
+    Groups the bytes of the values by their significance before compressing them, which makes
+    the exponents of floats, that change little between pixels, compress well.
+    """
+    image = np.ascontiguousarray(image)
+    shuffled = image.view(np.uint8).reshape(-1, image.dtype.itemsize).T
+    return zlib.compress(np.ascontiguousarray(shuffled), COMPRESSION_LEVEL)
+
+
+def decompress(buffer: bytes, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    shuffled = np.frombuffer(zlib.decompress(buffer), dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(shape)
+
+
+class CompressedPageStore:
+    """
+    Images compressed into a temporary file of the scratch directory, by key.
+    The file is removed when the store is closed or garbage collected.
+
+    Storing and reading images is thread safe, and the compression runs in parallel
+    as zlib releases the GIL.
+    """
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="mantidimaging_pages_", dir=pu.scratch_directory())
+        self._pages: Dict[Hashable, _Page] = {}
+        self._lock = threading.Lock()
+        self._end = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._pages
+
+    def __len__(self):
+        return len(self._pages)
+
+    def keys(self):
+        return list(self._pages.keys())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size of the file on disk, which includes dropped images until `compact` is called
+        """
+        with self._lock:
+            self._file.flush()
+            return os.fstat(self._file.fileno()).st_size
+
+    def put(self, key: Hashable, image: np.ndarray):
+        buffer = compress(image)
+        with self._lock:
+            self._file.seek(self._end)
+            self._file.write(buffer)
+            self._pages[key] = _Page(self._end, len(buffer), image.shape, image.dtype, checksum(image))
+            self._end += len(buffer)
+
+    def get(self, key: Hashable) -> np.ndarray:
+        with self._lock:
+            page = self._pages[key]
+            self._file.seek(page.offset)
+            buffer = self._file.read(page.length)
+        return decompress(buffer, page.shape, page.dtype)
+
+    def matches(self, key: Hashable, image: np.ndarray) -> bool:
+        """
+        :return: Whether the image is the same as the stored one
+        """
+        page = self._pages[key]
+        if page.shape != image.shape or page.dtype != image.dtype or page.checksum != checksum(image):
+            return False
+        return np.array_equal(self.get(key), image)
+
+    def drop(self, key: Hashable):
+        """
+        Forgets the image, its space in the file is given back by `compact`
+        """
+        with self._lock:
+            del self._pages[key]
+
+    def compact(self):
+        """
+        Moves the stored images into a new file, giving back the space of the dropped ones
+        """
+        with self._lock:
+            if sum(page.length for page in self._pages.values()) == self._end:
+                return
+            compacted = tempfile.TemporaryFile(prefix="mantidimaging_pages_", dir=pu.scratch_directory())
+            pages: Dict[Hashable, _Page] = {}
+            end = 0
+            try:
+                for key, page in self._pages.items():
+                    self._file.seek(page.offset)
+                    compacted.write(self._file.read(page.length))
+                    pages[key] = page._replace(offset=end)
+                    end += page.length
+                compacted.flush()
+            except Exception:
+                compacted.close()
+                raise
+            self._file.close()
+            self._file, self._pages, self._end = compacted, pages, end
+
+    def close(self):
+        with self._lock:
+            self._pages.clear()
+            self._file.close()
@@ -0,0 +1,102 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Reduced resolution copies of the images of a stack, for displaying them zoomed out without
+drawing every pixel of the full resolution images.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+
+# Reduction factors of the levels, each level is half the size of the one before it
+PYRAMID_FACTORS = (2, 4, 8)
+PYRAMID_DTYPE = np.float32
+
+
+def reduce_image(image: np.ndarray) -> np.ndarray:
+    """
+    Halves the size of the image by averaging blocks of 2x2 pixels.
+    An odd last row or column is dropped.
+    """
+    height, width = image.shape[0] // 2, image.shape[1] // 2
+    blocks = image[:height * 2, :width * 2].reshape(height, 2, width, 2)
+    return blocks.mean(axis=(1, 3), dtype=PYRAMID_DTYPE)
+
+
+class ImagePyramid:
+    """
+    The images of a stack reduced by each of the factors, built one image at a time when they are
+    first requested. Each level is reduced from the level before it, so building an image of the
+    8x level also builds it in the 2x and 4x levels.
+
+    :param source: The stack, anything indexed by the image index like an array, e.g. a `LazyStack`
+    :param factors: Reduction factors, consecutive powers of 2 starting from 2.
+                    Factors that would reduce the images to nothing are left out.
+    """
+    def __init__(self, source, factors: Sequence[int] = PYRAMID_FACTORS):
+        self.source = source
+        self.shape: Tuple[int, ...] = tuple(source.shape)
+        self.factors = tuple(f for f in factors if self.shape[1] // f > 0 and self.shape[2] // f > 0)
+        self._levels: Dict[int, np.ndarray] = {}
+        self._built: Dict[int, np.ndarray] = {f: np.zeros(self.shape[0], dtype=bool) for f in self.factors}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self._levels.values())
+
+    def factor_for(self, scale: float) -> int:
+        """
+        :param scale: The number of image pixels drawn per screen pixel
+        :return: The largest factor that isn't more than the scale, 1 for the full resolution images
+        """
+        return max((f for f in self.factors if f <= scale), default=1)
+
+    def _level(self, factor: int) -> np.ndarray:
+        if factor not in self._levels:
+            # zeroed memory is only given pages by the system when images are written to it
+            self._levels[factor] = np.zeros((self.shape[0], self.shape[1] // factor, self.shape[2] // factor),
+                                            dtype=PYRAMID_DTYPE)
+        return self._levels[factor]
+
+    def image(self, index: int, factor: int) -> np.ndarray:
+        """
+        :return: The image at the index reduced by the factor, built if it hasn't been yet
+        """
+        if factor == 1:
+            return np.asarray(self.source[index])
+        if factor not in self._built:
+            raise ValueError(f"The pyramid has no level for factor {factor}, only for {self.factors}")
+        level = self._level(factor)
+        if not self._built[factor][index]:
+            level[index] = reduce_image(self.image(index, factor // 2))
+            self._built[factor][index] = True
+        return level[index]
+
+    def level(self, factor: int, cores: Optional[int] = None) -> np.ndarray:
+        """
+        :return: All images reduced by the factor, building the missing ones in parallel
+        """
+        if factor == 1:
+            return self.source
+        missing = np.flatnonzero(~self._built[factor])
+        # the levels are allocated up front, as the threads would each allocate them
+        for finer in self.factors:
+            if finer <= factor:
+                self._level(finer)
+        # the reductions release the GIL, so the images are built in parallel
+        with ThreadPoolExecutor(cores or pu.get_cores()) as executor:
+            list(executor.map(lambda i: self.image(i, factor), missing))
+        return self._level(factor)
+
+    def invalidate(self, indices: Optional[Iterable[int]] = None):
+        """
+        Marks the images at the indices to be built again, after they have been changed in place.
+
+        :param indices: The changed images along the first axis, all of them if None
+        """
+        changed = slice(None) if indices is None else list(indices)
+        for built in self._built.values():
+            built[changed] = False
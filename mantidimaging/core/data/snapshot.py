@@ -0,0 +1,152 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Snapshots of stacks that can be restored after an operation, without keeping a second copy of the stack in memory.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+
+from mantidimaging.core.data.images import Images
+from mantidimaging.core.data.lazy_images import LazyImages
+from mantidimaging.core.data.page_store import CompressedPageStore
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+
+class ImagesSnapshot:
+    """
+    The images of a stack before an operation, compressed into the scratch directory one at a time.
+
+    After the operation `discard_unchanged` drops the images that the operation didn't change, giving back
+    their space in the scratch directory, and `restore` writes the remaining ones back into the stack in place,
+    so that at no point two whole stacks are held in memory.
+
+    :param images: The stack to take a snapshot of
+    :param cores: The number of threads compressing the images
+    :raises RuntimeError: If the scratch directory doesn't have space for the uncompressed stack
+    """
+    def __init__(self, images: Images, cores: Optional[int] = None, progress: Optional[Progress] = None):
+        self.shape = images.data.shape
+        self.dtype = images.dtype
+        self.indices = deepcopy(images.indices)
+        self.metadata = deepcopy(images.metadata)
+        self.is_sinograms = images.is_sinograms
+        # checked against the uncompressed size, so that a full disk doesn't stop the snapshot part way through
+        if not pu.enough_memory(self.shape, self.dtype, pu.StorageMode.FILE):
+            raise RuntimeError(f"The scratch directory {pu.scratch_directory()} does not have enough free space "
+                               f"for a snapshot of the stack of shape {self.shape}")
+        self.pages = CompressedPageStore()
+
+        data = images.data
+        try:
+            self._run(lambda index: self.pages.put(index, data[index]), range(self.shape[0]), cores, progress,
+                      "Snapshot")
+        except Exception:
+            # cancelled, the images compressed so far are of no use
+            self.pages.close()
+            raise
+        LOG.info(f"Snapshot of {self.shape} compressed to {self.pages.nbytes / 1024 / 1024:.1f}MB")
+
+    @staticmethod
+    def _run(func, indices, cores: Optional[int], progress: Optional[Progress], task_name: str) -> list:
+        """
+        :return: func(index) for every index, run in parallel as zlib releases the GIL
+        """
+        indices = list(indices)
+        results = []
+        progress = Progress.ensure_instance(progress, num_steps=len(indices), task_name=task_name)
+        with progress, ThreadPoolExecutor(cores or pu.get_cores()) as executor:
+            for result in executor.map(func, indices):
+                results.append(result)
+                progress.update(msg="Image")
+        return results
+
+    def _same_layout(self, images: Images) -> bool:
+        return images.data.shape == self.shape and images.dtype == self.dtype
+
+    @property
+    def changed_indices(self):
+        """
+        The indices of the images kept by the snapshot, all of them until `discard_unchanged` is called
+        """
+        return sorted(self.pages.keys())
+
+    def discard_unchanged(self, images: Images, cores: Optional[int] = None, progress: Optional[Progress] = None):
+        """
+        Drops the images that are the same in the stack, as restoring the stack doesn't need them.
+        Nothing is dropped if the operation changed the shape or the type of the stack.
+        """
+        if not self._same_layout(images):
+            return
+
+        data = images.data
+
+        def unchanged(index) -> bool:
+            return self.pages.matches(index, data[index])
+
+        kept = self.changed_indices
+        for index, same in zip(kept, self._run(unchanged, kept, cores, progress, "Comparing")):
+            if same:
+                self.pages.drop(index)
+        self.pages.compact()
+        LOG.info(f"{len(self.pages)} of {self.shape[0]} images were changed by the operation")
+
+    def original_image(self, index: int, images: Images) -> np.ndarray:
+        """
+        :param images: The stack the snapshot was taken of, which holds the images the snapshot has discarded
+        """
+        if index in self.pages:
+            return self.pages.get(index)
+        return np.copy(images.data[index])
+
+    def original_images(self, images: Images) -> LazyImages:
+        """
+        :return: The stack before the operation, decoding its images from the snapshot when they are viewed
+        """
+        return LazyImages(lambda name: self.original_image(int(name), images), [str(i) for i in range(self.shape[0])],
+                          self.shape[1:],
+                          self.dtype,
+                          indices=self.indices,
+                          metadata=self.metadata,
+                          cache_mb=64)
+
+    def restore(self, images: Images, cores: Optional[int] = None, progress: Optional[Progress] = None) -> Images:
+        """
+        Puts the stack back to how it was when the snapshot was taken.
+
+        The changed images are written into the stack in place. If the operation changed the shape
+        or the type of the stack a new array is allocated for it instead, and every image is decompressed.
+
+        :return: The same images object, restored
+        """
+        if self._same_layout(images):
+            data = images.data
+        else:
+            data = pu.create_array(self.shape, self.dtype, images.storage)
+
+        def write(index):
+            data[index] = self.pages.get(index)
+
+        with pu.arrays_in_use([data]):
+            self._run(write, self.changed_indices, cores, progress, "Restoring")
+        if data is not images.data:
+            images.free_memory()
+            images.data = data
+        else:
+            images.invalidate_caches(self.changed_indices)
+        images.metadata = deepcopy(self.metadata)
+        images.indices = deepcopy(self.indices)
+        images._is_sinograms = self.is_sinograms
+        return images
+
+    def close(self):
+        """
+        Removes the compressed images from the scratch directory
+        """
+        self.pages.close()
@@ -0,0 +1,56 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Statistics of the values of a stack, computed in one parallel pass over its images.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+
+
+def _image_statistics(image: np.ndarray) -> Tuple[float, float, float, int, int]:
+    """
+    :return: The min and max ignoring NaNs, the sum and count of the values that aren't NaN, and the count of NaNs
+    """
+    nans = int(np.count_nonzero(np.isnan(image))) if image.dtype.kind == "f" else 0
+    valid = image.size - nans
+    if valid == 0:
+        return np.nan, np.nan, 0.0, 0, nans
+    # fmin and fmax ignore NaNs without the warnings and extra copies of nanmin and nanmax
+    return float(np.fmin.reduce(image, axis=None)), float(np.fmax.reduce(image, axis=None)), \
+        float(np.nansum(image, dtype=np.float64) if nans else np.sum(image, dtype=np.float64)), valid, nans
+
+
+class StackStatistics:
+    """
+    The min, max, mean and NaN count of a stack, NaN aware like `np.nanmin`.
+    The values are read when the object is created, and don't follow later changes to the data.
+    """
+    def __init__(self, data: np.ndarray, cores: Optional[int] = None):
+        self.shape = data.shape
+        images = data.reshape(1, -1) if data.ndim == 0 else data
+        # the reductions release the GIL, so the images are read in parallel
+        with ThreadPoolExecutor(cores or pu.get_cores()) as executor:
+            values = np.array(list(executor.map(_image_statistics, images)), dtype=np.float64).reshape(-1, 5)
+        self._mins, self._maxs, self._sums = values[:, 0], values[:, 1], values[:, 2]
+        self._counts, self._nans = values[:, 3].astype(np.int64), values[:, 4].astype(np.int64)
+
+    @property
+    def min(self) -> float:
+        return float(np.fmin.reduce(self._mins)) if self._counts.any() else np.nan
+
+    @property
+    def max(self) -> float:
+        return float(np.fmax.reduce(self._maxs)) if self._counts.any() else np.nan
+
+    @property
+    def mean(self) -> float:
+        count = self._counts.sum()
+        return float(self._sums.sum() / count) if count else np.nan
+
+    @property
+    def nan_count(self) -> int:
+        return int(self._nans.sum())
@@ -0,0 +1,102 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import io
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data import Images
+from mantidimaging.core.data.compact import ValueScale, convert, to_values
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
+from mantidimaging.core.operations.gaussian import GaussianFilter
+
+
+class CompactTest(unittest.TestCase):
+    def test_scaled_uint16_round_trip(self):
+        images = th.generate_images()
+        images.data[:] = np.random.rand(*images.data.shape) * 200 - 50
+        original = np.copy(images.data)
+
+        images.to_compact("uint16")
+
+        self.assertEqual(np.uint16, images.dtype)
+        scale = images.value_scale
+        self.assertAlmostEqual(original.min(), scale.offset, places=5)
+        npt.assert_allclose(original, to_values(images.data, scale), atol=scale.slope / 2 + 1e-5)
+
+        images.to_working_dtype()
+
+        self.assertEqual(np.float32, images.dtype)
+        self.assertIsNone(images.value_scale)
+        self.assertNotIn(const.VALUE_SCALE, images.metadata)
+        npt.assert_allclose(original, images.data, atol=scale.slope / 2 + 1e-5)
+
+    def test_raw_integer_data_is_not_scaled(self):
+        images = Images(np.arange(60, dtype=np.int32).reshape((3, 4, 5)))
+
+        images.to_compact("uint16")
+
+        self.assertEqual(np.uint16, images.dtype)
+        self.assertIsNone(images.value_scale)
+        npt.assert_equal(np.arange(60).reshape((3, 4, 5)), images.data)
+
+    def test_float16(self):
+        images = th.generate_images()
+        original = np.copy(images.data)
+
+        images.to_compact("float16")
+
+        self.assertEqual(np.float16, images.dtype)
+        self.assertIsNone(images.value_scale)
+        npt.assert_allclose(original, images.data, rtol=1e-3, atol=1e-6)
+
+    def test_values_that_do_not_fit_raise(self):
+        images = th.generate_images()
+        images.data[0, 0, 0] = np.nan
+        self.assertRaises(ValueError, images.to_compact, "uint16")
+
+        images = th.generate_images()
+        images.data[0, 0, 0] = 1e6
+        self.assertRaises(ValueError, images.to_compact, "float16")
+        self.assertRaises(ValueError, images.to_compact, "int8")
+        self.assertEqual(np.float32, images.dtype)
+
+    def test_convert_in_chunks(self):
+        source = np.random.rand(10, 4, 4).astype(np.float32)
+        output = np.zeros(source.shape, np.uint16)
+        scale = ValueScale.for_range(0, 1)
+
+        with mock.patch("mantidimaging.core.data.compact.CONVERT_CHUNK_BYTES", 3 * 4 * 4 * 4):
+            convert(source, output, output_scale=scale)
+
+        npt.assert_allclose(source, scale.expand(output), atol=scale.slope / 2 + 1e-6)
+
+    def test_saved_metadata_has_no_value_scale(self):
+        images = th.generate_images()
+        images.to_compact("uint16")
+        f = io.StringIO()
+
+        images.save_metadata(f)
+
+        self.assertIn(const.VALUE_SCALE, images.metadata)
+        self.assertNotIn(const.VALUE_SCALE, json.loads(f.getvalue()))
+
+    def test_filters_upcast_unless_compact_dtype_is_supported(self):
+        images = th.generate_images()
+        images.to_compact("uint16")
+
+        CropCoordinatesFilter.prepare_dtype(images)
+        self.assertEqual(np.uint16, images.dtype)
+
+        GaussianFilter.prepare_dtype(images)
+        self.assertEqual(np.float32, images.dtype)
+
+
+if __name__ == "__main__":
+    unittest.main()
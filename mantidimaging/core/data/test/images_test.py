@@ -4,6 +4,7 @@
 import io
 from mantidimaging.core.utility.data_containers import ProjectionAngles
 import unittest
+from unittest import mock
 
 import numpy as np
 
@@ -11,6 +12,7 @@ from mantidimaging.core.data import Images
 from mantidimaging.core.data.test.fake_logfile import generate_csv_logfile, generate_txt_logfile
 from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
 from mantidimaging.core.operation_history import const
+from mantidimaging.core.parallel.utility import StorageMode
 from mantidimaging.core.utility.sensible_roi import SensibleROI
 from mantidimaging.test_helpers.unit_test_helper import generate_images, assert_not_equals
 
@@ -67,6 +69,16 @@ class ImagesTest(unittest.TestCase):
         self.assertEqual(images.metadata, copy.metadata)
         self.assertNotEqual(images, copy)
 
+    def test_equality_sees_changes_made_in_place(self):
+        images = generate_images()
+        copy = images.copy()
+        self.assertEqual(images, images)
+        self.assertEqual(images, copy)
+
+        copy.data[3] += 1
+
+        self.assertNotEqual(images, copy)
+
     def test_copy_flip_axes(self):
         images = generate_images()
         images.record_operation("Test", "Display", 123)
@@ -81,6 +93,40 @@ class ImagesTest(unittest.TestCase):
         self.assertEqual(images.metadata, copy.metadata)
         self.assertNotEqual(images.sinograms, copy)
 
+    def test_copy_storage(self):
+        images = generate_images()
+        self.assertEqual(images.storage, StorageMode.SHARED)
+
+        file_backed = images.copy(storage=StorageMode.FILE)
+        self.assertEqual(file_backed.storage, StorageMode.FILE)
+        self.assertEqual(images, file_backed)
+        # copies keep the storage of their source unless told otherwise
+        self.assertEqual(file_backed.copy(flip_axes=True).storage, StorageMode.FILE)
+        self.assertEqual(file_backed.copy_roi(SensibleROI(0, 0, 5, 5)).storage, StorageMode.FILE)
+        self.assertEqual(file_backed.copy(storage=StorageMode.SHARED).storage, StorageMode.SHARED)
+
+    def test_move_to_keeps_values_and_caches(self):
+        images = generate_images()
+        expected = images.data.copy()
+        pyramid = images.pyramid
+
+        images.move_to(StorageMode.FILE)
+
+        self.assertEqual(images.storage, StorageMode.FILE)
+        np.testing.assert_equal(images.data, expected)
+        self.assertIs(images.pyramid, pyramid)
+        self.assertIs(pyramid.source, images.data)
+
+    def test_copy_flip_axes_backed_by_file_without_memory(self):
+        images = generate_images()
+
+        with mock.patch("mantidimaging.core.parallel.utility.enough_memory",
+                        side_effect=lambda shape, dtype, storage: storage == StorageMode.FILE):
+            copy = images.copy(flip_axes=True)
+
+        self.assertEqual(copy.storage, StorageMode.FILE)
+        np.testing.assert_equal(copy.data, np.swapaxes(images.data, 0, 1))
+
     def test_copy_roi(self):
         images = generate_images()
         images.record_operation("Test", "Display", 123)
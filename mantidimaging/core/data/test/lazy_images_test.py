@@ -0,0 +1,118 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.data.lazy_images import FrameCache, LazyImages
+from mantidimaging.core.parallel import utility as pu
+
+
+class LazyImagesTest(unittest.TestCase):
+    def setUp(self):
+        self.source = np.random.rand(6, 4, 5).astype(np.float32)
+        self.filenames = [f"image_{i}.tif" for i in range(6)]
+        self.load_func = mock.Mock(side_effect=lambda name: self.source[self.filenames.index(name)])
+
+    def _lazy(self, cache_mb=1.0):
+        return LazyImages(self.load_func, self.filenames, (4, 5), np.float32, cache_mb=cache_mb)
+
+    def test_nothing_decoded_until_used(self):
+        images = self._lazy()
+
+        self.assertEqual((6, 4, 5), images.shape)
+        self.assertEqual(6, images.num_projections)
+        self.assertEqual(4, images.height)
+        self.assertEqual(5, images.width)
+        self.assertFalse(images.is_materialised)
+        self.load_func.assert_not_called()
+
+    def test_projection_decoded_once(self):
+        images = self._lazy()
+
+        npt.assert_equal(images.projection(2), self.source[2])
+        npt.assert_equal(images.projection(2), self.source[2])
+
+        self.load_func.assert_called_once_with("image_2.tif")
+        self.assertFalse(images.is_materialised)
+
+    def test_index_as_images_is_a_copy(self):
+        images = self._lazy()
+
+        single = images.index_as_images(3)
+        single.data[:] = 0
+
+        npt.assert_equal(images.projection(3), self.source[3])
+        self.assertFalse(images.is_materialised)
+
+    def test_cache_bounded(self):
+        # room for two images
+        images = self._lazy(cache_mb=2 * 4 * 5 * 4 / 1024 / 1024)
+        for i in [0, 1, 0, 2]:
+            images.projection(i)
+
+        self.assertEqual(2, len(images.cache))
+        # 1 was the least recently used
+        self.assertIsNone(images.cache.peek(1))
+        self.assertIsNotNone(images.cache.peek(0))
+
+    def test_data_materialises_reusing_cache(self):
+        images = self._lazy()
+        images.projection(1)
+
+        data = images.data
+
+        self.assertTrue(images.is_materialised)
+        self.assertTrue(pu.is_shared_array(data))
+        npt.assert_equal(data, self.source)
+        self.assertEqual(6, self.load_func.call_count)
+        self.assertEqual(0, len(images.cache))
+        self.assertIs(data, images.data)
+
+    def test_materialise_file_backed(self):
+        images = LazyImages(self.load_func, self.filenames, (4, 5), storage=pu.StorageMode.FILE)
+
+        images.materialise()
+
+        self.assertEqual(pu.StorageMode.FILE, images.storage)
+
+    def test_wrong_shape_rejected(self):
+        images = LazyImages(self.load_func, self.filenames, (4, 6))
+
+        with self.assertRaisesRegex(ValueError, "image_0.tif"):
+            images.projection(0)
+
+    def test_lazy_stack(self):
+        images = self._lazy()
+        stack = images.lazy_stack
+
+        self.assertEqual((6, 4, 5), stack.shape)
+        self.assertIs(stack, stack.transpose([0, 1, 2]))
+        npt.assert_equal(stack[4], self.source[4])
+        self.assertEqual(stack[4, 1, 2], self.source[4, 1, 2])
+        self.assertFalse(images.is_materialised)
+
+        npt.assert_equal(stack[1:3], self.source[1:3])
+        self.assertTrue(images.is_materialised)
+
+
+class FrameCacheTest(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = FrameCache(1)
+        decode = mock.Mock(side_effect=lambda i: np.full(2, i))
+
+        cache.get(0, decode)
+        cache.get(0, decode)
+        cache.get(1, decode)
+        cache.get(0, decode)
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(3, decode.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.memory_manager import MB, MemoryManager
+from mantidimaging.core.operations.pipeline import run_pipeline
+from mantidimaging.core.parallel import shared as ps, utility as pu
+
+STACK_SHAPE = (10, 10, 10)
+STACK_BYTES = 10 * 10 * 10 * 4
+
+
+class MemoryManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.scratch_patch = mock.patch.object(pu, "SCRATCH_DIRECTORY", self.scratch.name)
+        self.scratch_patch.start()
+        self.manager = MemoryManager()
+        self.stacks = [th.generate_images(STACK_SHAPE) for _ in range(3)]
+        for i, images in enumerate(self.stacks):
+            self.manager.register(images, lambda i=i: f"stack {i}")
+
+    def tearDown(self):
+        self.stacks = []
+        self.scratch_patch.stop()
+        self.scratch.cleanup()
+
+    def set_budget_with_room_for(self, nbytes: int):
+        self.manager.budget_mb = (self.manager.in_memory_bytes() + nbytes) / MB
+
+    def storages(self):
+        return [images.storage for images in self.stacks]
+
+    def test_no_stacks_moved_within_budget(self):
+        self.set_budget_with_room_for(STACK_BYTES)
+
+        self.manager.make_room(STACK_BYTES)
+
+        self.assertEqual([pu.StorageMode.SHARED] * 3, self.storages())
+
+    def test_least_recently_used_stack_moved(self):
+        self.manager.touch(self.stacks[0])
+        self.set_budget_with_room_for(STACK_BYTES)
+        expected = self.stacks[1].data.copy()
+        moved = mock.Mock()
+        self.manager.moved_callbacks.append(moved)
+
+        self.manager.make_room(2 * STACK_BYTES)
+
+        self.assertEqual([pu.StorageMode.SHARED, pu.StorageMode.FILE, pu.StorageMode.SHARED], self.storages())
+        npt.assert_equal(expected, self.stacks[1].data)
+        moved.assert_called_once_with(self.stacks[1])
+
+    def test_stacks_in_use_not_moved(self):
+        self.set_budget_with_room_for(STACK_BYTES)
+
+        with self.manager.in_use(self.stacks[0]):
+            self.manager.make_room(2 * STACK_BYTES)
+
+        self.assertEqual([pu.StorageMode.SHARED, pu.StorageMode.FILE, pu.StorageMode.SHARED], self.storages())
+
+    def test_raises_when_over_budget_after_moving_stacks(self):
+        self.set_budget_with_room_for(0)
+
+        with self.manager.in_use(self.stacks[2]):
+            self.assertRaises(RuntimeError, self.manager.make_room, 10 * STACK_BYTES)
+
+        self.assertEqual([pu.StorageMode.FILE, pu.StorageMode.FILE, pu.StorageMode.SHARED], self.storages())
+
+    def test_usage(self):
+        self.manager.touch(self.stacks[0])
+        self.stacks[1].move_to(pu.StorageMode.FILE)
+
+        with self.manager.in_use(self.stacks[2]):
+            usage = self.manager.usage()
+
+        self.assertEqual(["stack 2", "stack 0", "stack 1"], [stack.name for stack in usage])
+        self.assertEqual([STACK_BYTES] * 3, [stack.nbytes for stack in usage])
+        self.assertEqual([pu.StorageMode.SHARED, pu.StorageMode.SHARED, pu.StorageMode.FILE],
+                         [stack.storage for stack in usage])
+        self.assertEqual([True, False, False], [stack.in_use for stack in usage])
+
+    def test_unregistered_when_collected(self):
+        del self.stacks[0]
+
+        self.assertEqual(["stack 2", "stack 1"], [stack.name for stack in self.manager.usage()])
+
+    def test_install_makes_room_for_new_arrays(self):
+        self.set_budget_with_room_for(0)
+        self.manager.install()
+        try:
+            arr = pu.create_array(STACK_SHAPE, np.float32)
+        finally:
+            self.manager.uninstall()
+
+        self.assertEqual(STACK_SHAPE, arr.shape)
+        self.assertEqual([pu.StorageMode.FILE, pu.StorageMode.SHARED, pu.StorageMode.SHARED], self.storages())
+
+    def test_stack_written_by_execute_not_moved_by_allocation_during_it(self):
+        self.set_budget_with_room_for(0)
+        expected = self.stacks[0].data * 2
+        allocated = []
+
+        def double_and_allocate(image):
+            if not allocated:
+                # e.g. another operation allocating from a different thread
+                allocated.append(pu.create_array(STACK_SHAPE, np.float32))
+            image *= 2
+
+        self.manager.install()
+        try:
+            ps.execute(ps.create_partial(double_and_allocate, ps.inplace1),
+                       STACK_SHAPE[0],
+                       arrays=[self.stacks[0].data],
+                       backend="serial")
+        finally:
+            self.manager.uninstall()
+
+        self.assertEqual([pu.StorageMode.SHARED, pu.StorageMode.FILE, pu.StorageMode.SHARED], self.storages())
+        npt.assert_equal(expected, self.stacks[0].data)
+
+    def test_stack_written_by_pipeline_barrier_not_moved(self):
+        self.set_budget_with_room_for(0)
+        expected = self.stacks[0].data + 1
+        allocated = []
+
+        def allocate_and_add_one(images):
+            data = images.data
+            allocated.append(pu.create_array(STACK_SHAPE, np.float32))
+            data += 1
+
+        self.manager.install()
+        try:
+            with mock.patch("mantidimaging.core.operations.pipeline.memory_manager", self.manager):
+                run_pipeline(self.stacks[0], [allocate_and_add_one])
+        finally:
+            self.manager.uninstall()
+
+        self.assertEqual([pu.StorageMode.SHARED, pu.StorageMode.FILE, pu.StorageMode.SHARED], self.storages())
+        npt.assert_equal(expected, self.stacks[0].data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.pyramid import ImagePyramid, reduce_image
+
+
+class ImagePyramidTest(unittest.TestCase):
+    def test_reduce_image_drops_odd_edge(self):
+        image = np.arange(30, dtype=np.float32).reshape(5, 6)
+
+        reduced = reduce_image(image)
+
+        npt.assert_equal([[3.5, 5.5, 7.5], [15.5, 17.5, 19.5]], reduced)
+
+    def test_levels_built_on_request(self):
+        data = np.random.rand(3, 32, 40).astype(np.float32)
+        pyramid = ImagePyramid(data)
+
+        image = pyramid.image(1, 8)
+
+        self.assertEqual((4, 5), image.shape)
+        npt.assert_allclose(data[1].reshape(4, 8, 5, 8).mean(axis=(1, 3)), image, rtol=1e-5)
+        for factor in (2, 4, 8):
+            npt.assert_equal([False, True, False], pyramid._built[factor])
+
+    def test_level_builds_all_images(self):
+        data = np.random.rand(3, 8, 8)
+
+        level = ImagePyramid(data).level(2)
+
+        npt.assert_allclose(data.reshape(3, 4, 2, 4, 2).mean(axis=(2, 4)), level, rtol=1e-5)
+
+    def test_factors_that_reduce_to_nothing_are_left_out(self):
+        pyramid = ImagePyramid(np.zeros((2, 6, 100)))
+
+        self.assertEqual((2, 4), pyramid.factors)
+        self.assertRaises(ValueError, pyramid.image, 0, 8)
+
+    def test_factor_for(self):
+        pyramid = ImagePyramid(np.zeros((1, 64, 64)))
+
+        self.assertEqual(1, pyramid.factor_for(0.5))
+        self.assertEqual(1, pyramid.factor_for(1.9))
+        self.assertEqual(2, pyramid.factor_for(3.5))
+        self.assertEqual(8, pyramid.factor_for(20))
+
+    def test_invalidate_indices(self):
+        data = np.zeros((3, 8, 8), dtype=np.float32)
+        pyramid = ImagePyramid(data)
+        pyramid.level(4)
+
+        data[:] = 1
+        pyramid.invalidate([2])
+
+        npt.assert_equal(0, pyramid.image(0, 4))
+        npt.assert_equal(1, pyramid.image(2, 4))
+
+
+class ImagesPyramidTest(unittest.TestCase):
+    def test_pyramid_kept_and_updated_when_data_changes_in_place(self):
+        images = th.generate_images()
+        pyramid = images.pyramid
+        pyramid.level(2)
+
+        images.data[4] = 3
+        images.invalidate_caches([4])
+
+        self.assertIs(pyramid, images.pyramid)
+        npt.assert_equal(3, pyramid.image(4, 2))
+
+        images.data[:] = 5
+        images.record_operation("test", "Test")
+
+        self.assertIs(pyramid, images.pyramid)
+        npt.assert_equal(5, pyramid.image(0, 2))
+
+    def test_pyramid_replaced_with_data(self):
+        images = th.generate_images()
+        pyramid = images.pyramid
+
+        images.data = np.ones((2, 8, 8), dtype=np.float32)
+
+        self.assertIsNot(pyramid, images.pyramid)
+        self.assertEqual((2, 8, 8), images.pyramid.shape)
+
+
+if __name__ == "__main__":
+    unittest.main()
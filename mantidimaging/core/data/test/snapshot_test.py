@@ -0,0 +1,147 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.page_store import CompressedPageStore, compress, decompress
+from mantidimaging.core.data.snapshot import ImagesSnapshot
+from mantidimaging.core.parallel import utility as pu
+
+
+class CompressedPageStoreTest(unittest.TestCase):
+    def test_compress_round_trip(self):
+        for dtype in (np.float32, np.float64, np.uint16):
+            image = (np.random.rand(7, 9) * 1000).astype(dtype)
+            npt.assert_equal(decompress(compress(image), image.shape, image.dtype), image)
+
+    def test_put_get_drop(self):
+        store = CompressedPageStore()
+        first, second = np.random.rand(2, 4, 5).astype(np.float32)
+        store.put(0, first)
+        store.put("b", second)
+
+        npt.assert_equal(store.get(0), first)
+        npt.assert_equal(store.get("b"), second)
+        self.assertTrue(store.matches(0, first))
+        self.assertFalse(store.matches(0, second))
+        self.assertFalse(store.matches(0, first.astype(np.float64)))
+
+        store.drop(0)
+        self.assertNotIn(0, store)
+        self.assertEqual(["b"], store.keys())
+        store.close()
+        self.assertEqual(0, len(store))
+
+    def test_compact_gives_back_space_of_dropped_images(self):
+        store = CompressedPageStore()
+        images = np.random.rand(3, 16, 16)
+        for i, image in enumerate(images):
+            store.put(i, image)
+        file_size = store.nbytes
+
+        store.drop(0)
+        store.drop(2)
+        self.assertEqual(file_size, store.nbytes)
+        store.compact()
+
+        self.assertLess(store.nbytes, file_size / 2)
+        self.assertEqual(store.nbytes, os.fstat(store._file.fileno()).st_size)
+        self.assertEqual([1], store.keys())
+        npt.assert_equal(store.get(1), images[1])
+        store.close()
+
+
+class ImagesSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.images = th.generate_images((6, 8, 10))
+        self.images.record_operation("first", "First")
+        self.original = np.copy(self.images.data)
+        self.snapshot = ImagesSnapshot(self.images, cores=2)
+
+    def tearDown(self):
+        self.snapshot.close()
+
+    def _change(self, indices):
+        self.images.data[indices] += 1
+        self.images.record_operation("second", "Second")
+
+    def test_discard_unchanged_keeps_changed_images(self):
+        self._change([1, 4])
+
+        self.snapshot.discard_unchanged(self.images)
+
+        self.assertEqual([1, 4], self.snapshot.changed_indices)
+
+    def test_discard_unchanged_compacts_pages(self):
+        self._change([1])
+
+        with mock.patch.object(self.snapshot.pages, "compact", wraps=self.snapshot.pages.compact) as compact:
+            self.snapshot.discard_unchanged(self.images)
+
+        compact.assert_called_once()
+        self.assertEqual(self.snapshot.pages.nbytes, os.fstat(self.snapshot.pages._file.fileno()).st_size)
+
+    def test_not_enough_scratch_space_raises_before_writing(self):
+        with mock.patch.object(pu, "enough_memory", return_value=False) as enough_memory, \
+                mock.patch("mantidimaging.core.data.snapshot.CompressedPageStore") as page_store:
+            self.assertRaises(RuntimeError, ImagesSnapshot, self.images)
+
+        enough_memory.assert_called_once_with(self.images.data.shape, self.images.dtype, pu.StorageMode.FILE)
+        page_store.assert_not_called()
+
+    def test_restore_in_place(self):
+        self._change([1, 4])
+        self.snapshot.discard_unchanged(self.images)
+        data = self.images.data
+
+        restored = self.snapshot.restore(self.images)
+
+        self.assertIs(self.images, restored)
+        self.assertIs(data, restored.data)
+        npt.assert_equal(restored.data, self.original)
+        self.assertEqual(1, len(restored.metadata["operation_history"]))
+
+    def test_stack_in_use_while_restored(self):
+        self._change([1])
+        in_use = []
+        get = self.snapshot.pages.get
+
+        def get_and_check(index):
+            in_use.append(pu.is_array_in_use(self.images.data))
+            return get(index)
+
+        with mock.patch.object(self.snapshot.pages, "get", side_effect=get_and_check):
+            self.snapshot.restore(self.images)
+
+        self.assertEqual([True] * 6, in_use)
+        self.assertFalse(pu.is_array_in_use(self.images.data))
+
+    def test_restore_after_shape_change(self):
+        self.images.data = self.images.data[:, 2:6, :].copy()
+        self.snapshot.discard_unchanged(self.images)
+        self.assertEqual(6, len(self.snapshot.changed_indices))
+
+        restored = self.snapshot.restore(self.images)
+
+        npt.assert_equal(restored.data, self.original)
+
+    def test_original_images_decoded_on_demand(self):
+        self._change([2])
+        self.snapshot.discard_unchanged(self.images)
+
+        original = self.snapshot.original_images(self.images)
+
+        self.assertEqual(self.original.shape, original.shape)
+        npt.assert_equal(original.projection(2), self.original[2])
+        npt.assert_equal(original.projection(3), self.original[3])
+        self.assertFalse(original.is_materialised)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.statistics import StackStatistics
+
+
+class StackStatisticsTest(unittest.TestCase):
+    def test_statistics_ignore_nans(self):
+        data = np.random.rand(5, 4, 6).astype(np.float32)
+        data[1, 2] = np.nan
+        data[3] = np.nan
+
+        statistics = StackStatistics(data)
+
+        self.assertAlmostEqual(np.nanmin(data), statistics.min)
+        self.assertAlmostEqual(np.nanmax(data), statistics.max)
+        self.assertAlmostEqual(np.nanmean(data, dtype=np.float64), statistics.mean)
+        self.assertEqual(np.count_nonzero(np.isnan(data)), statistics.nan_count)
+
+    def test_all_nans(self):
+        statistics = StackStatistics(np.full((2, 3, 3), np.nan))
+
+        self.assertTrue(np.isnan(statistics.min))
+        self.assertTrue(np.isnan(statistics.max))
+        self.assertTrue(np.isnan(statistics.mean))
+        self.assertEqual(18, statistics.nan_count)
+
+    def test_integer_data(self):
+        data = np.arange(24, dtype=np.uint16).reshape(2, 3, 4)
+
+        statistics = StackStatistics(data)
+
+        self.assertEqual(0, statistics.min)
+        self.assertEqual(23, statistics.max)
+        self.assertEqual(0, statistics.nan_count)
+
+    def test_images_read_in_parallel(self):
+        data = np.random.rand(4, 3, 5)
+
+        with mock.patch("mantidimaging.core.data.statistics.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as executor:
+            statistics = StackStatistics(data, cores=3)
+
+        executor.assert_called_once_with(3)
+        self.assertAlmostEqual(data.mean(), statistics.mean)
+
+
+class ImagesStatisticsTest(unittest.TestCase):
+    def test_statistics_read_from_current_data(self):
+        images = th.generate_images()
+        self.assertIsNot(images.read_statistics(), images.read_statistics())
+
+        # changed in place without recording an operation
+        images.data[1] = 5
+
+        self.assertEqual(5, images.read_statistics().max)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,17 +4,39 @@
 This module handles the loading of FIT, FITS, TIF, TIFF
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Optional, List
 
 import numpy as np
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.io.utility import get_file_names, get_prefix
+from mantidimaging.core.data.lazy_images import LazyImages
+from mantidimaging.core.io.utility import HDD, NETWORK, SSD, get_file_names, get_prefix, storage_type
+from mantidimaging.core.operation_history import const
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility.progress_reporting import Progress
 from . import stack_loader
 from ...data.dataset import Dataset
 
+# Number of files read at once from each type of storage. Decoding releases the GIL, so the readers are threads.
+# Spinning disks slow down when seeking between files, network file systems need many requests in flight.
+READERS = {HDD: 1, SSD: 8, NETWORK: 16}
+
+# Ways of reducing a stack to a single reference image while loading it, see `ImageLoader.load_reference`
+REFERENCE_MEAN = "mean"
+REFERENCE_MEDIAN = "median"
+REFERENCE_METHODS = (REFERENCE_MEAN, REFERENCE_MEDIAN)
+
+# Size of the band of rows of every image that is held at once to find the median
+REFERENCE_BAND_BYTES = 64 * 1024 * 1024
+
+
+def default_readers(path: str) -> int:
+    """
+    :return: The number of readers to use for files in the directory of the path, from the type of storage it is on
+    """
+    return READERS[storage_type(os.path.dirname(path) or ".")]
+
 
 def execute(load_func,
             sample_path,
@@ -25,7 +47,11 @@ def execute(load_func,
             img_format,
             dtype,
             indices,
-            progress=None) -> Dataset:
+            progress=None,
+            storage=pu.StorageMode.SHARED,
+            lazy=False,
+            readers: Optional[int] = None,
+            reference: Optional[str] = None) -> Dataset:
     """
     Reads a stack of images into memory, assuming dark and flat images
     are in separate directories.
@@ -41,6 +67,11 @@ def execute(load_func,
         '>f2' - float16
         '>f4' - float32
 
+    :param storage: Whether the stacks are kept in RAM or backed by files, see `pu.create_array`
+    :param lazy: Decode the sample images when they are first used instead of now, see `LazyImages`.
+                 Only used if every file has a single image
+    :param readers: Number of files read at once, chosen for the storage of the sample files if None
+    :param reference: Load only the mean or median of the sample images, see `ImageLoader.load_reference`
     :returns: Images object
     """
 
@@ -58,7 +89,9 @@ def execute(load_func,
     img_shape = first_sample_img.shape
 
     # forward all arguments to internal class for easy re-usage
-    il = ImageLoader(load_func, img_format, img_shape, dtype, indices, progress)
+    if readers is None:
+        readers = default_readers(sample_path[0])
+    il = ImageLoader(load_func, img_format, img_shape, dtype, indices, progress, storage, readers)
 
     # we load the flat and dark first, because if they fail we don't want to
     # fail after we've loaded a big stack into memory
@@ -66,10 +99,19 @@ def execute(load_func,
     flat_after_data, flat_after_filenames = il.load_data(flat_after_path)
     dark_before_data, dark_before_filenames = il.load_data(dark_before_path)
     dark_after_data, dark_after_filenames = il.load_data(dark_after_path)
-    sample_data = il.load_sample_data(chosen_input_filenames)
+    if reference is not None:
+        sample = Images(il.load_reference(chosen_input_filenames, reference), chosen_input_filenames, indices)
+        sample.metadata[const.REFERENCE] = {
+            const.REFERENCE_METHOD: reference,
+            const.REFERENCE_FRAMES: len(chosen_input_filenames)
+        }
+    elif lazy and len(img_shape) == 2:
+        sample = LazyImages(load_func, chosen_input_filenames, img_shape, dtype, indices, storage=storage)
+    else:
+        sample = Images(il.load_sample_data(chosen_input_filenames), chosen_input_filenames, indices)
 
     return Dataset(
-        Images(sample_data, chosen_input_filenames, indices),
+        sample,
         flat_before=Images(flat_before_data, flat_before_filenames) if flat_before_data is not None else None,
         flat_after=Images(flat_after_data, flat_after_filenames) if flat_after_data is not None else None,
         dark_before=Images(dark_before_data, dark_before_filenames) if dark_before_data is not None else None,
@@ -77,13 +119,23 @@ def execute(load_func,
 
 
 class ImageLoader(object):
-    def __init__(self, load_func, img_format, img_shape, data_dtype, indices, progress=None):
+    def __init__(self,
+                 load_func,
+                 img_format,
+                 img_shape,
+                 data_dtype,
+                 indices,
+                 progress=None,
+                 storage=pu.StorageMode.SHARED,
+                 readers=1):
         self.load_func = load_func
         self.img_format = img_format
         self.img_shape = img_shape
         self.data_dtype = data_dtype
         self.indices = indices
         self.progress = progress
+        self.storage = storage
+        self.readers = readers
 
     def load_sample_data(self, input_file_names):
         # determine what the loaded data was
@@ -97,7 +149,8 @@ class ImageLoader(object):
                                                self.data_dtype,
                                                "Sample",
                                                self.indices,
-                                               progress=self.progress)
+                                               progress=self.progress,
+                                               storage=self.storage)
         else:
             raise ValueError("Data loaded has invalid shape: {0}", self.img_shape)
 
@@ -109,21 +162,52 @@ class ImageLoader(object):
             return self.load_files(file_names), file_names
         return None, None
 
+    def _load_file(self, out, in_file, rows=None):
+        try:
+            # decoded straight into the output, see `loader.get_loader_func`
+            if rows is None:
+                self.load_func(in_file, out=out)
+            else:
+                self.load_func(in_file, out=out, rows=rows)
+        except ValueError as exc:
+            raise ValueError("An image has different width and/or height "
+                             "dimensions! All images must have the same "
+                             "dimensions. Expected dimensions: {0} Error "
+                             "message: {1}".format(self.img_shape, exc))
+        except IOError as exc:
+            raise RuntimeError("Could not load file {0}. Error details: " "{1}".format(in_file, exc))
+
     def _do_files_load_seq(self, data, files):
         progress = Progress.ensure_instance(self.progress, num_steps=len(files), task_name='Loading')
 
         with progress:
             for idx, in_file in enumerate(files):
-                try:
-                    data[idx, :] = self.load_func(in_file)
-                    progress.update(msg='Image')
-                except ValueError as exc:
-                    raise ValueError("An image has different width and/or height "
-                                     "dimensions! All images must have the same "
-                                     "dimensions. Expected dimensions: {0} Error "
-                                     "message: {1}".format(self.img_shape, exc))
-                except IOError as exc:
-                    raise RuntimeError("Could not load file {0}. Error details: " "{1}".format(in_file, exc))
+                self._load_file(data[idx], in_file)
+                progress.update(msg='Image')
+
+        return data
+
+    def _do_files_load_parallel(self, data, files):
+        """
+        Reads the files with a pool of threads, each decoding its file into its slot of the data.
+        If loading fails the error of the first failed file in the stack is raised, after the reads
+        that haven't started are cancelled.
+        """
+        progress = Progress.ensure_instance(self.progress, num_steps=len(files), task_name='Loading')
+
+        def load(idx, in_file):
+            self._load_file(data[idx], in_file)
+            progress.update(msg='Image')
+
+        with progress, ThreadPoolExecutor(self.readers) as executor:
+            futures = [executor.submit(load, idx, in_file) for idx, in_file in enumerate(files)]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
 
         return data
 
@@ -132,9 +216,74 @@ class ImageLoader(object):
         # If it's not possible better crash here than later.
         num_images = len(files)
         shape = (num_images, self.img_shape[0], self.img_shape[1])
-        data = pu.create_array(shape, self.data_dtype)
+        data = pu.create_array(shape, self.data_dtype, self.storage)
+        if self.readers > 1 and num_images > 1:
+            return self._do_files_load_parallel(data, files)
         return self._do_files_load_seq(data, files)
 
+    def load_reference(self, files, method: str) -> np.ndarray:
+        """
+        Reduces the images in the files to their mean or median without holding the whole stack in memory.
+        The mean is a running sum of the images, the median is found a band of rows of every image at a time.
+        Integer and float16 images are reduced to a float32 reference, so the average isn't rounded.
+
+        :param method: One of REFERENCE_METHODS
+        :return: A stack of the one reference image
+        """
+        if method not in REFERENCE_METHODS:
+            raise ValueError(f"Unknown reference method {method}, expected one of {REFERENCE_METHODS}")
+        if len(self.img_shape) != 2:
+            raise ValueError("A reference image can only be loaded from files of single images")
+
+        shape = (1, ) + tuple(self.img_shape)
+        reference = pu.create_array(shape, np.result_type(self.data_dtype, np.float32), self.storage)
+        bands = self._median_bands(len(files)) if method == REFERENCE_MEDIAN else []
+        progress = Progress.ensure_instance(self.progress,
+                                            num_steps=len(files) * max(1, len(bands)),
+                                            task_name='Loading')
+        with progress:
+            if method == REFERENCE_MEAN:
+                reference[0] = self._running_mean(files, progress)
+            else:
+                self._banded_median(files, bands, reference[0], progress)
+        return reference
+
+    def _running_mean(self, files, progress) -> np.ndarray:
+        readers = max(1, min(self.readers, len(files)))
+
+        def accumulate(group):
+            total = np.zeros(self.img_shape, dtype=np.float64)
+            image = np.empty(self.img_shape, dtype=np.float32)
+            for in_file in group:
+                self._load_file(image, in_file)
+                total += image
+                progress.update(msg='Image')
+            return total
+
+        # every reader sums its own share of the files, holding two images at a time
+        with ThreadPoolExecutor(readers) as executor:
+            totals = list(executor.map(accumulate, [files[i::readers] for i in range(readers)]))
+        return sum(totals) / len(files)
+
+    def _median_bands(self, num_files: int) -> List[slice]:
+        height, width = self.img_shape
+        rows_per_band = max(1, REFERENCE_BAND_BYTES // (num_files * width * np.dtype(np.float32).itemsize))
+        return [slice(start, min(start + rows_per_band, height)) for start in range(0, height, rows_per_band)]
+
+    def _banded_median(self, files, bands: List[slice], output: np.ndarray, progress):
+        band = np.empty((len(files), bands[0].stop - bands[0].start, self.img_shape[1]), dtype=np.float32)
+
+        with ThreadPoolExecutor(max(1, self.readers)) as executor:
+            for rows in bands:
+                band_rows = band[:, :rows.stop - rows.start]
+
+                def read(idx):
+                    self._load_file(band_rows[idx], files[idx], rows)
+                    progress.update(msg='Image')
+
+                list(executor.map(read, range(len(files))))
+                output[rows] = np.median(band_rows, axis=0)
+
 
 def _get_data_average(data):
     return np.mean(data, axis=0)
@@ -4,18 +4,20 @@ import os
 from dataclasses import dataclass
 from logging import getLogger, Logger
 from pathlib import Path
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 import numpy as np
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.data.dataset import Dataset
-from mantidimaging.core.io.loader import img_loader
+from mantidimaging.core.io.loader import img_loader, nexus_loader
+from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.io.utility import (DEFAULT_IO_FILE_FORMAT, get_file_names, get_prefix, get_file_extension,
                                            find_images, find_first_file_that_is_possibly_a_sample, find_log,
                                            find_180deg_proj)
 from mantidimaging.core.utility.data_containers import ImageParameters, LoadingParameters
 from mantidimaging.core.utility.imat_log_file_parser import IMATLogFile
+from mantidimaging.core.utility.sensible_roi import SensibleROI
 
 LOG = getLogger(__name__)
 
@@ -23,34 +25,91 @@ DEFAULT_IS_SINOGRAM = False
 DEFAULT_PIXEL_SIZE = 0
 DEFAULT_PIXEL_DEPTH = "float32"
 
+NEXUS_FORMATS = ['nxs', '.nxs']
 
-def _fitsread(filename):
+
+def _check_output_shape(image_shape, out: np.ndarray, filename: str):
+    if tuple(image_shape) != out.shape:
+        raise ValueError(f"Expected an image of shape {out.shape}, found {tuple(image_shape)} in {filename}")
+
+
+def _fitsread(filename, out: Optional[np.ndarray] = None, rows: Optional[slice] = None):
     """
     Read one image and return it as a 2d numpy array
 
     :param filename :: name of the image file, can be relative or absolute path
-    :param img_format: format of the image ('fits')
+    :param out: Array the image is decoded into, converting it to the dtype of the array.
+                The file is memory mapped and scaled in place, so the image is written to memory once.
+    :param rows: Only read these rows of the image into the output
     """
     import astropy.io.fits as fits
-    image = fits.open(filename)
-    if len(image) < 1:
-        raise RuntimeError("Could not load at least one FITS image/table file from: {0}".format(filename))
-
-    # get the image data
-    return image[0].data
-
-
-def _nxsread(filename):
-    import h5py
-    nexus = h5py.File(filename, 'r')
-    data = nexus["tomography/sample_data"]
-    return data
-
+    if out is None:
+        image = fits.open(filename)
+        if len(image) < 1:
+            raise RuntimeError("Could not load at least one FITS image/table file from: {0}".format(filename))
+
+        # get the image data
+        return image[0].data if rows is None else image[0].data[rows]
+
+    with fits.open(filename, memmap=True, do_not_scale_image_data=True) as image:
+        if len(image) < 1:
+            raise RuntimeError("Could not load at least one FITS image/table file from: {0}".format(filename))
+        stored = image[0].data if rows is None else image[0].data[rows]
+        _check_output_shape(stored.shape, out, filename)
+        bscale = image[0].header.get("BSCALE", 1)
+        bzero = image[0].header.get("BZERO", 0)
+        if bscale != 1 and not np.issubdtype(out.dtype, np.floating):
+            out[:] = stored * bscale + bzero
+            return out
+        # unsigned integers are stored as signed with an offset, which wraps back into range in an unsigned output
+        np.copyto(out, stored, casting="unsafe")
+        if bscale != 1:
+            out *= bscale
+        if bzero != 0:
+            out += np.array(bzero).astype(out.dtype)
+    return out
+
+
+def _imread(filename, out: Optional[np.ndarray] = None, rows: Optional[slice] = None):
+    """
+    :param out: Array the image is decoded into, converting it to the dtype of the array.
+                Uncompressed files are memory mapped, so the image is written to memory once.
+    :param rows: Only read these rows of the image into the output. Only uncompressed files
+                 avoid decoding the whole image.
+    """
+    if out is None:
+        from mantidimaging.core.utility.special_imports import import_skimage_io
+        skio = import_skimage_io()
+        image = skio.imread(filename)
+        return image if rows is None else image[rows]
 
-def _imread(filename):
-    from mantidimaging.core.utility.special_imports import import_skimage_io
-    skio = import_skimage_io()
-    return skio.imread(filename)
+    import tifffile
+    try:
+        stored = tifffile.memmap(filename, mode="r")
+    except ValueError:
+        # compressed or not stored contiguously, so it has to be decoded
+        with tifffile.TiffFile(filename) as tif:
+            series = tif.series[0]
+            if rows is None:
+                _check_output_shape(series.shape, out, filename)
+                if series.dtype == out.dtype:
+                    return tif.asarray(out=out)
+            stored = tif.asarray()
+    if rows is not None:
+        stored = stored[rows]
+    _check_output_shape(stored.shape, out, filename)
+    np.copyto(out, stored, casting="unsafe")
+    return out
+
+
+def get_loader_func(in_format: str):
+    """
+    :return: The function reading a single image file of the format. It takes an optional `out` array
+             to decode the image into, and optional `rows` to read only part of the image.
+    """
+    if in_format in ['fits', 'fit']:
+        return _fitsread
+    return _imread
 
 
 def supported_formats():
@@ -69,9 +128,16 @@ def supported_formats():
     except ImportError:  # pragma: no cover
         fits_available = False  # pragma: no cover
 
+    try:
+        import h5py  # noqa: F401
+        h5py_available = True
+    except ImportError:  # pragma: no cover
+        h5py_available = False  # pragma: no cover
+
     avail_list = \
         (['fits', 'fit', '.fits', '.fit'] if fits_available else []) + \
-        (['tif', 'tiff', '.tif', '.tiff'] if skio_available else [])
+        (['tif', 'tiff', '.tif', '.tiff'] if skio_available else []) + \
+        (NEXUS_FORMATS if h5py_available else [])
 
     return avail_list
 
@@ -97,7 +163,10 @@ def read_in_file_information(input_path,
     images = dataset.sample
 
     # construct and return the new shape
-    shape = (len(input_file_names), ) + images.data[0].shape
+    if in_format in NEXUS_FORMATS:
+        shape = nexus_loader.dataset_shape(input_file_names[0])
+    else:
+        shape = (len(input_file_names), ) + images.data[0].shape
 
     fi = FileInformation(filenames=input_file_names, shape=shape, sinograms=images.is_sinograms)
     return fi
@@ -114,7 +183,11 @@ def load_p(parameters: ImageParameters, dtype, progress) -> Images:
                 in_format=parameters.format,
                 indices=parameters.indices,
                 dtype=dtype,
-                progress=progress).sample
+                progress=progress,
+                storage=parameters.storage,
+                lazy=parameters.lazy,
+                readers=parameters.readers,
+                reference=parameters.reference).sample
 
 
 def load_stack(file_path: str, progress=None) -> Images:
@@ -135,7 +208,12 @@ def load(input_path=None,
          dtype=np.float32,
          file_names=None,
          indices=None,
-         progress=None) -> Dataset:
+         progress=None,
+         storage=pu.StorageMode.SHARED,
+         lazy=False,
+         readers: Optional[int] = None,
+         reference: Optional[str] = None,
+         roi: Optional[SensibleROI] = None) -> Dataset:
     """
 
     Loads a stack, including sample, white and dark images.
@@ -154,6 +232,14 @@ def load(input_path=None,
                     filename, but removes all indices from the filenames list
                     that are not selected
     :param progress: The progress reporting instance
+    :param storage: Whether the stacks are kept in RAM or backed by files in the scratch directory
+    :param lazy: Decode the sample images when they are first used, instead of loading all of them now
+    :param readers: Number of files read at once, chosen for the storage the files are on if None,
+                    see `img_loader.READERS`
+    :param reference: Load only the mean or median of the images, as a stack of one image.
+                      Used for flat and dark images, see `img_loader.REFERENCE_METHODS`
+    :param roi: Only load this region of the images, read from the file without reading the rest.
+                Only supported for NeXus files
     :return: a tuple with shape 3: (sample, flat, dark), if no flat and dark
              were loaded, they will be None
     """
@@ -168,19 +254,15 @@ def load(input_path=None,
     else:
         input_file_names = file_names
 
-    if in_format in ['nxs']:
-        raise NotImplementedError("TODO this needs to be adapted to the new changes")
-        # pass only the first filename as we only expect a stack
-        # input_file = input_file_names[0]
-        # images = stack_loader.execute(_nxsread, input_file, dtype, "NXS Load", indices, progress)
+    if in_format in NEXUS_FORMATS:
+        # a NeXus file holds the whole stack, only the first one is loaded
+        dataset = nexus_loader.load_dataset(input_file_names[0], dtype, indices, roi, progress, storage)
     else:
-        if in_format in ['fits', 'fit']:
-            load_func = _fitsread
-        else:
-            load_func = _imread
-
-        dataset = img_loader.execute(load_func, input_file_names, input_path_flat_before, input_path_flat_after,
-                                     input_path_dark_before, input_path_dark_after, in_format, dtype, indices, progress)
+        if roi is not None:
+            raise ValueError("A region of interest can only be loaded from NeXus files")
+        dataset = img_loader.execute(get_loader_func(in_format), input_file_names, input_path_flat_before,
+                                     input_path_flat_after, input_path_dark_before, input_path_dark_after, in_format,
+                                     dtype, indices, progress, storage, lazy, readers, reference)
 
     # Search for and load metadata file
     metadata_found_filenames = get_file_names(input_path, 'json', in_prefix, essential=False)
@@ -0,0 +1,176 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+This module handles the loading of NeXus/HDF5 files: the sample images, the flat and dark images
+and the projection angles, as written by `saver.write_nxs`.
+
+The images are read in hyperslabs straight into the stack. HDF5 picks out the selected images and
+the region of interest and converts the dtype while reading, so the dataset is never read whole.
+h5py serialises every call made from the threads of a process, so the hyperslabs are read in
+parallel by the worker processes instead, each opening the file read only.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.data_containers import ProjectionAngles
+from mantidimaging.core.utility.progress_reporting import Progress
+from mantidimaging.core.utility.sensible_roi import SensibleROI
+
+NEXUS_SAMPLE_PATH = "tomography/sample_data"
+NEXUS_ANGLES_PATH = "tomography/rotation_angle"
+# Paths of the flat and dark images, by the name of their stack in a `Dataset`
+NEXUS_REFERENCE_PATHS: Dict[str, str] = {
+    "flat_before": "tomography/flat_before_data",
+    "flat_after": "tomography/flat_after_data",
+    "dark_before": "tomography/dark_before_data",
+    "dark_after": "tomography/dark_after_data",
+}
+
+# Size of the hyperslab read by each task, rounded to whole HDF5 chunks along the images
+HYPERSLAB_BYTES = 64 * 1024 * 1024
+
+
+def dataset_shape(file_name: str, dataset_path: str = NEXUS_SAMPLE_PATH) -> Tuple[int, int, int]:
+    """
+    :return: The shape of the stack in the file, without reading any images
+    """
+    import h5py
+    with h5py.File(file_name, "r") as nexus:
+        shape = nexus[dataset_path].shape
+    if len(shape) != 3:
+        raise ValueError(f"Expected a stack of images in {dataset_path}, found a dataset of shape {shape}")
+    return shape
+
+
+def _selection(shape: Tuple[int, ...], indices: Optional[List[int]],
+               roi: Optional[SensibleROI]) -> Tuple[range, slice, slice]:
+    """
+    :return: The selected images, and the rows and columns of the region of interest
+    """
+    if len(shape) != 3:
+        raise ValueError(f"Expected a stack of images in {NEXUS_SAMPLE_PATH}, found a dataset of shape {shape}")
+    images = range(shape[0])[slice(*indices) if indices else slice(None)]
+    if images.step < 0:
+        raise ValueError(f"The images can only be loaded in increasing order, the indices were {indices}")
+    if roi is None:
+        rows, columns = slice(0, shape[1]), slice(0, shape[2])
+    else:
+        rows = slice(max(0, roi.top), min(shape[1], roi.bottom))
+        columns = slice(max(0, roi.left), min(shape[2], roi.right))
+    if len(images) == 0 or rows.start >= rows.stop or columns.start >= columns.stop:
+        raise ValueError(f"Nothing is selected from the images of shape {shape} by the indices {indices} "
+                         f"and the region of interest {roi}")
+    return images, rows, columns
+
+
+def _hyperslabs(num_images: int,
+                image_bytes: int,
+                step: int,
+                chunks: Optional[Tuple[int, ...]],
+                cores: int,
+                start: int = 0) -> List[Tuple[int, int]]:
+    """
+    :param start: The index in the dataset of the first selected image
+    :return: The ranges of the selected images read by each task
+    """
+    # every core gets a slab to read
+    per_slab = max(1, min(HYPERSLAB_BYTES // max(1, image_bytes), -(-num_images // cores)))
+    first_end = per_slab
+    if chunks is not None:
+        # a chunk of the dataset is decompressed whole, so the slabs shouldn't split them
+        per_chunk = max(1, -(-chunks[0] // step))
+        per_slab = max(per_chunk, per_slab // per_chunk * per_chunk)
+        # the chunks start at multiples of chunks[0] in the dataset, not at the first selected image
+        offset = start % chunks[0]
+        first_end = per_slab if offset == 0 else -(-(chunks[0] - offset) // step) + per_slab - per_chunk
+    ends = list(range(first_end, num_images, per_slab)) + [num_images]
+    return list(zip([0] + ends[:-1], ends))
+
+
+def _read_hyperslab(output: np.ndarray, i: int, file_name: str, dataset_path: str, slabs: List[Tuple[int, int]],
+                    images: range, rows: slice, columns: slice):
+    import h5py
+    begin, end = slabs[i]
+    source = np.s_[images[begin]:images[end - 1] + 1:images.step, rows, columns]
+    with h5py.File(file_name, "r") as nexus:
+        nexus[dataset_path].read_direct(output, source_sel=source, dest_sel=np.s_[begin:end])
+
+
+def execute(file_name: str,
+            dtype,
+            indices: Optional[List[int]] = None,
+            roi: Optional[SensibleROI] = None,
+            progress=None,
+            storage=pu.StorageMode.SHARED,
+            cores: Optional[int] = None,
+            dataset_path: str = NEXUS_SAMPLE_PATH) -> Images:
+    """
+    Loads the sample images of a NeXus file.
+
+    :param dtype: The dtype of the stack, the values are converted by HDF5 while reading
+    :param indices: [start, stop, step] of the images to load, all of them if None
+    :param roi: Only load this region of every image
+    :param storage: Whether the stack is kept in RAM or backed by a file, see `pu.create_array`
+    :param cores: Number of worker processes reading the file
+    :param dataset_path: Path of the dataset of images in the file
+    :return: The selected images
+    """
+    import h5py
+    with h5py.File(file_name, "r") as nexus:
+        if dataset_path not in nexus:
+            raise RuntimeError(f"Could not find the images {dataset_path} in {file_name}")
+        dataset = nexus[dataset_path]
+        images, rows, columns = _selection(dataset.shape, indices, roi)
+        chunks = dataset.chunks
+
+    cores = cores or pu.get_cores()
+    shape = (len(images), rows.stop - rows.start, columns.stop - columns.start)
+    data = pu.create_array(shape, dtype, storage)
+    slabs = _hyperslabs(shape[0], shape[1] * shape[2] * data.itemsize, images.step, chunks, cores, images.start)
+
+    progress = Progress.ensure_instance(progress, num_steps=len(slabs), task_name="Loading")
+    read = ps.create_partial(_read_hyperslab,
+                             ps.inplace_indexed,
+                             file_name=file_name,
+                             dataset_path=dataset_path,
+                             slabs=slabs,
+                             images=images,
+                             rows=rows,
+                             columns=columns)
+    ps.execute(read, len(slabs), progress, msg="Loading hyperslab", cores=cores, chunksize=1, arrays=[data])
+
+    return Images(data, [file_name], (indices[0], indices[1], indices[2]) if indices else None)
+
+
+def load_dataset(file_name: str,
+                 dtype,
+                 indices: Optional[List[int]] = None,
+                 roi: Optional[SensibleROI] = None,
+                 progress=None,
+                 storage=pu.StorageMode.SHARED,
+                 cores: Optional[int] = None) -> Dataset:
+    """
+    Loads the sample images of a NeXus file, with the flat and dark images and the projection
+    angles if the file has them.
+
+    :param indices: [start, stop, step] of the sample images to load, the flat and dark images are loaded whole
+    :param roi: Only load this region of every image, of the flat and dark images too
+    :return: The dataset, the angles of the selected images are set on the sample
+    """
+    import h5py
+    with h5py.File(file_name, "r") as nexus:
+        references = [name for name, path in NEXUS_REFERENCE_PATHS.items() if path in nexus]
+        angles = nexus[NEXUS_ANGLES_PATH][...] if NEXUS_ANGLES_PATH in nexus else None
+
+    dataset = Dataset(execute(file_name, dtype, indices, roi, progress, storage, cores))
+    for name in references:
+        setattr(dataset, name,
+                execute(file_name, dtype, None, roi, progress, storage, cores, NEXUS_REFERENCE_PATHS[name]))
+    if angles is not None:
+        dataset.sample.set_projection_angles(ProjectionAngles(angles[slice(*indices) if indices else slice(None)]))
+    return dataset
@@ -39,7 +39,7 @@ def do_stack_load_seq(data, new_data, img_shape, name, progress):
     return data
 
 
-def execute(load_func, file_name, dtype, name, indices=None, progress=None):
+def execute(load_func, file_name, dtype, name, indices=None, progress=None, storage=pu.StorageMode.SHARED):
     """
     Load a single image FILE that is expected to be a stack of images.
 
@@ -54,6 +54,8 @@ def execute(load_func, file_name, dtype, name, indices=None, progress=None):
 
     :param dtype: data type for the output numpy array
 
+    :param storage: Whether the stack is kept in RAM or backed by a file, see `pu.create_array`
+
     :return: stack of images as a 3-elements tuple: numpy array with sample
              images, white image, and dark image.
     """
@@ -64,7 +66,7 @@ def execute(load_func, file_name, dtype, name, indices=None, progress=None):
         new_data = new_data[indices[0]:indices[1]:indices[2]]
 
     img_shape = new_data.shape
-    data = pu.create_array(img_shape, dtype=dtype)
+    data = pu.create_array(img_shape, dtype=dtype, storage=storage)
 
     # we could just move with data[:] = new_data[:] but then we don't get
     # loading bar information, and I doubt there's any performance gain
@@ -3,10 +3,15 @@
 import os
 from unittest import mock
 
+import numpy as np
+
+from mantidimaging.core.data.lazy_images import LazyImages
 from mantidimaging.core.io import loader
 from mantidimaging.core.io.loader import load_stack
+from mantidimaging.core.io.saver import write_fits, write_img
+from mantidimaging.core.parallel.utility import StorageMode
 from mantidimaging.core.io.loader.loader import create_loading_parameters_for_file_path, DEFAULT_PIXEL_DEPTH, \
-    DEFAULT_PIXEL_SIZE, DEFAULT_IS_SINOGRAM
+    DEFAULT_PIXEL_SIZE, DEFAULT_IS_SINOGRAM, _fitsread, _imread
 from mantidimaging.test_helpers import FileOutputtingTestCase
 
 
@@ -29,6 +34,102 @@ class LoaderTest(FileOutputtingTestCase):
                                                     img_format="tif",
                                                     prefix="/path/to/file/that/is/fake.ti")
 
+    def test_load_file_backed(self):
+        data = np.random.rand(3, 8, 10).astype(np.float32)
+        for i, image in enumerate(data):
+            write_img(image, os.path.join(self.output_directory, f"image_{i:03}.tif"))
+
+        sample = loader.load(self.output_directory, in_prefix="image", storage=StorageMode.FILE).sample
+
+        self.assertEqual(sample.storage, StorageMode.FILE)
+        np.testing.assert_equal(sample.data, data)
+
+    def test_load_lazy(self):
+        data = np.random.rand(3, 8, 10).astype(np.float32)
+        for i, image in enumerate(data):
+            write_img(image, os.path.join(self.output_directory, f"image_{i:03}.tif"))
+
+        sample = loader.load(self.output_directory, in_prefix="image", lazy=True).sample
+
+        self.assertIsInstance(sample, LazyImages)
+        np.testing.assert_equal(sample.projection(1), data[1])
+        self.assertFalse(sample.is_materialised)
+        np.testing.assert_equal(sample.data, data)
+
+    def test_load_parallel_readers(self):
+        data = np.random.rand(20, 8, 10).astype(np.float32)
+        for i, image in enumerate(data):
+            write_img(image, os.path.join(self.output_directory, f"image_{i:03}.tif"))
+
+        sample = loader.load(self.output_directory, in_prefix="image", readers=4).sample
+
+        np.testing.assert_equal(sample.data, data)
+
+    def test_load_parallel_readers_reports_first_failed_file(self):
+        data = np.random.rand(6, 8, 10).astype(np.float32)
+        for i, image in enumerate(data):
+            write_img(image if i != 3 else image[:6], os.path.join(self.output_directory, f"image_{i:03}.tif"))
+        with open(os.path.join(self.output_directory, "image_004.tif"), "wb") as f:
+            f.write(b"not a tiff")
+
+        with self.assertRaisesRegex(ValueError, "different width and/or height"):
+            loader.load(self.output_directory, in_prefix="image", readers=4)
+
+    def test_imread_into_output_converts_dtype(self):
+        import tifffile
+        image = np.random.randint(0, 65535, (8, 10)).astype(np.uint16)
+        file_name = os.path.join(self.output_directory, "image.tif")
+        write_img(image, file_name)
+        compressed_file_name = os.path.join(self.output_directory, "compressed.tif")
+        tifffile.imwrite(compressed_file_name, image, compression="zlib")
+
+        for name in (file_name, compressed_file_name):
+            for dtype in (np.float32, np.uint16):
+                out = np.zeros((8, 10), dtype)
+                self.assertIs(out, _imread(name, out=out))
+                np.testing.assert_equal(out, image)
+
+    def test_fitsread_into_output_applies_scaling(self):
+        image = np.random.randint(0, 65535, (8, 10)).astype(np.uint16)
+        file_name = os.path.join(self.output_directory, "image.fits")
+        write_fits(image, file_name)
+
+        for dtype in (np.float32, np.uint16):
+            out = np.zeros((8, 10), dtype)
+            self.assertIs(out, _fitsread(file_name, out=out))
+            np.testing.assert_equal(out, image)
+
+    def test_read_into_output_of_wrong_shape_raises(self):
+        image = np.random.rand(8, 10).astype(np.float32)
+        write_img(image, os.path.join(self.output_directory, "image.tif"))
+        write_fits(image, os.path.join(self.output_directory, "image.fits"))
+
+        self.assertRaises(ValueError, _imread, os.path.join(self.output_directory, "image.tif"), np.zeros((10, 8)))
+        self.assertRaises(ValueError, _fitsread, os.path.join(self.output_directory, "image.fits"), np.zeros((10, 8)))
+
+    def test_load_reference(self):
+        data = np.random.rand(7, 8, 10).astype(np.float32)
+        for i, image in enumerate(data):
+            write_img(image, os.path.join(self.output_directory, f"image_{i:03}.tif"))
+
+        for method, expected in (("mean", data.mean(axis=0)), ("median", np.median(data, axis=0))):
+            with mock.patch("mantidimaging.core.io.loader.img_loader.REFERENCE_BAND_BYTES", 7 * 10 * 4 * 3):
+                reference = loader.load(self.output_directory, in_prefix="image", readers=2, reference=method).sample
+
+            self.assertEqual((1, 8, 10), reference.data.shape)
+            np.testing.assert_allclose(reference.data[0], expected, rtol=1e-6)
+            self.assertEqual({"method": method, "frames": 7}, reference.metadata["reference"])
+
+    def test_load_reference_of_integer_images_is_float(self):
+        data = np.array([[[1, 2]], [[2, 2]]], dtype=np.uint16)
+        for i, image in enumerate(data):
+            write_img(image, os.path.join(self.output_directory, f"image_{i:03}.tif"))
+
+        reference = loader.load(self.output_directory, in_prefix="image", dtype=np.uint16, reference="mean").sample
+
+        self.assertEqual(np.float32, reference.dtype)
+        np.testing.assert_equal([[[1.5, 2]]], reference.data)
+
     def _create_test_sample(self):
         # Logs
         with open(os.path.join(self.output_directory, "Tomo_log.txt"), "w") as f:
@@ -0,0 +1,72 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+import os
+from unittest import mock
+
+import h5py
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.io import loader
+from mantidimaging.core.io.loader import nexus_loader
+from mantidimaging.core.io.loader.nexus_loader import NEXUS_SAMPLE_PATH
+from mantidimaging.core.utility.sensible_roi import SensibleROI
+from mantidimaging.test_helpers import FileOutputtingTestCase
+
+
+class NexusLoaderTest(FileOutputtingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = np.random.randint(0, 65535, (24, 8, 10)).astype(np.uint16)
+        self.file_name = os.path.join(self.output_directory, "sample.nxs")
+        with h5py.File(self.file_name, "w") as nexus:
+            nexus.create_dataset(NEXUS_SAMPLE_PATH, data=self.data, chunks=(2, 8, 10), compression="gzip")
+
+    def test_load_converts_dtype(self):
+        images = nexus_loader.execute(self.file_name, np.float32)
+
+        self.assertEqual(np.float32, images.dtype)
+        npt.assert_equal(images.data, self.data)
+        self.assertEqual([self.file_name], images.filenames)
+
+    def test_load_indices_and_roi(self):
+        images = nexus_loader.execute(self.file_name, np.float32, [1, 20, 3], SensibleROI(2, 1, 7, 6))
+
+        npt.assert_equal(images.data, self.data[1:20:3, 1:6, 2:7])
+
+    def test_load_in_parallel_hyperslabs(self):
+        with mock.patch.object(nexus_loader, "HYPERSLAB_BYTES", 1):
+            images = nexus_loader.execute(self.file_name, np.float32, [0, 24, 1], cores=2)
+
+        npt.assert_equal(images.data, self.data)
+
+    def test_hyperslabs_keep_whole_chunks(self):
+        slabs = nexus_loader._hyperslabs(10, 100, 1, (4, 8, 10), cores=8)
+
+        self.assertEqual([(0, 4), (4, 8), (8, 10)], slabs)
+
+    def test_hyperslabs_aligned_to_chunks_of_dataset(self):
+        # the selection starts at image 3 of the dataset, the chunks at images 0, 4, 8...
+        slabs = nexus_loader._hyperslabs(10, 100, 1, (4, 8, 10), cores=8, start=3)
+
+        self.assertEqual([(0, 1), (1, 5), (5, 9), (9, 10)], slabs)
+
+    def test_load_from_start_within_chunk(self):
+        images = nexus_loader.execute(self.file_name, np.float32, [3, 21, 1], cores=2)
+
+        npt.assert_equal(images.data, self.data[3:21])
+        self.assertEqual((3, 21, 1), images.indices)
+
+    def test_nothing_selected_raises(self):
+        self.assertRaises(ValueError, nexus_loader.execute, self.file_name, np.float32, [30, 40, 1])
+        self.assertRaises(ValueError, nexus_loader.execute, self.file_name, np.float32, None, SensibleROI(20, 0, 30, 5))
+
+    def test_missing_dataset_raises(self):
+        self.assertRaises(RuntimeError, nexus_loader.execute, self.file_name, np.float32, dataset_path="missing")
+
+    def test_loader_load_and_file_information(self):
+        sample = loader.load(self.output_directory, in_prefix="sample", in_format="nxs", indices=[0, 24, 2]).sample
+        npt.assert_equal(sample.data, self.data[::2])
+
+        info = loader.read_in_file_information(self.output_directory, in_prefix="sample", in_format="nxs")
+        self.assertEqual((24, 8, 10), info.shape)
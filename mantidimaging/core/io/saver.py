@@ -1,15 +1,23 @@
 # Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
 # SPDX - License - Identifier: GPL-3.0-or-later
 
+import itertools
 import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import List, Union
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
-from .utility import DEFAULT_IO_FILE_FORMAT
+from .loader.nexus_loader import NEXUS_ANGLES_PATH, NEXUS_REFERENCE_PATHS, NEXUS_SAMPLE_PATH
+from .utility import DEFAULT_IO_FILE_FORMAT, NEXUS_CHUNKINGS, NEXUS_GZIP, NEXUS_NO_COMPRESSION, \
+    NEXUS_PROJECTION_MAJOR, NEXUS_SINOGRAM_MAJOR
+from ..data.compact import WORKING_DTYPE, is_compact, to_values
 from ..data.images import Images
 from ..operations.rescale import RescaleFilter
+from ..parallel import utility as pu
 from ..utility.progress_reporting import Progress
 
 LOG = getLogger(__name__)
@@ -19,6 +27,12 @@ DEFAULT_NAME_PREFIX = 'image'
 DEFAULT_NAME_POSTFIX = ''
 INT16_SIZE = 65536
 
+NEXUS_GZIP_LEVEL = 4
+# Size of the chunks of the datasets, which are read and decompressed whole
+NEXUS_CHUNK_BYTES = 1024 * 1024
+# Number of chunks per thread compressed ahead of the chunk being written
+NEXUS_CHUNKS_AHEAD = 2
+
 
 def write_fits(data, filename, overwrite=False):
     import astropy.io.fits as fits
@@ -33,23 +47,155 @@ def write_img(data, filename, overwrite=False):
     skio.imsave(filename, data)
 
 
-def write_nxs(data, filename, projection_angles=None, overwrite=False):
-    import h5py
-    nxs = h5py.File(filename, 'w')
+def nexus_chunks(shape: Tuple[int, int, int], itemsize: int, chunking: str) -> Tuple[int, int, int]:
+    """
+    :param chunking: NEXUS_PROJECTION_MAJOR for chunks of rows of one projection,
+                     NEXUS_SINOGRAM_MAJOR for chunks of one row of several projections
+    :return: The chunk shape of about NEXUS_CHUNK_BYTES for a stack of the shape
+    """
+    rows = max(1, NEXUS_CHUNK_BYTES // max(1, shape[2] * itemsize))
+    if chunking == NEXUS_PROJECTION_MAJOR:
+        return 1, min(shape[1], rows), shape[2]
+    if chunking == NEXUS_SINOGRAM_MAJOR:
+        return min(shape[0], rows), 1, shape[2]
+    raise ValueError(f"Unknown chunk layout {chunking}, expected one of {NEXUS_CHUNKINGS}")
+
+
+def _chunk_layout(data: np.ndarray, value_scale, chunking: Union[str, Tuple[int, int, int]]):
+    """
+    :return: The dtype the values of the data are written as, and the shape of the chunks
+    """
+    dtype = np.dtype(WORKING_DTYPE if value_scale is not None or is_compact(data.dtype) else data.dtype)
+    if isinstance(chunking, str):
+        return dtype, nexus_chunks(data.shape, dtype.itemsize, chunking)
+    # HDF5 refuses chunks larger than a fixed size dataset, which the flats and darks can be
+    return dtype, tuple(max(1, min(chunk, size)) for chunk, size in zip(chunking, data.shape))
+
 
-    # appending flat and dark images is disabled for now
-    # new shape to account for appending flat and dark images
-    # correct_shape = (data.shape[0] + 2, data.shape[1], data.shape[2])
+def _chunk_offsets(shape: Tuple[int, ...], chunks: Tuple[int, ...]) -> Iterator[Tuple[int, ...]]:
+    return itertools.product(*(range(0, size, chunk) for size, chunk in zip(shape, chunks)))
 
-    dset = nxs.create_dataset("tomography/sample_data", data.shape)
-    dset[:data.shape[0]] = data[:]
-    # left here if we decide to start appending the flat and dark images again
-    # dset[-2] = flat[:]
-    # dset[-1] = dark[:]
 
-    if projection_angles is not None:
-        rangle = nxs.create_dataset("tomography/rotation_angle", data=projection_angles)
-        rangle[...] = projection_angles
+def _chunk_region(offset: Tuple[int, ...], chunks: Tuple[int, ...], shape: Tuple[int, ...]) -> Tuple[slice, ...]:
+    return tuple(slice(start, min(start + chunk, size)) for start, chunk, size in zip(offset, chunks, shape))
+
+
+def _compress_chunk(data: np.ndarray, offset: Tuple[int, ...], chunks: Tuple[int, ...], dtype, value_scale, level: int,
+                    shuffle: bool) -> bytes:
+    """
+    Applies the filters of the dataset to a chunk, in the order HDF5 applies them: shuffle, then gzip
+    """
+    region = _chunk_region(offset, chunks, data.shape)
+    # HDF5 stores the chunks at the edge of the dataset whole, the values past the edge are never read
+    chunk = np.zeros(chunks, dtype)
+    chunk[tuple(slice(0, r.stop - r.start) for r in region)] = to_values(data[region], value_scale)
+    if shuffle:
+        # the first byte of every value, then the second byte of every value, and so on
+        chunk = chunk.view(np.uint8).reshape(-1, chunk.itemsize).T
+    return zlib.compress(chunk.tobytes(), level)
+
+
+def _write_stack(nexus,
+                 path: str,
+                 data: np.ndarray,
+                 value_scale=None,
+                 chunking: Union[str, Tuple[int, int, int]] = NEXUS_PROJECTION_MAJOR,
+                 compression: str = NEXUS_GZIP,
+                 compression_level: int = NEXUS_GZIP_LEVEL,
+                 shuffle: bool = True,
+                 cores: Optional[int] = None,
+                 progress: Optional[Progress] = None):
+    dtype, chunks = _chunk_layout(data, value_scale, chunking)
+    dataset = nexus.create_dataset(path,
+                                   data.shape,
+                                   dtype,
+                                   chunks=chunks,
+                                   compression=None if compression == NEXUS_NO_COMPRESSION else compression,
+                                   compression_opts=compression_level if compression == NEXUS_GZIP else None,
+                                   shuffle=shuffle and compression != NEXUS_NO_COMPRESSION)
+    offsets = _chunk_offsets(data.shape, chunks)
+
+    if compression != NEXUS_GZIP:
+        # the other filters are only available inside HDF5, which applies them one chunk at a time
+        for offset in offsets:
+            region = _chunk_region(offset, chunks, data.shape)
+            dataset[region] = to_values(data[region], value_scale)
+            if progress is not None:
+                progress.update(msg='Chunk')
+        return
+
+    def write_next():
+        offset, future = pending.popleft()
+        dataset.id.write_direct_chunk(offset, future.result())
+        if progress is not None:
+            progress.update(msg='Chunk')
+
+    # zlib releases the GIL, so the chunks are compressed by a pool of threads and written already
+    # compressed in order, bypassing the filters of HDF5 that would compress them one at a time
+    cores = cores or pu.get_cores()
+    pending: Deque = deque()
+    with ThreadPoolExecutor(cores) as executor:
+        try:
+            for offset in offsets:
+                pending.append((offset,
+                                executor.submit(_compress_chunk, data, offset, chunks, dtype, value_scale,
+                                                compression_level, shuffle)))
+                # only a few chunks are compressed ahead of the writes, so they don't pile up in memory
+                if len(pending) > NEXUS_CHUNKS_AHEAD * cores:
+                    write_next()
+            while pending:
+                write_next()
+        except BaseException:
+            for _, future in pending:
+                future.cancel()
+            raise
+
+
+def write_nxs(data,
+              filename,
+              projection_angles=None,
+              overwrite=False,
+              references: Optional[Dict[str, np.ndarray]] = None,
+              value_scale=None,
+              chunking: Union[str, Tuple[int, int, int]] = NEXUS_PROJECTION_MAJOR,
+              compression: str = NEXUS_GZIP,
+              compression_level: int = NEXUS_GZIP_LEVEL,
+              shuffle: bool = True,
+              cores: Optional[int] = None,
+              progress=None):
+    """
+    Writes the stack into a NeXus file, in chunks that can be read back individually by `nexus_loader`.
+
+    :param projection_angles: The angles of the projections in radians
+    :param references: The flat and dark images, by their name in `nexus_loader.NEXUS_REFERENCE_PATHS`
+    :param value_scale: The scale of the data if it is scaled uint16, the values are written
+    :param chunking: One of NEXUS_CHUNKINGS, or the shape of the chunks
+    :param compression: One of NEXUS_COMPRESSIONS. gzip is compressed by a pool of threads,
+                        lzf by HDF5 in the calling thread
+    :param compression_level: The gzip level, from 0 to 9
+    :param shuffle: Store the bytes of the values grouped by significance, which compresses better
+    :param cores: Number of threads compressing chunks
+    """
+    import h5py
+    references = references or {}
+    num_chunks = 0
+    for stack, scale in [(data, value_scale)] + [(reference, None) for reference in references.values()]:
+        _, chunks = _chunk_layout(stack, scale, chunking)
+        num_chunks += int(np.prod([-(-size // chunk) for size, chunk in zip(stack.shape, chunks)]))
+    progress = Progress.ensure_instance(progress, num_steps=num_chunks, task_name='Save')
+
+    options = dict(chunking=chunking,
+                   compression=compression,
+                   compression_level=compression_level,
+                   shuffle=shuffle,
+                   cores=cores,
+                   progress=progress)
+    with progress, h5py.File(filename, 'w' if overwrite else 'w-') as nexus:
+        _write_stack(nexus, NEXUS_SAMPLE_PATH, data, value_scale, **options)
+        for name, reference in references.items():
+            _write_stack(nexus, NEXUS_REFERENCE_PATHS[name], reference, **options)
+        if projection_angles is not None:
+            nexus.create_dataset(NEXUS_ANGLES_PATH, data=projection_angles)
 
 
 def save(images: Images,
@@ -63,7 +209,10 @@ def save(images: Images,
          name_postfix=DEFAULT_NAME_POSTFIX,
          indices=None,
          pixel_depth=None,
-         progress=None) -> Union[str, List[str]]:
+         progress=None,
+         references: Optional[Dict[str, Images]] = None,
+         nexus_chunking: str = NEXUS_PROJECTION_MAJOR,
+         nexus_compression: str = NEXUS_GZIP) -> Union[str, List[str]]:
     """
     Save image volume (3d) into a series of slices along the Z axis.
     The Z axis in the script is the ndarray.shape[0].
@@ -93,6 +242,10 @@ def save(images: Images,
     :param pixel_depth: Defines the target pixel depth of the save operation so
            np.float32 or np.int16 will ensure the values are scaled
            correctly to these values.
+    :param references: The flat and dark images by their name in a `Dataset`,
+           written into the file with the images when saving to NeXus
+    :param nexus_chunking: The chunk layout when saving to NeXus, one of NEXUS_CHUNKINGS
+    :param nexus_compression: The compression when saving to NeXus, one of NEXUS_COMPRESSIONS
     :returns: The filename/filenames of the saved data.
     """
     progress = Progress.ensure_instance(progress, task_name='Save')
@@ -102,8 +255,15 @@ def save(images: Images,
     make_dirs_if_needed(output_dir, overwrite_all)
 
     # Define current parameters
-    min_value = np.nanmin(images.data)
-    max_value = np.nanmax(images.data)
+    # compact stacks are saved as floats, with the values they represent
+    value_scale = images.value_scale
+    value_type = WORKING_DTYPE if images.is_compact else images.dtype.type
+    statistics = images.read_statistics()
+    min_value, max_value = statistics.min, statistics.max
+    if value_scale is not None:
+        min_value, max_value = value_scale.offset + value_scale.slope * min_value, \
+                               value_scale.offset + value_scale.slope * max_value
+    min_value, max_value = value_type(min_value), value_type(max_value)
     int_16_slope = max_value / INT16_SIZE
 
     # Do rescale if needed.
@@ -128,7 +288,18 @@ def save(images: Images,
 
     if out_format in ['nxs']:
         filename = os.path.join(output_dir, name_prefix + name_postfix)
-        write_nxs(data, filename + '.nxs', overwrite=overwrite_all)
+        # the angles are for the projections, they don't apply to the sinograms
+        angles = images.projection_angles().value if images.has_projection_angles() and not swap_axes else None
+        write_nxs(data,
+                  filename + '.nxs',
+                  projection_angles=angles,
+                  overwrite=overwrite_all,
+                  references={name: to_values(ref.data, ref.value_scale)
+                              for name, ref in (references or {}).items()},
+                  value_scale=value_scale,
+                  chunking=nexus_chunking,
+                  compression=nexus_compression,
+                  progress=progress)
         return filename
     else:
         if out_format in ['fit', 'fits']:
@@ -146,17 +317,16 @@ def save(images: Images,
             names[i] = os.path.join(output_dir, names[i])
 
         with progress:
-            min_value = images.data.min()
             for idx in range(num_images):
                 # Overwrite images with the copy that has been rescaled.
                 if pixel_depth == "int16":
                     write_func(
-                        rescale_single_image(np.copy(images.data[idx]),
+                        rescale_single_image(np.array(to_values(images.data[idx], value_scale), dtype=value_type),
                                              min_input=min_value,
                                              max_input=max_value,
                                              max_output=INT16_SIZE - 1), names[idx], overwrite_all)
                 else:
-                    write_func(data[idx, :, :], names[idx], overwrite_all)
+                    write_func(to_values(data[idx, :, :], value_scale), names[idx], overwrite_all)
 
                 progress.update(msg='Image')
 
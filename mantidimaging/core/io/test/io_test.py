@@ -3,13 +3,20 @@
 
 import os
 import unittest
+from unittest import mock
 
+import h5py
+import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.data import Images
 from mantidimaging.core.io import loader
 from mantidimaging.core.io import saver
+from mantidimaging.core.io.loader.nexus_loader import NEXUS_ANGLES_PATH, NEXUS_REFERENCE_PATHS, NEXUS_SAMPLE_PATH
+from mantidimaging.core.io.utility import NEXUS_CHUNKINGS, NEXUS_COMPRESSIONS, NEXUS_NO_COMPRESSION, \
+    NEXUS_PROJECTION_MAJOR, NEXUS_SINOGRAM_MAJOR
+from mantidimaging.core.utility.data_containers import ProjectionAngles
 from mantidimaging.helper import initialise_logging
 from mantidimaging.test_helpers import FileOutputtingTestCase
 
@@ -218,6 +225,81 @@ class IOTest(FileOutputtingTestCase):
         # Ensure properties have been preserved
         self.assertEqual(loaded_images.metadata, images.metadata)
 
+    def test_nexus_chunks(self):
+        with mock.patch.object(saver, "NEXUS_CHUNK_BYTES", 200):
+            self.assertEqual((1, 5, 10), saver.nexus_chunks((20, 8, 10), 4, NEXUS_PROJECTION_MAJOR))
+            self.assertEqual((5, 1, 10), saver.nexus_chunks((20, 8, 10), 4, NEXUS_SINOGRAM_MAJOR))
+        self.assertRaises(ValueError, saver.nexus_chunks, (20, 8, 10), 4, "columns")
+
+    def test_write_nxs_round_trip(self):
+        data = np.random.rand(9, 7, 11).astype(np.float32)
+        for chunking in NEXUS_CHUNKINGS:
+            for compression in NEXUS_COMPRESSIONS:
+                file_name = os.path.join(self.output_directory, f"{chunking}_{compression}.nxs")
+                with mock.patch.object(saver, "NEXUS_CHUNK_BYTES", 100):
+                    saver.write_nxs(data, file_name, chunking=chunking, compression=compression, cores=3)
+                    chunks = saver.nexus_chunks(data.shape, 4, chunking)
+
+                with h5py.File(file_name, "r") as nexus:
+                    dataset = nexus[NEXUS_SAMPLE_PATH]
+                    self.assertEqual(chunks, dataset.chunks)
+                    self.assertEqual(None if compression == NEXUS_NO_COMPRESSION else compression, dataset.compression)
+                    npt.assert_equal(dataset[...], data)
+                    # a single chunk can be read on its own
+                    npt.assert_equal(dataset[4, 3], data[4, 3])
+
+    def test_write_nxs_explicit_chunks_clamped_to_each_dataset(self):
+        data = np.random.rand(20, 8, 48).astype(np.float32)
+        flat = np.random.rand(5, 8, 48).astype(np.float32)
+        file_name = os.path.join(self.output_directory, "explicit_chunks.nxs")
+
+        saver.write_nxs(data, file_name, references={"flat_before": flat}, chunking=(16, 16, 64))
+
+        with h5py.File(file_name, "r") as nexus:
+            self.assertEqual((16, 8, 48), nexus[NEXUS_SAMPLE_PATH].chunks)
+            self.assertEqual((5, 8, 48), nexus[NEXUS_REFERENCE_PATHS["flat_before"]].chunks)
+            npt.assert_equal(nexus[NEXUS_SAMPLE_PATH][...], data)
+            npt.assert_equal(nexus[NEXUS_REFERENCE_PATHS["flat_before"]][...], flat)
+
+    def test_write_nxs_scaled_values_and_overwrite(self):
+        images = Images(np.random.rand(5, 6, 7).astype(np.float32))
+        values = images.data.copy()
+        images.to_compact("uint16")
+        file_name = os.path.join(self.output_directory, "scaled.nxs")
+
+        saver.write_nxs(images.data, file_name, value_scale=images.value_scale)
+        self.assertRaises(OSError, saver.write_nxs, images.data, file_name)
+
+        with h5py.File(file_name, "r") as nexus:
+            self.assertEqual(np.float32, nexus[NEXUS_SAMPLE_PATH].dtype)
+            npt.assert_allclose(nexus[NEXUS_SAMPLE_PATH][...], values, atol=1e-4)
+
+    def test_nexus_round_trip_with_flats_darks_and_angles(self):
+        images = Images(np.random.rand(6, 5, 4).astype(np.float32))
+        angles = np.linspace(0, np.pi, 6)
+        images.set_projection_angles(ProjectionAngles(angles))
+        flat = Images(np.random.rand(1, 5, 4).astype(np.float32))
+        dark = Images(np.random.rand(2, 5, 4).astype(np.float32))
+
+        saver.save(images,
+                   self.output_directory,
+                   out_format="nxs",
+                   references={
+                       "flat_before": flat,
+                       "dark_after": dark
+                   },
+                   nexus_chunking=NEXUS_SINOGRAM_MAJOR)
+        with h5py.File(os.path.join(self.output_directory, "image.nxs"), "r") as nexus:
+            npt.assert_equal(nexus[NEXUS_ANGLES_PATH][...], angles)
+
+        dataset = loader.load(self.output_directory, in_format="nxs", indices=[1, 6, 2])
+        npt.assert_equal(dataset.sample.data, images.data[1:6:2])
+        npt.assert_equal(dataset.sample.projection_angles().value, angles[1:6:2])
+        npt.assert_equal(dataset.flat_before.data, flat.data)
+        npt.assert_equal(dataset.dark_after.data, dark.data)
+        self.assertIsNone(dataset.flat_after)
+        self.assertIsNone(dataset.dark_before)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@
 
 import os
 from pathlib import Path
+from unittest import mock
 
 from mantidimaging.helper import initialise_logging
 from mantidimaging.core.io import utility
@@ -40,3 +41,13 @@ class UtilityTest(FileOutputtingTestCase):
             f.write("sample logs")
 
         self.assertNotEqual("", utility.find_log(Path(self.output_directory), "sample"))
+
+    def test_storage_type(self):
+        with mock.patch("mantidimaging.core.io.utility._mount_file_system", return_value="nfs4"):
+            self.assertEqual(utility.NETWORK, utility.storage_type(self.output_directory))
+        with mock.patch("mantidimaging.core.io.utility._mount_file_system", return_value="ext4"), \
+                mock.patch("mantidimaging.core.io.utility._is_rotational", return_value=True):
+            self.assertEqual(utility.HDD, utility.storage_type(self.output_directory))
+        with mock.patch("mantidimaging.core.io.utility._mount_file_system", return_value="ext4"), \
+                mock.patch("mantidimaging.core.io.utility._is_rotational", return_value=None):
+            self.assertEqual(utility.SSD, utility.storage_type(self.output_directory))
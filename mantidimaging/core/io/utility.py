@@ -11,6 +11,22 @@ from typing import List, Optional
 
 DEFAULT_IO_FILE_FORMAT = 'tif'
 
+# Types of storage that files are read from, see `storage_type`
+HDD = "hdd"
+SSD = "ssd"
+NETWORK = "network"
+
+NETWORK_FILE_SYSTEMS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "lustre", "gpfs", "beegfs", "ceph", "fuse.sshfs")
+
+# Layouts of the chunks of NeXus files, see `saver.nexus_chunks`
+NEXUS_PROJECTION_MAJOR = "projections"
+NEXUS_SINOGRAM_MAJOR = "sinograms"
+NEXUS_CHUNKINGS = (NEXUS_PROJECTION_MAJOR, NEXUS_SINOGRAM_MAJOR)
+
+NEXUS_GZIP = "gzip"
+NEXUS_NO_COMPRESSION = "none"
+NEXUS_COMPRESSIONS = (NEXUS_GZIP, "lzf", NEXUS_NO_COMPRESSION)
+
 SIMILAR_FILE_EXTENSIONS = (('tif', 'tiff'), ('fit', 'fits'))
 
 
@@ -222,3 +238,49 @@ def find_first_file_that_is_possibly_a_sample(file_path: str) -> Optional[str]:
         if "flat" not in lower_filename and "dark" not in lower_filename and "180" not in lower_filename:
             return possible_file
     return None
+
+
+def _mount_file_system(path: str) -> Optional[str]:
+    """
+    :return: The type of the file system the path is on, from the mount with the longest matching mount point
+    """
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) > 2]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    matching = [(mount_point, fs_type) for mount_point, fs_type in mounts
+                if path == mount_point or path.startswith(mount_point.rstrip("/") + "/")]
+    return max(matching, key=lambda m: len(m[0]))[1] if matching else None
+
+
+def _is_rotational(path: str) -> Optional[bool]:
+    """
+    :return: Whether the block device the path is on is a spinning disk, None if it can't be found
+    """
+    device = os.stat(path).st_dev
+    block_device = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    # partitions don't have a queue, the disk they are part of does
+    for queue in (os.path.join(block_device, "queue"), os.path.join(block_device, "..", "queue")):
+        try:
+            with open(os.path.join(queue, "rotational")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def storage_type(path: str) -> str:
+    """
+    Finds what the path is stored on, to tune how many files are read from it at once.
+    Only Linux is inspected, anything that can't be identified is taken to be an SSD.
+
+    :return: NETWORK for network and parallel file systems, HDD for spinning disks, otherwise SSD
+    """
+    if not os.path.exists(path):
+        return SSD
+    fs_type = _mount_file_system(path)
+    if fs_type is not None and fs_type.startswith(NETWORK_FILE_SYSTEMS):
+        return NETWORK
+    return HDD if _is_rotational(path) else SSD
@@ -24,3 +24,8 @@ OPERATION_NAME_TOMOPY_RECON = "tomopy_recon"
 OPERATION_NAME_AXES_SWAP = "axes_swap"
 SINOGRAMS = "sinograms"
 RESCALED = "rescaled"
+VALUE_SCALE = "value_scale"
+
+REFERENCE = "reference"
+REFERENCE_METHOD = "method"
+REFERENCE_FRAMES = "frames"
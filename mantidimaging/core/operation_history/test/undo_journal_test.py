@@ -0,0 +1,109 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.page_store import CompressedPageStore
+from mantidimaging.core.data.snapshot import ImagesSnapshot
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history import undo_journal
+from mantidimaging.core.operation_history.undo_journal import UndoJournal
+from mantidimaging.core.parallel import utility as pu
+
+
+class UndoJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.images = th.generate_images((5, 8, 10))
+        self.journal = UndoJournal(disk_budget_mb=100)
+        self.states = []
+
+    def tearDown(self):
+        self.journal.clear()
+
+    def _apply(self, name: str, index: int, journal=None):
+        self.states.append(np.copy(self.images.data))
+        snapshot = ImagesSnapshot(self.images, cores=1)
+        self.images.data[index] *= 2
+        self.images.record_operation(name, name)
+        snapshot.discard_unchanged(self.images)
+        (journal if journal is not None else self.journal).record(snapshot, self.images)
+
+    def test_revert_operations_newest_first(self):
+        self._apply("first", 0)
+        self._apply("second", 0)
+        self._apply("third", 3)
+        self.assertEqual(3, self.journal.revertible(self.images))
+
+        self.journal.revert(self.images, 2)
+
+        npt.assert_equal(self.images.data, self.states[1])
+        self.assertEqual(["first"], [op[const.OPERATION_NAME] for op in self.images.metadata[const.OPERATION_HISTORY]])
+        self.assertEqual(1, self.journal.revertible(self.images))
+
+    def test_revert_more_than_recorded(self):
+        self._apply("first", 0)
+
+        with self.assertRaises(ValueError):
+            self.journal.revert(self.images, 2)
+
+    def test_operation_without_snapshot_stops_revert(self):
+        self._apply("first", 0)
+        self.images.record_operation("not journaled", "not journaled")
+
+        self.assertEqual(0, self.journal.revertible(self.images))
+
+    def test_oldest_snapshots_removed_over_budget(self):
+        journal = UndoJournal(disk_budget_mb=0.0005)
+        self._apply("first", 0, journal)
+        self._apply("second", 1, journal)
+
+        self.assertEqual(1, len(journal))
+        self.assertEqual(1, journal.revertible(self.images))
+        journal.clear()
+
+    def test_budget_counts_dropped_images_left_on_disk(self):
+        with mock.patch.object(CompressedPageStore, "compact"):
+            self._apply("first", 0)
+
+        pages = self.journal._entries[0][1].pages
+        self.assertEqual(os.fstat(pages._file.fileno()).st_size, self.journal.nbytes)
+        self.assertGreater(self.journal.nbytes, sum(page.length for page in pages._pages.values()))
+
+    def test_disabled(self):
+        journal = UndoJournal(disk_budget_mb=0)
+        self._apply("first", 0, journal)
+
+        self.assertFalse(journal.enabled)
+        self.assertEqual(0, len(journal))
+
+    def test_disabled_by_default(self):
+        self.assertFalse(UndoJournal().enabled)
+
+    def test_default_budget_changed(self):
+        journal = UndoJournal()
+        try:
+            undo_journal.set_undo_disk_budget(100)
+            self.assertTrue(journal.enabled)
+        finally:
+            undo_journal.set_undo_disk_budget(0)
+        self.assertFalse(journal.enabled)
+
+    def test_fits(self):
+        # the stack is 1600 bytes uncompressed
+        self.assertTrue(UndoJournal(disk_budget_mb=0.002).fits(self.images))
+        self.assertFalse(UndoJournal(disk_budget_mb=0.001).fits(self.images))
+        self.assertFalse(UndoJournal(disk_budget_mb=0).fits(self.images))
+
+    def test_does_not_fit_scratch_directory(self):
+        with mock.patch.object(pu, "enough_memory", return_value=False):
+            self.assertFalse(UndoJournal(disk_budget_mb=100).fits(self.images))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Undo of the operations applied to a stack, from compressed snapshots of the images each operation changed.
+"""
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.data.images import Images
+from mantidimaging.core.data.snapshot import ImagesSnapshot
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+from . import const
+
+LOG = getLogger(__name__)
+
+# Disk space used by the snapshots of each stack, 0 disables undo. Undo is opt-in, as while it is enabled
+# every operation takes a snapshot of the stacks it is applied to
+UNDO_DISK_BUDGET_MB: float = 0
+
+EntryKey = Tuple[int, Optional[str], str]
+
+
+def _entry_key(index: int, entry: Dict[str, Any]) -> EntryKey:
+    return index, entry.get(const.TIMESTAMP), entry[const.OPERATION_NAME]
+
+
+def _history(images: Images) -> List[Dict[str, Any]]:
+    return images.metadata.get(const.OPERATION_HISTORY, [])
+
+
+def set_undo_disk_budget(budget_mb: float):
+    """
+    Sets the disk budget of the journals that weren't given one, 0 disables undo
+    """
+    global UNDO_DISK_BUDGET_MB
+    UNDO_DISK_BUDGET_MB = budget_mb
+
+
+class UndoJournal:
+    """
+    The snapshots taken before the operations applied to a stack, keyed by the entry each
+    operation added to the operation history of the stack.
+
+    Reverting an operation writes the images it changed back into the stack, so only works
+    while the history of the stack still ends with the operations that were recorded.
+    When the snapshots take more than the disk budget, the oldest ones are removed and
+    their operations, and any before them, can no longer be reverted.
+
+    :param disk_budget_mb: The disk space the snapshots can take, UNDO_DISK_BUDGET_MB if None
+    """
+    def __init__(self, disk_budget_mb: Optional[float] = None):
+        self._disk_budget_mb = disk_budget_mb
+        # oldest first
+        self._entries: List[Tuple[EntryKey, ImagesSnapshot]] = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def disk_budget_mb(self) -> float:
+        return UNDO_DISK_BUDGET_MB if self._disk_budget_mb is None else self._disk_budget_mb
+
+    @property
+    def enabled(self) -> bool:
+        return self.disk_budget_mb > 0
+
+    def fits(self, images: Images) -> bool:
+        """
+        Whether a snapshot of the stack should be taken before an operation, decided without reading its data.
+        The uncompressed size of the stack is the estimate, so stacks that can't fit the budget, or the free space
+        of the scratch directory, are not snapshotted.
+        """
+        shape = (images.num_images, images.height, images.width)
+        nbytes = int(np.prod(shape)) * np.dtype(images.dtype).itemsize
+        return self.enabled and nbytes <= self.disk_budget_mb * 1024 * 1024 \
+            and pu.enough_memory(shape, images.dtype, pu.StorageMode.FILE)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(snapshot.pages.nbytes for _, snapshot in self._entries)
+
+    def record(self, snapshot: ImagesSnapshot, images: Images):
+        """
+        Keeps the snapshot taken before the last operation in the history of the stack.
+        The journal takes ownership of the snapshot, and closes it when it isn't kept.
+        """
+        history = _history(images)
+        if not self.enabled or len(history) != len(snapshot.metadata.get(const.OPERATION_HISTORY, [])) + 1:
+            # the operation didn't add one entry to the history, so it can't be matched when reverting
+            snapshot.close()
+            return
+
+        self._entries.append((_entry_key(len(history) - 1, history[-1]), snapshot))
+        budget = self.disk_budget_mb * 1024 * 1024
+        while self._entries and self.nbytes > budget:
+            key, oldest = self._entries.pop(0)
+            LOG.info(f"Undo history over {self.disk_budget_mb}MB, removing the snapshot of {key}")
+            oldest.close()
+
+    def revertible(self, images: Images) -> int:
+        """
+        :return: How many of the last operations in the history of the stack can be reverted
+        """
+        history = _history(images)
+        count = 0
+        for key, _ in reversed(self._entries):
+            index = len(history) - 1 - count
+            if index < 0 or key != _entry_key(index, history[index]):
+                break
+            count += 1
+        return count
+
+    def revert(self, images: Images, count: int = 1, progress: Optional[Progress] = None) -> Images:
+        """
+        Reverts the last count operations, newest first, in place.
+
+        :return: The reverted stack, which is the same images object
+        """
+        if count > self.revertible(images):
+            raise ValueError(f"Only the last {self.revertible(images)} operations can be reverted, not {count}")
+
+        for _ in range(count):
+            key, snapshot = self._entries.pop()
+            LOG.info(f"Reverting operation {key}")
+            snapshot.restore(images, progress=progress)
+            snapshot.close()
+        return images
+
+    def clear(self):
+        for _, snapshot in self._entries:
+            snapshot.close()
+        self._entries.clear()
@@ -2,16 +2,18 @@
 # SPDX - License - Identifier: GPL-3.0-or-later
 
 from functools import partial
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 from enum import Enum, auto
 
 import numpy as np
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.parallel.utility import ExecutionBackend
 
 if TYPE_CHECKING:
     from PyQt5.QtWidgets import QFormLayout, QWidget  # noqa: F401   # pragma: no cover
     from mantidimaging.gui.mvp_base import BaseMainWindowView  # pragma: no cover
+    from mantidimaging.core.operations.pipeline import Stage  # pragma: no cover
 
 
 class FilterGroup(Enum):
@@ -23,6 +25,12 @@ class FilterGroup(Enum):
 class BaseFilter:
     filter_name = "Unnamed Filter"
     link_histograms = False
+    # How the filter runs its per-image kernel in parallel. Filters whose kernel
+    # releases the GIL should use threads, which don't copy data between processes
+    parallel_backend = ExecutionBackend.PROCESS
+    # The compact dtypes (see `data.compact`) the filter can run on without upcasting the stack to float32.
+    # Only filters that give the same result on stored values as on the values they represent, like a crop
+    compact_dtypes: Tuple[str, ...] = ()
     __name__ = "BaseFilter"
     """
     The base class for filter algorithms, which should extend this class.
@@ -81,10 +89,28 @@ class BaseFilter:
     def validate_execute_kwargs(kwargs: Dict[str, Any]) -> bool:
         return True
 
+    @staticmethod
+    def pipeline_stages(**kwargs) -> Optional[List['Stage']]:
+        """
+        Describes the filter as stages that can be fused with other filters by `operations.pipeline`.
+
+        :param kwargs: The arguments that would be passed to filter_func, without the images
+        :return: The stages, or None if the filter can only be applied to the whole stack by filter_func
+        """
+        return None
+
     @staticmethod
     def group_name() -> FilterGroup:
         return FilterGroup.NoGroup
 
+    @classmethod
+    def prepare_dtype(cls, images: Images):
+        """
+        Upcasts compact stacks the filter can't run on to float32, before the filter is applied
+        """
+        if images.is_compact and images.dtype.name not in cls.compact_dtypes:
+            images.to_working_dtype()
+
 
 def raise_not_implemented(function_name):
     raise NotImplementedError(f"Required method '{function_name}' not implemented for filter")
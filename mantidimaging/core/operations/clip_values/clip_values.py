@@ -56,8 +56,10 @@ class ClipValuesFilter(BaseFilter):
             with progress:
                 sample = data.data
                 progress.update(msg="Determining clip min and clip max")
-                clip_min = clip_min if clip_min is not None else sample.min()
-                clip_max = clip_max if clip_max is not None else sample.max()
+                if clip_min is None or clip_max is None:
+                    statistics = data.read_statistics()
+                    clip_min = clip_min if clip_min is not None else statistics.min
+                    clip_max = clip_max if clip_max is not None else statistics.max
 
                 clip_min_new_value = clip_min_new_value if clip_min_new_value is not None else clip_min
 
@@ -69,6 +71,7 @@ class ClipValuesFilter(BaseFilter):
                 # the clipping in place and ends up copying the data
                 sample[sample < clip_min] = clip_min_new_value
                 sample[sample > clip_max] = clip_max_new_value
+                data.invalidate_caches()
 
         return data
 
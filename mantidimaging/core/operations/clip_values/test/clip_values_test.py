@@ -19,6 +19,20 @@ class ClipValuesFilterTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(ClipValuesFilterTest, self).__init__(*args, **kwargs)
 
+    def test_execute_max_only_reads_range_of_data_changed_in_place(self):
+        images = th.generate_images()
+        images.data[:] += 100
+        expected_min = images.data.min()
+
+        result = ClipValuesFilter().filter_func(images,
+                                                clip_min=None,
+                                                clip_max=100.8,
+                                                clip_min_new_value=None,
+                                                clip_max_new_value=None)
+
+        npt.assert_approx_equal(result.data.min(), expected_min)
+        npt.assert_approx_equal(result.data.max(), 100.8)
+
     def test_execute_min_only(self):
         images = th.generate_images()
 
@@ -28,6 +28,7 @@ class CropCoordinatesFilter(BaseFilter):
     """
     filter_name = "Crop Coordinates"
     link_histograms = True
+    compact_dtypes = ("uint16", "float16")
 
     @staticmethod
     def filter_func(images: Images,
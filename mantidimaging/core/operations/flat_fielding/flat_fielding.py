@@ -2,7 +2,7 @@
 # SPDX - License - Identifier: GPL-3.0-or-later
 
 from functools import partial
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 from PyQt5.QtWidgets import QComboBox
 
 import numpy as np
@@ -10,7 +10,9 @@ import numpy as np
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter, FilterGroup
+from mantidimaging.core.operations.pipeline import BarrierStage, ImageStage, Stage
 from mantidimaging.core.parallel import utility as pu, shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.utility.qt_helpers import Type
 from mantidimaging.gui.widgets.stack_selector import StackSelectorWidgetView
@@ -55,6 +57,7 @@ class FlatFieldFilter(BaseFilter):
     or this will introduce additional noise in the sample.
     """
     filter_name = 'Flat-fielding'
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(images: Images,
@@ -81,39 +84,35 @@ class FlatFieldFilter(BaseFilter):
         """
         h.check_data_stack(images)
 
-        if selected_flat_fielding is not None:
-            if selected_flat_fielding == "Both, concatenated" and flat_after is not None and flat_before is not None \
-                    and dark_after is not None and dark_before is not None:
-                flat_avg = (flat_before.data.mean(axis=0) + flat_after.data.mean(axis=0)) / 2.0
-                dark_avg = (dark_before.data.mean(axis=0) + dark_after.data.mean(axis=0)) / 2.0
-            elif selected_flat_fielding == "Only Before" and flat_before is not None and dark_before is not None:
-                flat_avg = flat_before.data.mean(axis=0)
-                dark_avg = dark_before.data.mean(axis=0)
-            elif selected_flat_fielding == "Only After" and flat_after is not None and dark_after is not None:
-                flat_avg = flat_after.data.mean(axis=0)
-                dark_avg = dark_after.data.mean(axis=0)
-            else:
-                flat_avg = None
-                dark_avg = None
-
-            if flat_avg is not None and dark_avg is not None:
-                if 2 != flat_avg.ndim or 2 != dark_avg.ndim:
-                    raise ValueError(
-                        f"Incorrect shape of the flat image ({flat_avg.shape}) or dark image ({dark_avg.shape}) \
-                        which should match the shape of the sample images ({images.data.shape})")
-
-                if not images.data.shape[1:] == flat_avg.shape == dark_avg.shape:
-                    raise ValueError(f"Not all images are the expected shape: {images.data.shape[1:]}, instead "
-                                     f"flat had shape: {flat_avg.shape}, and dark had shape: {dark_avg.shape}")
+        selected = _select_flats_and_darks(flat_before, flat_after, dark_before, dark_after, selected_flat_fielding)
+        if selected is not None:
+            flat_avg, dark_avg = _average(selected[0]), _average(selected[1])
+            _check_flat_and_dark(images, flat_avg, dark_avg)
 
-                progress = Progress.ensure_instance(progress,
-                                                    num_steps=images.data.shape[0],
-                                                    task_name='Background Correction')
-                _execute(images.data, flat_avg, dark_avg, cores, chunksize, progress)
+            progress = Progress.ensure_instance(progress,
+                                                num_steps=images.data.shape[0],
+                                                task_name='Background Correction')
+            _execute(images.data, flat_avg, dark_avg, cores, chunksize, progress)
 
         h.check_data_stack(images)
         return images
 
+    @staticmethod
+    def pipeline_stages(flat_before: Optional[Images] = None,
+                        flat_after: Optional[Images] = None,
+                        dark_before: Optional[Images] = None,
+                        dark_after: Optional[Images] = None,
+                        selected_flat_fielding: Optional[str] = None,
+                        **kwargs) -> List[Stage]:
+        selected = _select_flats_and_darks(flat_before, flat_after, dark_before, dark_after, selected_flat_fielding)
+        if selected is None:
+            return []
+        return [
+            BarrierStage(partial(_prepare_flat_and_dark, selected[0], selected[1]), whole_stack=False),
+            ImageStage(_subtract, inputs=("dark", )),
+            ImageStage(_divide, inputs=("norm_divide", ))
+        ]
+
     @staticmethod
     def register_gui(form, on_change, view: FiltersWindowView) -> Dict[str, Any]:
         from mantidimaging.gui.utility import add_property_to_form
@@ -235,6 +234,60 @@ class FlatFieldFilter(BaseFilter):
         return FilterGroup.Basic
 
 
+def _select_flats_and_darks(flat_before: Optional[Images], flat_after: Optional[Images], dark_before: Optional[Images],
+                            dark_after: Optional[Images],
+                            selected_flat_fielding: Optional[str]) -> Optional[Tuple[List[Images], List[Images]]]:
+    """
+    :return: The flat and dark stacks to average for the selected method,
+             or None if the stacks it needs were not provided
+    """
+    if selected_flat_fielding == "Both, concatenated" and flat_after is not None and flat_before is not None \
+            and dark_after is not None and dark_before is not None:
+        return [flat_before, flat_after], [dark_before, dark_after]
+    elif selected_flat_fielding == "Only Before" and flat_before is not None and dark_before is not None:
+        return [flat_before], [dark_before]
+    elif selected_flat_fielding == "Only After" and flat_after is not None and dark_after is not None:
+        return [flat_after], [dark_after]
+    return None
+
+
+def _average(stacks: List[Images]) -> np.ndarray:
+    return sum(stack.data.mean(axis=0) for stack in stacks) / len(stacks)
+
+
+def _check_flat_and_dark(images: Images, flat_avg: np.ndarray, dark_avg: np.ndarray):
+    if 2 != flat_avg.ndim or 2 != dark_avg.ndim:
+        raise ValueError(f"Incorrect shape of the flat image ({flat_avg.shape}) or dark image ({dark_avg.shape}) \
+                        which should match the shape of the sample images ({images.data.shape})")
+
+    if not images.data.shape[1:] == flat_avg.shape == dark_avg.shape:
+        raise ValueError(f"Not all images are the expected shape: {images.data.shape[1:]}, instead "
+                         f"flat had shape: {flat_avg.shape}, and dark had shape: {dark_avg.shape}")
+
+
+def _calculate_norm_divide(flat: np.ndarray, dark: np.ndarray, dtype) -> np.ndarray:
+    norm_divide = pu.create_array(flat.shape, dtype)
+
+    # subtract dark from flat and copy into shared array with [:]
+    norm_divide[:] = np.subtract(flat, dark)
+
+    # prevent divide-by-zero issues, and negative pixels make no sense
+    norm_divide[norm_divide == 0] = MINIMUM_PIXEL_VALUE
+    return norm_divide
+
+
+def _prepare_flat_and_dark(flats: List[Images], darks: List[Images], images: Images, context: Dict[str, np.ndarray]):
+    """
+    Pipeline barrier averaging the flats and darks, for the subtract and divide stages.
+    """
+    flat_avg, dark_avg = _average(flats), _average(darks)
+    _check_flat_and_dark(images, flat_avg, dark_avg)
+
+    context["dark"] = pu.create_array(dark_avg.shape, images.dtype)
+    context["dark"][:] = dark_avg
+    context["norm_divide"] = _calculate_norm_divide(flat_avg, dark_avg, images.dtype)
+
+
 def _divide(data, norm_divide):
     np.true_divide(data, norm_divide, out=data)
 
@@ -264,22 +317,26 @@ def _execute(data: np.ndarray, flat=None, dark=None, cores=None, chunksize=None,
     with progress:
         progress.update(msg="Applying background correction")
 
-        norm_divide = pu.create_array((data.shape[1], data.shape[2]), data.dtype)
-
-        # subtract dark from flat and copy into shared array with [:]
-        norm_divide[:] = np.subtract(flat, dark)
-
-        # prevent divide-by-zero issues, and negative pixels make no sense
-        norm_divide[norm_divide == 0] = MINIMUM_PIXEL_VALUE
+        norm_divide = _calculate_norm_divide(flat, dark, data.dtype)
 
         # subtract the dark from all images
         do_subtract = ps.create_partial(_subtract, fwd_function=ps.inplace_second_2d)
-        ps.shared_list = [data, dark]
-        ps.execute(do_subtract, data.shape[0], progress, cores=cores)
+        ps.execute(do_subtract,
+                   data.shape[0],
+                   progress,
+                   cores=cores,
+                   chunksize=chunksize,
+                   arrays=[data, dark],
+                   backend=FlatFieldFilter.parallel_backend)
 
         # divide the data by (flat - dark)
         do_divide = ps.create_partial(_divide, fwd_function=ps.inplace_second_2d)
-        ps.shared_list = [data, norm_divide]
-        ps.execute(do_divide, data.shape[0], progress, cores=cores)
+        ps.execute(do_divide,
+                   data.shape[0],
+                   progress,
+                   cores=cores,
+                   chunksize=chunksize,
+                   arrays=[data, norm_divide],
+                   backend=FlatFieldFilter.parallel_backend)
 
     return data
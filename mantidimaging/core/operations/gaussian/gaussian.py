@@ -10,7 +10,9 @@ import scipy.ndimage as scipy_ndimage
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.pipeline import ImageStage
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.utility import add_property_to_form
 from mantidimaging.gui.utility.qt_helpers import Type
@@ -25,6 +27,7 @@ class GaussianFilter(BaseFilter):
     """
     filter_name = "Gaussian"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(data: Images, size=None, mode=None, order=None, cores=None, chunksize=None, progress=None):
@@ -54,6 +57,14 @@ class GaussianFilter(BaseFilter):
         h.check_data_stack(data)
         return data
 
+    @staticmethod
+    def pipeline_stages(size=None, mode=None, order=None):
+        if size and size > 1:
+            return [
+                ImageStage(scipy_ndimage.gaussian_filter, dict(sigma=size, mode=mode, order=order), scratch_output=True)
+            ]
+        return []
+
     @staticmethod
     def register_gui(form, on_change, view):
         _, size_field = add_property_to_form('Kernel Size',
@@ -95,14 +106,19 @@ def _execute(data: np.ndarray, size, mode, order, cores=None, progress=None):
     log = getLogger(__name__)
     progress = Progress.ensure_instance(progress, task_name='Gaussian filter')
 
-    f = ps.create_partial(scipy_ndimage.gaussian_filter, ps.return_to_self, sigma=size, mode=mode, order=order)
+    f = ps.create_partial(scipy_ndimage.gaussian_filter, ps.scratch_to_self, sigma=size, mode=mode, order=order)
 
     log.info("Starting PARALLEL gaussian filter, with pixel data type: {0}, "
              "filter size/width: {1}.".format(data.dtype, size))
 
     progress.update()
-    ps.shared_list = [data]
-    ps.execute(f, data.shape[0], progress, msg="Gaussian filter", cores=cores)
+    ps.execute(f,
+               data.shape[0],
+               progress,
+               msg="Gaussian filter",
+               cores=cores,
+               arrays=[data],
+               backend=GaussianFilter.parallel_backend)
 
     progress.mark_complete()
     log.info("Finished  gaussian filter, with pixel data type: {0}, "
@@ -11,7 +11,9 @@ from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.gpu import utility as gpu
 from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.pipeline import ImageStage
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.utility import add_property_to_form
 from mantidimaging.gui.utility.qt_helpers import Type
@@ -29,6 +31,9 @@ class MedianFilter(BaseFilter):
     """
     filter_name = "Median"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
+    # the median of a scaled stack is the scaled median
+    compact_dtypes = ("uint16", )
 
     @staticmethod
     def filter_func(data: Images, size=None, mode="reflect", cores=None, chunksize=None, progress=None, force_cpu=True):
@@ -51,6 +56,8 @@ class MedianFilter(BaseFilter):
 
         if size and size > 1:
             if not force_cpu:
+                # the GPU kernel is only built for floats
+                data.to_working_dtype(cores)
                 data = _execute_gpu(data.data, size, mode, progress)
             else:
                 _execute(data.data, size, mode, cores, chunksize, progress)
@@ -58,6 +65,14 @@ class MedianFilter(BaseFilter):
         h.check_data_stack(data)
         return data
 
+    @staticmethod
+    def pipeline_stages(size=None, mode="reflect", force_cpu=True):
+        if not force_cpu:
+            return None
+        if size and size > 1:
+            return [ImageStage(scipy_ndimage.median_filter, dict(size=size, mode=mode), scratch_output=True)]
+        return []
+
     @staticmethod
     def register_gui(form: 'QFormLayout', on_change: Callable, view) -> Dict[str, Any]:
         _, size_field = add_property_to_form('Kernel Size',
@@ -100,14 +115,20 @@ def _execute(data, size, mode, cores=None, chunksize=None, progress=None):
     progress = Progress.ensure_instance(progress, task_name='Median filter')
 
     # create the partial function to forward the parameters
-    f = ps.create_partial(scipy_ndimage.median_filter, ps.return_to_self, size=size, mode=mode)
+    f = ps.create_partial(scipy_ndimage.median_filter, ps.scratch_to_self, size=size, mode=mode)
 
     with progress:
         log.info("PARALLEL median filter, with pixel data type: {0}, filter "
                  "size/width: {1}.".format(data.dtype, size))
 
-        ps.shared_list = [data]
-        ps.execute(f, data.shape[0], progress, msg="Median filter", cores=cores)
+        ps.execute(f,
+                   data.shape[0],
+                   progress,
+                   msg="Median filter",
+                   cores=cores,
+                   chunksize=chunksize,
+                   arrays=[data],
+                   backend=MedianFilter.parallel_backend)
 
     return data
 
@@ -8,7 +8,9 @@ from PyQt5.QtWidgets import QFormLayout, QWidget
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.pipeline import BarrierStage, ImageStage
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.gui.mvp_base import BaseMainWindowView
 
 
@@ -16,6 +18,23 @@ def _divide_by_counts(data=None, counts=None):
     data[:] = np.true_divide(data, counts)
 
 
+def _normalised_counts(images: Images) -> np.ndarray:
+    counts = images.counts()
+
+    if counts is None:
+        raise RuntimeError("No loaded log values for this stack.")
+
+    return counts.value / counts.value[0]
+
+
+def _normalised_counts_stage(images: Images, context: Dict[str, np.ndarray]):
+    if images.num_projections == 1:
+        # same as filter_func, the preview stack doesn't have the logfile in it
+        context["counts"] = np.ones(1)
+    else:
+        context["counts"] = _normalised_counts(images)
+
+
 class MonitorNormalisation(BaseFilter):
     """Normalises the values of the data by the monitor counts read from the Sample log file.
 
@@ -25,6 +44,7 @@ class MonitorNormalisation(BaseFilter):
     """
     filter_name = "Monitor Normalisation"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(images: Images, cores=None, chunksize=None, progress=None) -> Images:
@@ -32,17 +52,23 @@ class MonitorNormalisation(BaseFilter):
             # we can't really compute the preview as the image stack copy
             # passed in doesn't have the logfile in it
             return images
-        counts = images.counts()
-
-        if counts is None:
-            raise RuntimeError("No loaded log values for this stack.")
-
-        counts_val = counts.value / counts.value[0]
+        counts_val = _normalised_counts(images)
         do_division = ps.create_partial(_divide_by_counts, fwd_function=ps.inplace2)
-        ps.shared_list = [images.data, counts_val]
-        ps.execute(do_division, images.num_projections, progress, cores=cores)
+        ps.execute(do_division,
+                   images.num_projections,
+                   progress,
+                   cores=cores,
+                   arrays=[images.data, counts_val],
+                   backend=MonitorNormalisation.parallel_backend)
         return images
 
+    @staticmethod
+    def pipeline_stages():
+        return [
+            BarrierStage(_normalised_counts_stage),
+            ImageStage(_divide_by_counts, per_image_inputs=("counts", )),
+        ]
+
     @staticmethod
     def register_gui(form: 'QFormLayout', on_change: Callable, view: 'BaseMainWindowView') -> Dict[str, 'QWidget']:
         return {}
@@ -0,0 +1,155 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Applies a sequence of operations to a stack that doesn't fit in memory.
+
+The stack is processed one slab of projections (or of sinograms) at a time: the slab is
+read from the image files, the operations are run on it with `pipeline.execute_plan`,
+and the result is written to a .npy file, which can be opened with `numpy.load(mmap_mode='r')`.
+The size of the slabs is chosen with `shape_splitter`, so that the memory used stays
+within the budget regardless of the size of the stack.
+
+Only operations that give the same result when applied to part of the stack can be used,
+which are those whose stages don't need the whole stack at once (see `BarrierStage.whole_stack`).
+"""
+from logging import getLogger
+from typing import BinaryIO, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.io.loader.loader import get_loader_func
+from mantidimaging.core.io.utility import DEFAULT_IO_FILE_FORMAT
+from mantidimaging.core.operations.pipeline import BarrierStage, Plan, build_plan, execute_plan
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.parallel.utility import ExecutionBackend
+from mantidimaging.core.utility import shape_splitter
+from mantidimaging.core.utility.memory_usage import system_free_memory
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+# Slabs are given this fraction of the memory budget, the rest is left for the
+# temporary copies made by the operations and the image being read
+SLAB_MEMORY_FRACTION = 0.5
+
+PROJECTIONS = 0
+SINOGRAMS = 1
+
+
+def slab_bounds(shape: Tuple[int, int, int], axis: int, dtype, memory_budget_mb: float) -> List[Tuple[int, int]]:
+    """
+    :param shape: The shape of the whole stack, as projections
+    :param axis: PROJECTIONS to split the stack in slabs of projections, SINOGRAMS for slabs of sinograms
+    :param memory_budget_mb: The memory available to process a slab
+    :return: The start and stop index of each slab along the axis
+    """
+    split, _ = shape_splitter.execute(shape,
+                                      axis,
+                                      np.dtype(dtype).name,
+                                      memory_budget_mb * SLAB_MEMORY_FRACTION,
+                                      reconstruction=False)
+    return [(int(start), int(stop)) for start, stop in zip(split[:-1], split[1:]) if stop > start]
+
+
+def check_plan(plan: Plan):
+    """
+    :raises ValueError: If an operation of the plan needs the whole stack at once
+    """
+    whole_stack = sorted({index + 1 for index, stage in plan if isinstance(stage, BarrierStage) and stage.whole_stack})
+    if whole_stack:
+        raise ValueError(f"Operations {whole_stack} need the whole stack and can't be applied one slab at a time")
+
+
+def _read_slab(load_func: Callable, file_names: Sequence[str], shape: Tuple[int, int, int], axis: int, dtype,
+               bounds: Tuple[int, int]) -> np.ndarray:
+    start, stop = bounds
+    if axis == PROJECTIONS:
+        slab = pu.create_array((stop - start, ) + shape[1:], dtype)
+        for i, file_name in enumerate(file_names[start:stop]):
+            load_func(file_name, out=slab[i])
+    else:
+        # every projection has to be read, but only the rows of the slab are kept
+        slab = pu.create_array((stop - start, shape[0], shape[2]), dtype)
+        for i, file_name in enumerate(file_names):
+            slab[:, i] = load_func(file_name)[start:stop]
+    return slab
+
+
+def _write_slab(output: BinaryIO, offset: int, shape: Tuple[int, int, int], slab: np.ndarray, axis: int,
+                bounds: Tuple[int, int]):
+    # written with file I/O rather than through a memory map, as the pages of a mapped
+    # output file count towards the resident memory of the process while it is mapped
+    start, _ = bounds
+    row_bytes = shape[2] * slab.dtype.itemsize
+    if axis == PROJECTIONS:
+        output.seek(offset + start * shape[1] * row_bytes)
+        output.write(np.ascontiguousarray(slab).data)
+    else:
+        for i in range(shape[0]):
+            output.seek(offset + (i * shape[1] + start) * row_bytes)
+            output.write(np.ascontiguousarray(slab[:, i]).data)
+
+
+def run_out_of_core(file_names: Sequence[str],
+                    operations: Sequence[Callable],
+                    output_path: str,
+                    in_format: str = DEFAULT_IO_FILE_FORMAT,
+                    axis: int = PROJECTIONS,
+                    dtype=np.float32,
+                    memory_budget_mb: Optional[float] = None,
+                    cores=None,
+                    progress=None,
+                    backend: ExecutionBackend = ExecutionBackend.THREAD) -> List[Tuple[int, int]]:
+    """
+    Applies the operations to the stack of image files, one slab at a time,
+    and writes the result to a .npy file with the same shape as the stack.
+
+    :param file_names: The image files of the stack, one projection per file
+    :param operations: Partials of filter_func, as made by `ops_to_partials`
+    :param output_path: The .npy file to write, it is overwritten if it exists
+    :param in_format: The format of the image files
+    :param axis: PROJECTIONS to process slabs of projections, SINOGRAMS to process slabs of sinograms.
+                 With SINOGRAMS each image given to the operations is a sinogram, and all the files
+                 are read for every slab.
+    :param dtype: The dtype the images are processed and stored in
+    :param memory_budget_mb: The memory available for processing, by default the free memory
+    :param backend: How the operations are executed on each slab, see `ps.execute`
+    :return: The bounds of the slabs that were processed
+    """
+    if axis not in (PROJECTIONS, SINOGRAMS):
+        raise ValueError(f"Slabs can only be taken along the projections or the sinograms, not axis {axis}")
+    if not file_names:
+        raise RuntimeError("No filenames were provided.")
+
+    plan = build_plan(operations)
+    check_plan(plan)
+
+    load_func = get_loader_func(in_format)
+    first_image = load_func(file_names[0])
+    if first_image.ndim != 2:
+        raise ValueError(f"Each file must contain a single image, the first had shape {first_image.shape}")
+    shape = (len(file_names), ) + first_image.shape
+    del first_image
+
+    if memory_budget_mb is None:
+        memory_budget_mb = system_free_memory().mb()
+    slabs = slab_bounds(shape, axis, dtype, memory_budget_mb)
+    LOG.info(f"Processing stack of shape {shape} in {len(slabs)} slabs along axis {axis}, "
+             f"with a memory budget of {memory_budget_mb:.0f} MB")
+
+    output_map = np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=shape)
+    offset = output_map.offset
+    del output_map
+
+    progress = Progress.ensure_instance(progress, num_steps=len(slabs), task_name='Out of core')
+    with progress, open(output_path, 'r+b') as output:
+        for bounds in slabs:
+            images = Images(_read_slab(load_func, file_names, shape, axis, dtype, bounds), sinograms=axis == SINOGRAMS)
+            images = execute_plan(images, plan, cores=cores, backend=backend)
+            _write_slab(output, offset, shape, images.data.astype(dtype, copy=False), axis, bounds)
+            pu.free_shared_array(images.data)
+            del images
+            progress.update(msg=f"Slab {bounds[0]}-{bounds[1]}")
+
+    return slabs
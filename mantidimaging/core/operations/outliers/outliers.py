@@ -8,7 +8,9 @@ import scipy.ndimage as scipy_ndimage
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter, FilterGroup
+from mantidimaging.core.operations.pipeline import ImageStage
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.utility import add_property_to_form
 from mantidimaging.gui.utility.qt_helpers import Type
@@ -33,15 +35,23 @@ class OutliersFilter(BaseFilter):
     """
     filter_name = "Remove Outliers"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
-    def _execute(data, diff, radius, mode):
-        # Adapted from tomopy source
-        median = scipy_ndimage.median_filter(data, radius)
+    def _execute(data, diff, radius, mode, output=None):
+        # Adapted from tomopy source, computes np.where(data - median > diff, median, data) for bright
+        # outliers, using the scratch buffers of the worker instead of allocating the intermediate arrays
+        if output is None:
+            output = np.empty_like(data)
+        median = scipy_ndimage.median_filter(data, radius, output=ps.scratch_buffer(data.shape, data.dtype, "median"))
         if mode == OUTLIERS_BRIGHT:
-            return np.where((data - median) > diff, median, data)
+            np.subtract(data, median, out=output)
         else:
-            return np.where((median - data) > diff, median, data)
+            np.subtract(median, data, out=output)
+        outliers = np.greater(output, diff, out=ps.scratch_buffer(data.shape, bool, "outliers"))
+        np.copyto(output, data)
+        np.copyto(output, median, where=outliers)
+        return output
 
     @staticmethod
     def filter_func(images: Images,
@@ -61,14 +71,21 @@ class OutliersFilter(BaseFilter):
         :return: The processed 3D numpy.ndarray
         """
         if diff and radius and diff > 0 and radius > 0:
-            func = ps.create_partial(OutliersFilter._execute, ps.return_to_self, diff=diff, radius=radius, mode=mode)
-            ps.shared_list = [images.data]
+            func = ps.create_partial(OutliersFilter._execute, ps.scratch_to_self, diff=diff, radius=radius, mode=mode)
             ps.execute(func,
                        images.num_projections,
                        progress=progress,
-                       msg=f"Outliers with threshold {diff} and kernel {radius}")
+                       msg=f"Outliers with threshold {diff} and kernel {radius}",
+                       arrays=[images.data],
+                       backend=OutliersFilter.parallel_backend)
         return images
 
+    @staticmethod
+    def pipeline_stages(diff=None, radius=_default_radius, mode=_default_mode):
+        if diff and radius and diff > 0 and radius > 0:
+            return [ImageStage(OutliersFilter._execute, dict(diff=diff, radius=radius, mode=mode), scratch_output=True)]
+        return []
+
     @staticmethod
     def register_gui(form, on_change, view):
         _, diff_field = add_property_to_form('Difference',
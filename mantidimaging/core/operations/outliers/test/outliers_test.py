@@ -5,12 +5,13 @@ import unittest
 from unittest import mock
 
 import numpy as np
+import scipy.ndimage as scipy_ndimage
 from PyQt5.QtWidgets import QSpinBox, QComboBox, QDoubleSpinBox
 from mantidimaging.test_helpers import start_qapplication
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.outliers import OutliersFilter
-from mantidimaging.core.operations.outliers.outliers import OUTLIERS_BRIGHT
+from mantidimaging.core.operations.outliers.outliers import OUTLIERS_BRIGHT, OUTLIERS_DARK
 
 
 @start_qapplication
@@ -34,6 +35,21 @@ class OutliersTest(unittest.TestCase):
 
         th.assert_not_equals(result.data, sample)
 
+    def test_same_as_where(self):
+        images = th.generate_images()
+        images.data[0, 3, 4] = np.nan
+        for mode in [OUTLIERS_BRIGHT, OUTLIERS_DARK]:
+            sample = np.copy(images.data)
+            median = scipy_ndimage.median_filter(sample, (1, 3, 3))
+            if mode == OUTLIERS_BRIGHT:
+                expected = np.where((sample - median) > 0.1, median, sample)
+            else:
+                expected = np.where((median - sample) > 0.1, median, sample)
+
+            result = OutliersFilter.filter_func(images.copy(), 0.1, 3, mode, cores=1)
+
+            np.testing.assert_equal(result.data, expected)
+
     def test_execute_wrapper_return_is_runnable(self):
         """
         Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
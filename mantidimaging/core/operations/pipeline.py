@@ -0,0 +1,239 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Applies a sequence of operations to a stack in as few passes over the data as possible.
+
+Applying each filter on its own streams the whole stack through memory once per
+filter. Filters that work on one image at a time describe themselves as stages
+(see `BaseFilter.pipeline_stages`), and consecutive per-image stages of different
+filters are fused into a single pass, so every image goes through all of them
+while it is still in cache, with one dispatch per chunk of images.
+
+Stack-wide computations, such as averaging the flats or the air region means, are
+`BarrierStage` s: the pass before them is completed first, and they run once on the
+whole stack. Operations that can't be fused are applied as barriers on their own.
+"""
+import inspect
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import partial
+from logging import getLogger
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.data.memory_manager import memory_manager
+from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.parallel import shared as ps, utility as pu
+from mantidimaging.core.parallel.utility import ExecutionBackend
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+# Arguments of filter_func that are provided by the pipeline rather than the operation
+EXECUTION_KWARGS = ('cores', 'chunksize', 'progress')
+
+
+class ImageStage(NamedTuple):
+    """
+    Applies func(image, *inputs, *per_image_inputs, **kwargs) to every image, in place.
+    If func returns an array it is copied back into the image.
+
+    :param scratch_output: Pass a scratch buffer of the worker to func as `output`, and copy it back into the image
+    :param inputs: Names of the context arrays passed whole, e.g. the averaged flat
+    :param per_image_inputs: Names of the context arrays passed indexed by the image index, e.g. the air means
+    """
+    func: Callable
+    kwargs: Dict[str, Any] = {}
+    inputs: Tuple[str, ...] = ()
+    per_image_inputs: Tuple[str, ...] = ()
+    scratch_output: bool = False
+
+
+class ReduceStage(NamedTuple):
+    """
+    Stores func(image, **kwargs) of every image in the context array `output`, without changing the image.
+
+    :param dtype: The dtype of the output array, the dtype of the stack if None
+    """
+    func: Callable
+    output: str
+    kwargs: Dict[str, Any] = {}
+    dtype: Optional[str] = None
+
+
+class BarrierStage(NamedTuple):
+    """
+    Calls func(images, context) once, after every image went through the stages before it.
+
+    The context holds the arrays of the same operation by name, arrays added to it must be
+    created with `pu.create_array` to be visible to worker processes.
+    If func returns an Images object it replaces the stack for the following stages.
+
+    :param whole_stack: Whether func needs every image of the stack, rather than only
+                        values that don't depend on the images, such as the averaged flat.
+                        Stages that don't can be run on a part of the stack at a time.
+    """
+    func: Callable[[Images, Dict[str, np.ndarray]], Optional[Images]]
+    whole_stack: bool = True
+
+
+Stage = Union[ImageStage, ReduceStage, BarrierStage]
+# The stages of all operations, with the index of the operation they came from
+Plan = List[Tuple[int, Stage]]
+
+
+def _filter_class_of(func: Callable) -> Optional[Type[BaseFilter]]:
+    owner = getattr(inspect.getmodule(func), func.__qualname__.rsplit('.', 1)[0], None)
+    if isinstance(owner, type) and issubclass(owner, BaseFilter):
+        return owner
+    return None
+
+
+def _apply_operation(operation: Callable, images: Images, _: Dict[str, np.ndarray]) -> Optional[Images]:
+    result = operation(images)
+    return result if isinstance(result, Images) else None
+
+
+def operation_stages(operation: Callable) -> List[Stage]:
+    """
+    :param operation: A partial of a filter's filter_func, as made by `ops_to_partials`
+    :return: The stages of the operation, or a single barrier applying it if it can't be fused
+    """
+    if isinstance(operation, partial) and not operation.args:
+        filter_class = _filter_class_of(operation.func)
+        if filter_class is not None:
+            kwargs = {k: v for k, v in operation.keywords.items() if k not in EXECUTION_KWARGS}
+            stages = filter_class.pipeline_stages(**kwargs)
+            if stages is not None:
+                return stages
+    return [BarrierStage(partial(_apply_operation, operation))]
+
+
+def build_plan(operations: Iterable[Callable]) -> Plan:
+    return [(index, stage) for index, operation in enumerate(operations) for stage in operation_stages(operation)]
+
+
+def _apply_fused_stages(stages: Tuple[Tuple[int, Stage], ...], handles, i, keys: Tuple[Tuple[int, str], ...]):
+    """
+    Forwarding function for `ps.execute`, runs every stage of the pass on image i.
+    The first handle is the stack, the others are the context arrays named by keys.
+    """
+    image = ps.get_array(handles[0])[i]
+    context = {key: ps.get_array(handle) for key, handle in zip(keys, handles[1:])}
+    for index, stage in stages:
+        if isinstance(stage, ReduceStage):
+            context[(index, stage.output)][i] = stage.func(image, **stage.kwargs)
+        elif isinstance(stage, ImageStage):
+            args = [context[(index, name)] for name in stage.inputs]
+            args += [context[(index, name)][i] for name in stage.per_image_inputs]
+            if stage.scratch_output:
+                output = ps.scratch_buffer(image.shape, image.dtype)
+                stage.func(image, *args, output=output, **stage.kwargs)
+                image[:] = output
+            else:
+                result = stage.func(image, *args, **stage.kwargs)
+                if result is not None:
+                    image[:] = result
+
+
+def _context_keys(stages: List[Tuple[int, Stage]]) -> List[Tuple[int, str]]:
+    keys: List[Tuple[int, str]] = []
+    for index, stage in stages:
+        if isinstance(stage, ReduceStage):
+            names: Tuple[str, ...] = (stage.output, )
+        else:
+            names = stage.inputs + stage.per_image_inputs  # type: ignore
+        for name in names:
+            if (index, name) not in keys:
+                keys.append((index, name))
+    return keys
+
+
+def _run_pass(images: Images, stages: List[Tuple[int, Stage]], contexts: Dict[int, Dict[str, np.ndarray]], cores,
+              chunksize, progress: Progress, backend: ExecutionBackend):
+    for index, stage in stages:
+        if isinstance(stage, ReduceStage):
+            dtype = stage.dtype or images.dtype
+            contexts[index][stage.output] = pu.create_array((images.num_images, ), dtype)  # type: ignore
+
+    keys = _context_keys(stages)
+    LOG.info(f"Running {len(stages)} fused stages on {images.num_images} images")
+    fused = ps.create_partial(tuple(stages), _apply_fused_stages, keys=tuple(keys))
+    ps.execute(fused,
+               images.num_images,
+               progress,
+               msg="Pipeline",
+               cores=cores,
+               chunksize=chunksize,
+               arrays=[images.data] + [contexts[index][name] for index, name in keys],
+               backend=backend)
+
+
+def execute_plan(images: Images,
+                 plan: Plan,
+                 cores=None,
+                 chunksize=None,
+                 progress=None,
+                 backend: ExecutionBackend = ExecutionBackend.THREAD) -> Images:
+    """
+    Runs the stages in order, fusing the per-image stages between barriers into one pass.
+
+    :return: The processed stack, which is a different object if a barrier replaced it
+    """
+    progress = Progress.ensure_instance(progress, task_name='Pipeline')
+    contexts: Dict[int, Dict[str, np.ndarray]] = defaultdict(dict)
+    pending: List[Tuple[int, Stage]] = []
+    changed = [images]
+    try:
+        # the barriers write into the stacks outside of `ps.execute`, so they are kept in memory explicitly
+        with progress, ExitStack() as pinned:
+            pinned.enter_context(memory_manager.in_use(images))
+            for index, stage in plan:
+                if isinstance(stage, BarrierStage):
+                    if pending:
+                        _run_pass(images, pending, contexts, cores, chunksize, progress, backend)
+                        pending = []
+                        # the barrier can read the caches of the stack, which the pass has made out of date
+                        images.invalidate_caches()
+                    result = stage.func(images, contexts[index])
+                    if result is not None:
+                        images = result
+                        changed.append(images)
+                        pinned.enter_context(memory_manager.in_use(images))
+                else:
+                    pending.append((index, stage))
+            if pending:
+                _run_pass(images, pending, contexts, cores, chunksize, progress, backend)
+    finally:
+        # the stages change the data in place, without recording operations
+        for stack in changed:
+            stack.invalidate_caches()
+    return images
+
+
+def run_pipeline(images: Images,
+                 operations: Iterable[Callable],
+                 cores=None,
+                 chunksize=None,
+                 progress=None,
+                 backend: ExecutionBackend = ExecutionBackend.THREAD) -> Images:
+    """
+    Applies the operations to the stack in order, giving the same result as applying them one
+    after the other, in fewer passes over the data.
+
+    :param images: The stack to process, in place
+    :param operations: Partials of filter_func, as made by `ops_to_partials`, or any callable taking the stack
+    :param backend: How the fused passes are executed, see `ps.execute`
+    :return: The processed stack
+    """
+    operations = list(operations)
+    if images.is_compact:
+        filter_classes = [
+            _filter_class_of(operation.func) if isinstance(operation, partial) else None for operation in operations
+        ]
+        if any(filter_class is None or images.dtype.name not in filter_class.compact_dtypes
+               for filter_class in filter_classes):
+            images.to_working_dtype(cores)
+    return execute_plan(images, build_plan(operations), cores, chunksize, progress, backend)
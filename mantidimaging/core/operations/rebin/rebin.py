@@ -8,6 +8,7 @@ from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.gui.utility import add_property_to_form
 from mantidimaging.gui.utility.qt_helpers import Type
@@ -25,6 +26,7 @@ class RebinFilter(BaseFilter):
     """
     filter_name = "Rebin"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(images: Images, rebin_param=0.5, mode=None, cores=None, chunksize=None, progress=None) -> Images:
@@ -56,12 +58,13 @@ class RebinFilter(BaseFilter):
                                   ps.return_to_second_at_i,
                                   mode=mode,
                                   output_shape=empty_resized_data.shape[1:])
-            ps.shared_list = [sample, empty_resized_data]
             ps.execute(partial_func=f,
                        num_operations=sample.shape[0],
                        cores=cores,
                        msg="Applying Rebin",
-                       progress=progress)
+                       progress=progress,
+                       arrays=[sample, empty_resized_data],
+                       backend=RebinFilter.parallel_backend)
             images.data = empty_resized_data
 
         return images
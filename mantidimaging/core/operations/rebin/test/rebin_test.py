@@ -148,13 +148,19 @@ class RebinTest(unittest.TestCase):
         mode = 'reflect'
         cores = 4
         progress_mock = mock.Mock()
+        sample = images.data
         RebinFilter.filter_func(images=images, mode=mode, cores=cores, progress=progress_mock)
 
         ps_mock.execute.assert_called_once_with(partial_func=ps_mock.create_partial.return_value,
-                                                num_operations=images.data.shape[0],
+                                                num_operations=sample.shape[0],
                                                 cores=cores,
                                                 msg="Applying Rebin",
-                                                progress=progress_mock)
+                                                progress=progress_mock,
+                                                arrays=mock.ANY,
+                                                backend=RebinFilter.parallel_backend)
+        arrays = ps_mock.execute.call_args.kwargs["arrays"]
+        self.assertIs(arrays[0], sample)
+        self.assertIs(arrays[1], images.data)
 
 
 if __name__ == '__main__':
@@ -37,8 +37,12 @@ class RemoveDeadStripesFilter(BaseFilter):
             snr=snr,
             size=size,
         )
-        ps.shared_list = [images.data]
-        ps.execute(f, images.num_projections, progress, cores=cores)
+        ps.execute(f,
+                   images.num_projections,
+                   progress,
+                   cores=cores,
+                   arrays=[images.data],
+                   backend=RemoveDeadStripesFilter.parallel_backend)
         return images
 
     @staticmethod
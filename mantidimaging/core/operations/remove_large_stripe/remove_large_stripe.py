@@ -36,8 +36,12 @@ class RemoveLargeStripesFilter(BaseFilter):
             snr=snr,
             size=la_size,
         )
-        ps.shared_list = [images.data]
-        ps.execute(f, images.num_projections, progress, cores=cores)
+        ps.execute(f,
+                   images.num_projections,
+                   progress,
+                   cores=cores,
+                   arrays=[images.data],
+                   backend=RemoveLargeStripesFilter.parallel_backend)
         return images
 
     @staticmethod
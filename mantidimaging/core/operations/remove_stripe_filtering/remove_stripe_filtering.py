@@ -52,8 +52,12 @@ class RemoveStripeFilteringFilter(BaseFilter):
                                   sigma=sigma,
                                   size=size,
                                   dim=window_dim)
-        ps.shared_list = [images.data]
-        ps.execute(f, images.num_projections, progress, cores=cores)
+        ps.execute(f,
+                   images.num_projections,
+                   progress,
+                   cores=cores,
+                   arrays=[images.data],
+                   backend=RemoveStripeFilteringFilter.parallel_backend)
         return images
 
     @staticmethod
@@ -37,8 +37,12 @@ class RemoveStripeSortingFittingFilter(BaseFilter):
                               sigmax=sigmax,
                               sigmay=sigmay)
 
-        ps.shared_list = [images.data]
-        ps.execute(f, images.num_projections, progress, cores=cores)
+        ps.execute(f,
+                   images.num_projections,
+                   progress,
+                   cores=cores,
+                   arrays=[images.data],
+                   backend=RemoveStripeSortingFittingFilter.parallel_backend)
         return images
 
     @staticmethod
@@ -5,7 +5,7 @@ from functools import partial
 from typing import Any, Dict
 
 import numpy as np
-from numpy import float32, nanmax, nanmin, ndarray, uint16
+from numpy import float32, nanmax, ndarray, uint16
 from PyQt5.QtWidgets import QComboBox, QDoubleSpinBox
 
 from mantidimaging.core.data import Images
@@ -32,12 +32,17 @@ class RescaleFilter(BaseFilter):
                     max_output: float = 256.0,
                     progress=None,
                     data_type=None) -> Images:
+        # the range after clipping is the clipped range of the data, so it doesn't have to be read again
+        statistics = images.read_statistics()
+        value_type = images.dtype.type
         np.clip(images.data, min_input, max_input, out=images.data)
         # offset - it removes any negative values so that they don't overflow when in uint16 range
-        images.data -= nanmin(images.data)
-        data_max = nanmax(images.data)
+        offset = value_type(np.clip(statistics.min, min_input, max_input))
+        images.data -= offset
+        data_max = value_type(np.clip(statistics.max, min_input, max_input)) - offset
         # slope
         images.data *= (max_output / data_max)
+        images.invalidate_caches()
 
         if data_type is not None:
             if data_type == uint16 and not images.dtype == uint16:
@@ -133,6 +133,29 @@ def test_rescale_ignores_nans(value):
     assert all([math.isnan(x) for x in images.data[6][0:10].flatten()])
 
 
+def test_rescale_uses_range_of_clipped_data():
+    images = th.generate_images((10, 100, 100))
+    images.data[0:5] = 0.5
+    images.data[5:10] = 1.0
+
+    images = RescaleFilter.filter_func(images, min_input=0.0, max_input=0.75, max_output=100.0)
+
+    npt.assert_equal(images.data[0:5], 0)
+    npt.assert_equal(images.data[5:10], 100)
+    assert images.read_statistics().min == 0
+    assert images.read_statistics().max == 100
+
+
+def test_rescale_reads_range_of_data_changed_in_place():
+    images = th.generate_images((10, 20, 20))
+    images.data[:] += 100
+
+    images = RescaleFilter.filter_func(images, min_input=0.0, max_input=1000.0, max_output=1.0)
+
+    assert np.nanmin(images.data) == 0
+    npt.assert_approx_equal(np.nanmax(images.data), 1.0)
+
+
 if __name__ == "__main__":
     import pytest
 
@@ -3,14 +3,16 @@
 
 from functools import partial
 from logging import getLogger
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import numpy as np
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter, FilterGroup
+from mantidimaging.core.operations.pipeline import BarrierStage, ImageStage, ReduceStage, Stage
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.core.utility.sensible_roi import SensibleROI
@@ -35,6 +37,7 @@ class RoiNormalisationFilter(BaseFilter):
     """
     filter_name = "ROI Normalisation"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(images: Images,
@@ -73,11 +76,7 @@ class RoiNormalisationFilter(BaseFilter):
 
         :returns: Filtered data (stack of images)
         """
-        if normalisation_mode not in modes():
-            raise ValueError(f"Unknown normalisation_mode: {normalisation_mode}, should be one of {modes()}")
-
-        if normalisation_mode == "Flat Field" and flat_field is None:
-            raise ValueError('flat_field must provided if using normalisation_mode of "Flat Field"')
+        _check_mode(normalisation_mode, flat_field)
 
         if flat_field is not None:
             flat_field_data = flat_field.data
@@ -93,6 +92,26 @@ class RoiNormalisationFilter(BaseFilter):
         h.check_data_stack(images)
         return images
 
+    @staticmethod
+    def pipeline_stages(region_of_interest: Optional[SensibleROI] = None,
+                        normalisation_mode: str = modes()[0],
+                        flat_field: Optional[Images] = None,
+                        **kwargs) -> List[Stage]:
+        _check_mode(normalisation_mode, flat_field)
+        if not region_of_interest:
+            return []
+        if isinstance(region_of_interest, list):
+            region_of_interest = SensibleROI.from_list(region_of_interest)
+
+        stages: List[Stage] = [ReduceStage(_calc_mean, "air_means", _air_region_kwargs(region_of_interest))]
+        if normalisation_mode == 'Preserve Max':
+            stages.append(ReduceStage(_calc_max, "air_maxs"))
+        flat_field_data = flat_field.data if flat_field is not None else None
+        stages.append(
+            BarrierStage(partial(_normalise_air_means_stage, normalisation_mode, flat_field_data, region_of_interest)))
+        stages.append(ImageStage(_divide_by_air, per_image_inputs=("air_means", )))
+        return stages
+
     @staticmethod
     def register_gui(form, on_change, view):
         label, roi_field = add_property_to_form("Air Region",
@@ -150,6 +169,51 @@ class RoiNormalisationFilter(BaseFilter):
         return FilterGroup.Basic
 
 
+def _check_mode(normalisation_mode: str, flat_field: Optional[Images]):
+    if normalisation_mode not in modes():
+        raise ValueError(f"Unknown normalisation_mode: {normalisation_mode}, should be one of {modes()}")
+
+    if normalisation_mode == "Flat Field" and flat_field is None:
+        raise ValueError('flat_field must provided if using normalisation_mode of "Flat Field"')
+
+
+def _air_region_kwargs(air_region: SensibleROI) -> Dict[str, int]:
+    return dict(air_left=air_region.left,
+                air_top=air_region.top,
+                air_right=air_region.right,
+                air_bottom=air_region.bottom)
+
+
+def _normalise_air_means(air_means: np.ndarray, normalisation_mode: str, air_maxs: Optional[np.ndarray],
+                         flat_means: Optional[np.ndarray]):
+    """
+    Scales the air region means in place, so that dividing by them gives the requested normalisation.
+    """
+    if normalisation_mode == 'Preserve Max' and air_maxs is not None:
+        # calculate the before and after maximum
+        init_max = air_maxs.max()
+        post_max = (air_maxs / air_means).max()
+        air_means *= post_max / init_max
+
+    elif normalisation_mode == 'Stack Average':
+        air_means /= air_means.mean()
+
+    elif normalisation_mode == 'Flat Field' and flat_means is not None:
+        air_means /= flat_means.mean()
+
+
+def _normalise_air_means_stage(normalisation_mode: str, flat_field: Optional[np.ndarray], air_region: SensibleROI,
+                               images: Images, context: Dict[str, np.ndarray]):
+    """
+    Pipeline barrier, needs the air region means of every image before any of them can be divided.
+    """
+    flat_means = None
+    if normalisation_mode == 'Flat Field' and flat_field is not None:
+        region = _air_region_kwargs(air_region)
+        flat_means = np.array([_calc_mean(flat, **region) for flat in flat_field], dtype=flat_field.dtype)
+    _normalise_air_means(context["air_means"], normalisation_mode, context.get("air_maxs"), flat_means)
+
+
 def _calc_mean(data, air_left=None, air_top=None, air_right=None, air_bottom=None):
     return data[air_top:air_bottom, air_left:air_right].mean()
 
@@ -180,40 +244,51 @@ def _execute(data: np.ndarray,
         img_num = data.shape[0]
         air_means = pu.create_array((img_num, ), data.dtype)
 
-        do_calculate_air_means = ps.create_partial(_calc_mean,
-                                                   ps.return_to_second_at_i,
-                                                   air_left=air_region.left,
-                                                   air_top=air_region.top,
-                                                   air_right=air_region.right,
-                                                   air_bottom=air_region.bottom)
+        do_calculate_air_means = ps.create_partial(_calc_mean, ps.return_to_second_at_i,
+                                                   **_air_region_kwargs(air_region))
 
-        ps.shared_list = [data, air_means]
-        ps.execute(do_calculate_air_means, data.shape[0], progress, cores=cores)
+        ps.execute(do_calculate_air_means,
+                   data.shape[0],
+                   progress,
+                   cores=cores,
+                   chunksize=chunksize,
+                   arrays=[data, air_means],
+                   backend=RoiNormalisationFilter.parallel_backend)
 
+        air_maxs = None
         if normalisation_mode == 'Preserve Max':
             air_maxs = pu.create_array((img_num, ), data.dtype)
             do_calculate_air_max = ps.create_partial(_calc_max, ps.return_to_second_at_i)
 
-            ps.shared_list = [data, air_maxs]
-            ps.execute(do_calculate_air_max, data.shape[0], progress, cores=cores)
-
-            # calculate the before and after maximum
-            init_max = air_maxs.max()
-            post_max = (air_maxs / air_means).max()
-            air_means *= post_max / init_max
+            ps.execute(do_calculate_air_max,
+                       data.shape[0],
+                       progress,
+                       cores=cores,
+                       chunksize=chunksize,
+                       arrays=[data, air_maxs],
+                       backend=RoiNormalisationFilter.parallel_backend)
 
-        elif normalisation_mode == 'Stack Average':
-            air_means /= air_means.mean()
-
-        elif normalisation_mode == 'Flat Field' and flat_field is not None:
+        flat_mean = None
+        if normalisation_mode == 'Flat Field' and flat_field is not None:
             flat_mean = pu.create_array((flat_field.shape[0], ), flat_field.dtype)
-            ps.shared_list = [flat_field, flat_mean]
-            ps.execute(do_calculate_air_means, flat_field.shape[0], progress, cores=cores)
-            air_means /= flat_mean.mean()
+            ps.execute(do_calculate_air_means,
+                       flat_field.shape[0],
+                       progress,
+                       cores=cores,
+                       chunksize=chunksize,
+                       arrays=[flat_field, flat_mean],
+                       backend=RoiNormalisationFilter.parallel_backend)
+
+        _normalise_air_means(air_means, normalisation_mode, air_maxs, flat_mean)
 
         do_divide = ps.create_partial(_divide_by_air, fwd_function=ps.inplace2)
-        ps.shared_list = [data, air_means]
-        ps.execute(do_divide, data.shape[0], progress, cores=cores)
+        ps.execute(do_divide,
+                   data.shape[0],
+                   progress,
+                   cores=cores,
+                   chunksize=chunksize,
+                   arrays=[data, air_means],
+                   backend=RoiNormalisationFilter.parallel_backend)
 
         avg = np.average(air_means)
         max_avg = np.max(air_means) / avg
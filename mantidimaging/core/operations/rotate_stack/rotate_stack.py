@@ -10,6 +10,7 @@ from mantidimaging import helper as h
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.base_filter import BaseFilter
 from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.utility.qt_helpers import Type
 
@@ -27,6 +28,7 @@ class RotateFilter(BaseFilter):
     """
     filter_name = "Rotate Stack"
     link_histograms = True
+    parallel_backend = ExecutionBackend.THREAD
 
     @staticmethod
     def filter_func(data: Images, angle=None, dark=None, cores=None, chunksize=None, progress=None):
@@ -75,7 +77,12 @@ def _execute(data: np.ndarray, angle: float, cores: int, chunksize: int, progres
 
     with progress:
         f = ps.create_partial(_rotate_image_inplace, ps.inplace1, angle=angle)
-        ps.shared_list = [data]
-        ps.execute(f, data.shape[0], progress, msg=f"Rotating by {angle} degrees", cores=cores)
+        ps.execute(f,
+                   data.shape[0],
+                   progress,
+                   msg=f"Rotating by {angle} degrees",
+                   cores=cores,
+                   arrays=[data],
+                   backend=RotateFilter.parallel_backend)
 
     return data
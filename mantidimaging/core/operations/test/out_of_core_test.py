@@ -0,0 +1,106 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import os
+import tempfile
+import unittest
+from functools import partial
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data import Images
+from mantidimaging.core.io.saver import write_img
+from mantidimaging.core.operations import out_of_core
+from mantidimaging.core.operations.flat_fielding import FlatFieldFilter
+from mantidimaging.core.operations.median_filter import MedianFilter
+from mantidimaging.core.operations.roi_normalisation import RoiNormalisationFilter
+from mantidimaging.core.utility.sensible_roi import SensibleROI
+
+
+class OutOfCoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = np.random.rand(12, 16, 20).astype(np.float32)
+        self.file_names = []
+        for i, image in enumerate(self.data):
+            self.file_names.append(os.path.join(self.directory.name, f"image_{i:03}.tif"))
+            write_img(image, self.file_names[-1])
+        self.output_path = os.path.join(self.directory.name, "output.npy")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _operations(self):
+        flat = th.generate_images((4, 16, 20))
+        flat.data += 2
+        dark = th.generate_images((4, 16, 20))
+        dark.data *= 0.1
+        return [
+            partial(FlatFieldFilter.filter_func,
+                    flat_before=flat,
+                    dark_before=dark,
+                    selected_flat_fielding="Only Before"),
+            partial(MedianFilter.filter_func, size=3, mode="reflect"),
+        ]
+
+    def _expected(self, operations, sinograms=False):
+        images = Images(np.swapaxes(self.data, 0, 1).copy() if sinograms else self.data.copy(), sinograms=sinograms)
+        for operation in operations:
+            images = operation(images)
+        return np.swapaxes(images.data, 0, 1) if sinograms else images.data
+
+    # enough for slabs of 3 float32 projections, as the slabs get half of the budget
+    SMALL_BUDGET_MB = 2 * 3 * 16 * 20 * 4 / 1024 / 1024
+
+    def test_projection_slabs_same_as_in_memory(self):
+        operations = self._operations()
+
+        slabs = out_of_core.run_out_of_core(self.file_names,
+                                            operations,
+                                            self.output_path,
+                                            memory_budget_mb=self.SMALL_BUDGET_MB)
+
+        self.assertGreater(len(slabs), 1)
+        self.assertEqual((0, 12), (slabs[0][0], slabs[-1][1]))
+        npt.assert_allclose(np.load(self.output_path), self._expected(operations), rtol=1e-6)
+
+    def test_sinogram_slabs_same_as_in_memory(self):
+        operations = [partial(MedianFilter.filter_func, size=3, mode="reflect")]
+
+        slabs = out_of_core.run_out_of_core(self.file_names,
+                                            operations,
+                                            self.output_path,
+                                            axis=out_of_core.SINOGRAMS,
+                                            memory_budget_mb=self.SMALL_BUDGET_MB)
+
+        self.assertGreater(len(slabs), 1)
+        self.assertEqual((0, 16), (slabs[0][0], slabs[-1][1]))
+        npt.assert_allclose(np.load(self.output_path), self._expected(operations, sinograms=True), rtol=1e-6)
+
+    def test_default_budget_single_slab(self):
+        slabs = out_of_core.run_out_of_core(self.file_names, [], self.output_path)
+
+        self.assertEqual([(0, 12)], slabs)
+        npt.assert_equal(np.load(self.output_path), self.data)
+
+    def test_operation_needing_whole_stack_rejected(self):
+        roi = partial(RoiNormalisationFilter.filter_func, region_of_interest=SensibleROI(0, 0, 4, 4))
+        median = partial(MedianFilter.filter_func, size=3)
+
+        with self.assertRaisesRegex(ValueError, r"\[2\]"):
+            out_of_core.run_out_of_core(self.file_names, [median, roi], self.output_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_slab_bounds(self):
+        # 1000 images of 1 MB, half of the budget given to each slab
+        bounds = out_of_core.slab_bounds((1000, 512, 512), 0, np.float32, 1000)
+
+        self.assertEqual(2, len(bounds))
+        self.assertEqual((0, 500), bounds[0])
+        self.assertEqual((500, 1000), bounds[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import unittest
+from functools import partial
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data import Images
+from mantidimaging.core.operations.flat_fielding import FlatFieldFilter
+from mantidimaging.core.operations.gaussian import GaussianFilter
+from mantidimaging.core.operations.median_filter import MedianFilter
+from mantidimaging.core.operations.outliers import OutliersFilter
+from mantidimaging.core.operations.pipeline import BarrierStage, ImageStage, ReduceStage, build_plan, run_pipeline
+from mantidimaging.core.operations.roi_normalisation import RoiNormalisationFilter
+from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel.utility import ExecutionBackend
+from mantidimaging.core.utility.sensible_roi import SensibleROI
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.flat = th.generate_images()
+        self.flat.data += 2
+        self.dark = th.generate_images()
+        self.dark.data *= 0.1
+
+    def _operations(self, normalisation_mode="Stack Average"):
+        return [
+            partial(OutliersFilter.filter_func, diff=0.5, radius=3, mode="bright"),
+            partial(FlatFieldFilter.filter_func,
+                    flat_before=self.flat,
+                    dark_before=self.dark,
+                    selected_flat_fielding="Only Before"),
+            partial(RoiNormalisationFilter.filter_func,
+                    region_of_interest=SensibleROI(1, 1, 5, 5),
+                    normalisation_mode=normalisation_mode,
+                    flat_field=self.flat),
+            partial(MedianFilter.filter_func, size=3, mode="reflect"),
+            partial(GaussianFilter.filter_func, size=2, mode="reflect", order=0),
+        ]
+
+    def _assert_same_as_sequential(self, operations, backend=ExecutionBackend.THREAD):
+        images = th.generate_images_for_parallel()
+        expected = Images(np.copy(images.data))
+        for operation in operations:
+            expected = operation(expected)
+
+        result = run_pipeline(images, operations, backend=backend)
+
+        npt.assert_allclose(result.data, expected.data, rtol=1e-6)
+
+    def test_same_result_as_sequential(self):
+        for mode in ["Preserve Max", "Stack Average", "Flat Field"]:
+            with self.subTest(mode=mode):
+                self._assert_same_as_sequential(self._operations(mode))
+
+    def test_same_result_as_sequential_serial(self):
+        self._assert_same_as_sequential(self._operations(), ExecutionBackend.SERIAL)
+
+    def test_same_result_as_sequential_process(self):
+        self._assert_same_as_sequential(self._operations(), ExecutionBackend.PROCESS)
+
+    def test_fuses_stages_between_barriers(self):
+        # outliers | flat barrier | subtract, divide, air means | air means barrier | divide by air, median, gaussian
+        with mock.patch("mantidimaging.core.operations.pipeline.ps.execute", wraps=ps.execute) as execute:
+            run_pipeline(th.generate_images(), self._operations())
+
+        self.assertEqual(3, execute.call_count)
+
+    def test_plan_of_filters(self):
+        plan = build_plan(self._operations())
+
+        self.assertEqual([0, 1, 1, 1, 2, 2, 2, 3, 4], [index for index, _ in plan])
+        self.assertEqual([ImageStage, BarrierStage, ImageStage, ImageStage, ReduceStage, BarrierStage, ImageStage],
+                         [type(stage) for _, stage in plan[:7]])
+
+    def test_noop_filter_has_no_stages(self):
+        self.assertEqual([], build_plan([partial(MedianFilter.filter_func, size=None)]))
+
+    def test_unfusable_operation_is_barrier(self):
+        images = th.generate_images()
+        expected = np.copy(images.data) * 2
+        operation = mock.Mock(side_effect=lambda stack: np.multiply(stack.data, 2, out=stack.data))
+        gpu_median = partial(MedianFilter.filter_func, size=3, force_cpu=False)
+
+        plan = build_plan([operation, gpu_median])
+        self.assertEqual([BarrierStage, BarrierStage], [type(stage) for _, stage in plan])
+
+        result = run_pipeline(images, [operation])
+        operation.assert_called_once_with(images)
+        self.assertIs(images, result)
+        npt.assert_equal(expected, result.data)
+
+    def test_barrier_replaces_images(self):
+        replacement = th.generate_images()
+        expected = np.copy(replacement.data)
+        median = partial(MedianFilter.filter_func, size=3, mode="reflect")
+        MedianFilter.filter_func(Images(expected), size=3, mode="reflect")
+
+        result = run_pipeline(th.generate_images(), [lambda _: replacement, median])
+
+        self.assertIs(replacement, result)
+        npt.assert_allclose(expected, result.data)
+
+    def test_barrier_after_pass_reads_current_statistics(self):
+        images = th.generate_images()
+        flat_field = partial(FlatFieldFilter.filter_func,
+                             flat_before=self.flat,
+                             dark_before=self.dark,
+                             selected_flat_fielding="Only Before")
+        maxes = []
+
+        run_pipeline(images, [flat_field, lambda stack: maxes.append(stack.read_statistics().max)])
+
+        self.assertAlmostEqual(np.nanmax(images.data), maxes[0], places=5)
+
+    def test_compact_stack_upcast_for_float_operations(self):
+        images = th.generate_images()
+        images.to_compact("uint16")
+        median = partial(MedianFilter.filter_func, size=3, mode="reflect")
+
+        run_pipeline(images, [median])
+        self.assertEqual(np.uint16, images.dtype)
+
+        run_pipeline(images, [median, partial(GaussianFilter.filter_func, size=2, mode="reflect", order=0)])
+        self.assertEqual(np.float32, images.dtype)
+
+
+if __name__ == '__main__':
+    unittest.main()
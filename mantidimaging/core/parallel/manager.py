@@ -0,0 +1,137 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Owns the long-lived process pool used by `parallel.shared.execute`.
+
+Shared arrays are passed to the workers as handles to named shared memory
+segments (see `parallel.utility.SharedArrayHandle`), so the workers do not need
+to be forked after the arrays are allocated and the pool is kept between
+operations. Any start method supported by the platform can be used.
+
+Several operations can use the pool at the same time, it is only recycled
+when no operation is using it.
+"""
+import atexit
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from multiprocessing.pool import Pool
+from typing import Iterator, Optional
+
+LOG = getLogger(__name__)
+
+pool: Optional[Pool] = None
+pool_cores: int = 0
+# The start method used for new pools: 'fork', 'spawn', 'forkserver' or None for the platform default
+start_method: Optional[str] = None
+# Number of operations currently using the pool
+_users: int = 0
+_lock = threading.RLock()
+
+
+def _noop(i):
+    return i
+
+
+def set_start_method(method: Optional[str]):
+    """
+    Sets the start method used for the worker processes. The running pool is ended if it used another one.
+
+    :param method: One of multiprocessing.get_all_start_methods(), or None for the platform default
+    """
+    global start_method
+    if method is not None and method not in multiprocessing.get_all_start_methods():
+        raise ValueError(f"Unknown start method: {method}")
+    with _lock:
+        if method != start_method:
+            end_pool()
+        start_method = method
+
+
+def create_and_start_pool(cores: int):
+    """
+    Starts a new pool, ending the current one if present.
+
+    The workers are sent a no-op task each so that they have started
+    before the first real operation is submitted.
+
+    :param cores: Number of worker processes
+    """
+    global pool, pool_cores
+    with _lock:
+        end_pool()
+
+        LOG.info(f"Starting process pool with {cores} workers, start method: {start_method or 'default'}")
+        pool = multiprocessing.get_context(start_method).Pool(cores)
+        pool_cores = cores
+
+        # warm up, every worker gets at least one task
+        pool.map(_noop, range(cores), chunksize=1)
+
+
+def get_pool(cores: int) -> Pool:
+    """
+    Returns the running pool, recycling it if the number of cores has changed since it was started.
+    If an operation is using the pool it is not recycled, and the running pool is returned instead.
+    """
+    with _lock:
+        if pool is None:
+            create_and_start_pool(cores)
+        elif pool_cores != cores:
+            if _users == 0:
+                create_and_start_pool(cores)
+            else:
+                LOG.info(f"Pool is in use, running on its {pool_cores} workers instead of {cores}")
+        assert pool is not None
+        return pool
+
+
+@contextmanager
+def use_pool(cores: int) -> Iterator[Pool]:
+    """
+    Provides the pool for the duration of an operation, during which it will not be recycled.
+    """
+    global _users
+    with _lock:
+        current = get_pool(cores)
+        _users += 1
+    try:
+        yield current
+    finally:
+        with _lock:
+            _users -= 1
+
+
+def terminate_pool() -> bool:
+    """
+    Stops the workers immediately, abandoning the tasks they are running. Used to stop a cancelled operation.
+    A new pool is started by the next operation.
+
+    :return: False if the pool was not terminated, because another operation is also using it
+    """
+    global pool, pool_cores
+    with _lock:
+        if _users > 1:
+            return False
+        if pool is not None:
+            LOG.info("Terminating process pool")
+            pool.terminate()
+            pool.join()
+        pool = None
+        pool_cores = 0
+        return True
+
+
+def end_pool():
+    global pool, pool_cores
+    with _lock:
+        if pool is not None:
+            LOG.info("Ending process pool")
+            pool.close()
+            pool.join()
+        pool = None
+        pool_cores = 0
+
+
+atexit.register(end_pool)
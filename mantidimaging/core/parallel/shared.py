@@ -1,49 +1,114 @@
 # Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
 # SPDX - License - Identifier: GPL-3.0-or-later
 
+import itertools
+import threading
 from functools import partial
-from typing import List
+from typing import Dict, List, Optional, Sequence, Union
 
 import numpy
 
 from mantidimaging.core.parallel import utility as pu
 
-shared_list: List[numpy.ndarray] = []
+# Arrays used by the operations that are currently running, keyed by their handle.
+# The handles are bound into the partial function by `execute`, so that operations
+# running at the same time on different stacks do not interfere with each other.
+_registry: Dict[int, numpy.ndarray] = {}
+_registry_lock = threading.Lock()
+_handle_counter = itertools.count()
 
+# Buffers of every thread, reused between the images it processes, see `scratch_buffer`
+_scratch = threading.local()
 
-def inplace3(func, i, **kwargs):
-    global shared_list
-    func(shared_list[0][i], shared_list[1][i], shared_list[2], **kwargs)
+
+def register(array: numpy.ndarray, handle: Optional[int] = None) -> int:
+    """
+    Adds the array to the registry, so that the forwarding functions can find it.
+
+    :param array: The array to register
+    :param handle: Register the array under this handle, used by the worker processes
+                   to reuse the handles given out by the main process
+    :return: The handle of the array
+    """
+    with _registry_lock:
+        if handle is None:
+            handle = next(_handle_counter)
+        _registry[handle] = array
+    return handle
+
+
+def unregister(handle: int):
+    with _registry_lock:
+        _registry.pop(handle, None)
+
+
+def get_array(handle: int) -> numpy.ndarray:
+    return _registry[handle]
+
+
+def scratch_buffer(shape, dtype, name: str = "output") -> numpy.ndarray:
+    """
+    Gets a buffer that belongs to the current thread, so that the kernels don't allocate
+    a new array for every image. The worker processes keep theirs between executions.
+
+    The contents are left over from the last use. Only the latest shape and dtype of each name are kept.
+
+    :param name: Distinguishes the buffers of a thread that are used at the same time
+    """
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    buffer = buffers.get(name)
+    if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+        buffer = buffers[name] = numpy.empty(shape, dtype)
+    return buffer
+
+
+def inplace3(func, handles, i, **kwargs):
+    func(get_array(handles[0])[i], get_array(handles[1])[i], get_array(handles[2]), **kwargs)
+
+
+def inplace2(func, handles, i, **kwargs):
+    func(get_array(handles[0])[i], get_array(handles[1])[i], **kwargs)
 
 
-def inplace2(func, i, **kwargs):
-    global shared_list
-    func(shared_list[0][i], shared_list[1][i], **kwargs)
+def inplace1(func, handles, i, **kwargs):
+    func(get_array(handles[0])[i], **kwargs)
 
 
-def inplace1(func, i, **kwargs):
-    global shared_list
-    func(shared_list[0][i], **kwargs)
+def inplace_indexed(func, handles, i, **kwargs):
+    """
+    For functions that pick the part of the array they work on from the index, e.g. a block of images
+    """
+    func(get_array(handles[0]), i, **kwargs)
+
 
+def return_to_self(func, handles, i, **kwargs):
+    array = get_array(handles[0])
+    array[i] = func(array[i], **kwargs)
 
-def return_to_self(func, i, **kwargs):
-    global shared_list
-    shared_list[0][i] = func(shared_list[0][i], **kwargs)
 
+def scratch_to_self(func, handles, i, **kwargs):
+    """
+    Like `return_to_self`, for functions that take an output array, e.g. most of scipy.ndimage.
+    The result is written to a scratch buffer of the worker and copied back, nothing is allocated.
+    """
+    image = get_array(handles[0])[i]
+    output = scratch_buffer(image.shape, image.dtype)
+    func(image, output=output, **kwargs)
+    image[:] = output
 
-def inplace_second_2d(func, i, **kwargs):
-    global shared_list
-    func(shared_list[0][i], shared_list[1], **kwargs)
 
+def inplace_second_2d(func, handles, i, **kwargs):
+    func(get_array(handles[0])[i], get_array(handles[1]), **kwargs)
 
-def return_to_second(func, i, **kwargs):
-    global shared_list
-    shared_list[1] = func(shared_list[0][i], **kwargs)
 
+def return_to_second(func, handles, i, **kwargs):
+    register(func(get_array(handles[0])[i], **kwargs), handles[1])
 
-def return_to_second_at_i(func, i, **kwargs):
-    global shared_list
-    shared_list[1][i] = func(shared_list[0][i], **kwargs)
+
+def return_to_second_at_i(func, handles, i, **kwargs):
+    get_array(handles[1])[i] = func(get_array(handles[0])[i], **kwargs)
 
 
 def create_partial(func, fwd_function, **kwargs):
@@ -61,7 +126,22 @@ def create_partial(func, fwd_function, **kwargs):
     return partial(fwd_function, func, **kwargs)
 
 
-def execute(partial_func: partial, num_operations: int, progress=None, msg: str = '', cores=None) -> None:
+def _bind_handles(partial_func: partial, handles: Sequence[int]) -> partial:
+    """
+    Inserts the handles of the arrays after the function to be executed,
+    giving the forwarding function the arguments (func, handles, i).
+    """
+    return partial(partial_func.func, *partial_func.args, tuple(handles), **partial_func.keywords)
+
+
+def execute(partial_func: partial,
+            num_operations: int,
+            progress=None,
+            msg: str = '',
+            cores=None,
+            chunksize: Optional[int] = None,
+            arrays: Optional[List[numpy.ndarray]] = None,
+            backend: Union[str, pu.ExecutionBackend, None] = None) -> None:
     """
     Executes a function in parallel with shared memory between the processes.
 
@@ -83,8 +163,8 @@ def execute(partial_func: partial, num_operations: int, progress=None, msg: str
     Using _ in the for _ enumerate is slightly faster, because the tuple
     from enumerate isn't unpacked, and thus some time is saved.
 
-    From performance tests, the chunksize doesn't seem to make much of a
-    difference, but having larger chunks usually led to slower performance:
+    Historically the chunksize was fixed to 1, as larger chunks usually led to
+    slower performance with expensive kernels:
 
     Shape: (50,512,512)
     1 chunk 3.06s
@@ -97,21 +177,50 @@ def execute(partial_func: partial, num_operations: int, progress=None, msg: str
     8 chunks 3.25s
     9 chunks 3.45s
 
+    For cheap kernels (e.g. a single division per image) sending one message per
+    image dominates the run time, so unless a chunksize is given the first images
+    are timed and the chunksize is chosen from the measured cost per image.
+
+    The worker processes are kept alive between calls by `parallel.manager`.
+    Arrays allocated with `pu.create_array` are passed to them as handles to
+    their shared memory and attached without copying, any other array is
+    copied into every task and changes made to it are lost.
+
+    The arrays are registered for the duration of the call and the forwarding
+    function looks them up by handle, so several operations can be executed
+    at the same time from different threads.
+
+    Kernels that release the GIL (NumPy ufuncs with `out=`, most of scipy.ndimage)
+    can be run with the "thread" backend instead, which works on the arrays
+    directly, whether they are in shared memory or not, and avoids sending the
+    tasks to other processes.
+
+    The execution stops when the progress is cancelled, see `pu.execute_impl`.
+
     :param partial_func: A function constructed using create_partial
     :param num_operations: The expected number of operations - should match the number of images being processed
                            Also used to set the number of progress steps
     :param cores: number of cores that the processing will use
     :param progress: Progress instance to use for progress reporting (optional)
     :param msg: Message to be shown on the progress bar
-    :return:
+    :param chunksize: Number of images in each task sent to a worker. If None it is chosen automatically
+    :param arrays: The arrays passed to the forwarding function, in the order it expects them
+    :param backend: One of "process", "thread" or "serial", see `pu.ExecutionBackend`. Defaults to "process"
+    :raises TaskCancelled: If the progress was cancelled
     """
 
     if not cores:
         cores = pu.get_cores()
-
-    chunksize = pu.calculate_chunksize(cores)
-
-    pu.execute_impl(num_operations, partial_func, cores, chunksize, progress, msg)
-
-    global shared_list
-    shared_list = []
+    backend = pu.ExecutionBackend(backend) if backend is not None else pu.ExecutionBackend.PROCESS
+
+    arrays = arrays if arrays is not None else []
+    handles = [register(array) for array in arrays]
+    try:
+        # the stacks owning the arrays can't be moved out of memory while they are written
+        with pu.arrays_in_use(arrays):
+            pu.execute_impl(num_operations, _bind_handles(partial_func, handles), cores, chunksize, progress, msg,
+                            {handle: get_array(handle)
+                             for handle in handles}, backend)
+    finally:
+        for handle in handles:
+            unregister(handle)
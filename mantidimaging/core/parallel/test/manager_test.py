@@ -0,0 +1,87 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import unittest
+from unittest import mock
+
+from mantidimaging.core.parallel import manager
+
+
+class ManagerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('mantidimaging.core.parallel.manager.multiprocessing.get_context')
+        self.mock_get_context = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_pool = self.mock_get_context.return_value.Pool
+
+    def tearDown(self):
+        manager.end_pool()
+        manager.start_method = None
+
+    def test_create_and_start_pool_warms_up_workers(self):
+        manager.create_and_start_pool(4)
+
+        self.mock_pool.assert_called_once_with(4)
+        self.mock_pool.return_value.map.assert_called_once()
+        self.assertIs(manager.pool, self.mock_pool.return_value)
+
+    def test_pool_reused(self):
+        first = manager.get_pool(4)
+        second = manager.get_pool(4)
+
+        self.assertIs(first, second)
+        self.mock_pool.assert_called_once()
+
+    def test_pool_recycled_when_cores_change(self):
+        manager.get_pool(4)
+        manager.get_pool(2)
+
+        self.assertEqual(self.mock_pool.call_count, 2)
+        self.mock_pool.return_value.close.assert_called_once()
+
+    def test_pool_in_use_not_recycled(self):
+        with manager.use_pool(4) as first:
+            second = manager.get_pool(2)
+
+        self.assertIs(first, second)
+        self.mock_pool.assert_called_once()
+        manager.get_pool(2)
+        self.assertEqual(self.mock_pool.call_count, 2)
+
+    def test_set_start_method_ends_pool(self):
+        manager.create_and_start_pool(4)
+        manager.set_start_method('spawn')
+
+        self.mock_pool.return_value.close.assert_called_once()
+        self.assertIsNone(manager.pool)
+        manager.get_pool(4)
+        self.mock_get_context.assert_called_with('spawn')
+
+    def test_set_start_method_unknown(self):
+        self.assertRaises(ValueError, manager.set_start_method, 'not-a-method')
+
+    def test_end_pool(self):
+        manager.create_and_start_pool(4)
+        manager.end_pool()
+
+        self.mock_pool.return_value.close.assert_called_once()
+        self.mock_pool.return_value.join.assert_called_once()
+        self.assertIsNone(manager.pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+    def test_terminate_pool(self):
+        with manager.use_pool(4):
+            self.assertTrue(manager.terminate_pool())
+
+        self.mock_pool.return_value.terminate.assert_called_once()
+        self.assertIsNone(manager.pool)
+
+    def test_terminate_pool_used_by_another_operation(self):
+        with manager.use_pool(4), manager.use_pool(4):
+            self.assertFalse(manager.terminate_pool())
+
+        self.mock_pool.return_value.terminate.assert_not_called()
+        self.assertIs(manager.pool, self.mock_pool.return_value)
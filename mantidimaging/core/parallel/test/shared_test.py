@@ -0,0 +1,201 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import scipy.ndimage as scipy_ndimage
+
+from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress, TaskCancelled
+
+
+def _add(data, value):
+    data += value
+
+
+def _multiply(data, factor):
+    data *= factor
+
+
+def _slow_add(data, value):
+    time.sleep(0.05)
+    data += value
+
+
+def test_register_and_unregister():
+    array = np.zeros(3)
+    handle = ps.register(array)
+    assert ps.get_array(handle) is array
+
+    ps.unregister(handle)
+    with pytest.raises(KeyError):
+        ps.get_array(handle)
+
+
+def test_register_gives_unique_handles():
+    array = np.zeros(3)
+    first = ps.register(array)
+    second = ps.register(array)
+    try:
+        assert first != second
+    finally:
+        ps.unregister(first)
+        ps.unregister(second)
+
+
+def test_scratch_buffer_reused_by_thread():
+    first = ps.scratch_buffer((4, 5), np.float32)
+
+    assert ps.scratch_buffer((4, 5), np.float32) is first
+    assert ps.scratch_buffer((4, 5), np.float32, "other") is not first
+    assert ps.scratch_buffer((4, 6), np.float32).shape == (4, 6)
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(ps.scratch_buffer, (4, 6), np.float32).result() is not ps.scratch_buffer((4, 6),
+                                                                                                        np.float32)
+
+
+@pytest.mark.parametrize("backend", list(pu.ExecutionBackend))
+def test_scratch_to_self_same_as_return_to_self(backend):
+    data = pu.create_array((6, 8, 8), np.float32)
+    data[:] = np.random.rand(6, 8, 8)
+    expected = np.copy(data)
+    ps.execute(ps.create_partial(scipy_ndimage.median_filter, ps.return_to_self, size=3),
+               data.shape[0],
+               progress=Progress(),
+               arrays=[expected],
+               backend=pu.ExecutionBackend.SERIAL)
+
+    ps.execute(ps.create_partial(scipy_ndimage.median_filter, ps.scratch_to_self, size=3),
+               data.shape[0],
+               progress=Progress(),
+               cores=2,
+               arrays=[data],
+               backend=backend)
+
+    np.testing.assert_equal(data, expected)
+
+
+def test_scratch_to_self_reuses_output():
+    data = np.random.rand(5, 4, 4)
+    outputs = []
+
+    def _record(image, output):
+        outputs.append(output)
+        output[:] = image * 2
+
+    expected = data * 2
+    ps.execute(ps.create_partial(_record, ps.scratch_to_self),
+               data.shape[0],
+               progress=Progress(),
+               arrays=[data],
+               backend=pu.ExecutionBackend.SERIAL)
+
+    assert all(output is outputs[0] for output in outputs)
+    np.testing.assert_equal(data, expected)
+
+
+def test_execute_unregisters_arrays():
+    data = np.zeros((5, 2, 2))
+    before = dict(ps._registry)
+    ps.execute(ps.create_partial(_add, ps.inplace1, value=1),
+               data.shape[0],
+               progress=Progress(),
+               cores=1,
+               arrays=[data])
+
+    np.testing.assert_equal(data, 1)
+    assert ps._registry == before
+
+
+def test_execute_forwards_arrays_in_order():
+    data = np.ones((5, 2, 2))
+    factors = np.arange(5, dtype=np.float64)
+    ps.execute(ps.create_partial(_multiply, ps.inplace2),
+               data.shape[0],
+               progress=Progress(),
+               cores=1,
+               arrays=[data, factors])
+
+    np.testing.assert_equal(data[:, 0, 0], factors)
+
+
+@pytest.mark.parametrize('backend', ["thread", "serial", pu.ExecutionBackend.THREAD])
+def test_execute_backend_works_on_non_shared_arrays(backend):
+    data = np.zeros((20, 2, 2))
+    ps.execute(ps.create_partial(_add, ps.inplace1, value=1),
+               data.shape[0],
+               progress=Progress(),
+               cores=2,
+               arrays=[data],
+               backend=backend)
+
+    np.testing.assert_equal(data, 1)
+
+
+def test_execute_unknown_backend():
+    with pytest.raises(ValueError):
+        ps.execute(ps.create_partial(_add, ps.inplace1, value=1), 1, arrays=[np.zeros((1, 2))], backend="gpu")
+
+
+@pytest.mark.parametrize('cores', [1, 2])
+def test_concurrent_execute_on_different_stacks(cores):
+    sample = pu.create_array((40, 4, 4))
+    flat = pu.create_array((20, 4, 4))
+    dark = pu.create_array((20, 4, 4))
+    for array in (sample, flat, dark):
+        array[:] = 0
+
+    def run(data, value):
+        ps.execute(ps.create_partial(_add, ps.inplace1, value=value),
+                   data.shape[0],
+                   progress=Progress(),
+                   cores=cores,
+                   arrays=[data])
+
+    with ThreadPoolExecutor(3) as executor:
+        for future in [executor.submit(run, sample, 1), executor.submit(run, flat, 2), executor.submit(run, dark, 3)]:
+            future.result()
+
+    np.testing.assert_equal(sample, 1)
+    np.testing.assert_equal(flat, 2)
+    np.testing.assert_equal(dark, 3)
+
+
+@pytest.mark.parametrize('backend', ["process", "thread", "serial"])
+def test_execute_cancelled(backend):
+    data = pu.create_array((200, 2, 2))
+    data[:] = 0
+    progress = Progress()
+    threading.Timer(0.2, progress.cancel).start()
+
+    start = time.perf_counter()
+    with pytest.raises(TaskCancelled):
+        ps.execute(ps.create_partial(_slow_add, ps.inplace1, value=1),
+                   data.shape[0],
+                   progress=progress,
+                   cores=2,
+                   chunksize=2,
+                   arrays=[data],
+                   backend=backend)
+
+    # processing everything would take 5s with 2 cores
+    assert time.perf_counter() - start < 2
+    assert 0 < np.count_nonzero(data[:, 0, 0]) < data.shape[0]
+    # nothing is written to the array after execute returns
+    written = np.copy(data)
+    time.sleep(0.1)
+    np.testing.assert_equal(data, written)
+
+    # the pool is started again for the next operation
+    ps.execute(ps.create_partial(_add, ps.inplace1, value=1),
+               data.shape[0],
+               progress=Progress(),
+               cores=2,
+               arrays=[data],
+               backend=backend)
+    np.testing.assert_equal(data, written + 1)
@@ -0,0 +1,106 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from mantidimaging.core.parallel import shared as ps
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.parallel.timing import ChunkTiming, ExecutionTimings, save_chrome_trace, to_chrome_trace
+from mantidimaging.core.utility.progress_reporting import Progress
+
+
+def _add(data, value):
+    data += value
+
+
+def _timings() -> ExecutionTimings:
+    timings = ExecutionTimings("test", workers=2)
+    timings.start, timings.end = 100.0, 110.0
+    # worker 1 busy for 8s over 3 chunks, worker 2 for 2s over 1 chunk
+    timings.add(ChunkTiming(1, 1, 100.0, 102.0, 0, 4))
+    timings.add(ChunkTiming(1, 1, 102.0, 104.0, 4, 8))
+    timings.add(ChunkTiming(1, 1, 104.0, 108.0, 8, 12))
+    timings.add(ChunkTiming(2, 1, 100.0, 102.0, 12, 16))
+    return timings
+
+
+def test_summary():
+    summary = _timings().summary()
+
+    assert summary.num_images == 16
+    assert summary.elapsed == 10.0
+    assert summary.throughput == 1.6
+    assert summary.utilisation == {"1/1": 0.8, "2/1": 0.2}
+    assert summary.p50_latency == 2.0
+    assert summary.p99_latency == pytest.approx(3.94)
+    assert summary.idle_fraction == 0.5
+    assert summary.slowest_chunk == (8, 12)
+
+
+def test_summary_without_chunks():
+    timings = ExecutionTimings("test", workers=1)
+    timings.finish()
+
+    summary = timings.summary()
+
+    assert summary.num_images == 0
+    assert summary.utilisation == {}
+    assert summary.slowest_chunk == (0, 0)
+
+
+def test_chrome_trace():
+    trace = to_chrome_trace([_timings()])
+
+    events = trace["traceEvents"]
+    assert len(events) == 4
+    assert events[2]["name"] == "test 8-12"
+    assert events[2]["ph"] == "X"
+    assert events[2]["ts"] == 104e6
+    assert events[2]["dur"] == 4e6
+    assert events[2]["args"] == {"first": 8, "stop": 12}
+
+
+def test_save_chrome_trace():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.json")
+        save_chrome_trace([_timings()], path)
+
+        with open(path) as f:
+            assert json.load(f) == to_chrome_trace([_timings()])
+
+
+@pytest.mark.parametrize("backend", list(pu.ExecutionBackend))
+@pytest.mark.parametrize("chunksize", [None, 3])
+def test_execute_records_timings(backend, chunksize):
+    data = pu.create_array((10, 2, 2), np.float32)
+    progress = Progress()
+    progress.record_timings = True
+
+    ps.execute(ps.create_partial(_add, ps.inplace1, value=1),
+               data.shape[0],
+               progress=progress,
+               cores=2,
+               chunksize=chunksize,
+               arrays=[data],
+               backend=backend)
+
+    assert len(progress.execution_timings) == 1
+    chunks = progress.execution_timings[0].chunks
+    indices = sorted(i for chunk in chunks for i in range(chunk.first, chunk.stop))
+    assert indices == list(range(10))
+    assert all(chunk.start <= chunk.end for chunk in chunks)
+    np.testing.assert_equal(data, 1)
+
+
+def test_execute_does_not_record_by_default():
+    data = np.zeros((4, 2, 2))
+    progress = Progress()
+
+    ps.execute(ps.create_partial(_add, ps.inplace1, value=1), data.shape[0], progress=progress, arrays=[data])
+
+    assert progress.execution_timings == []
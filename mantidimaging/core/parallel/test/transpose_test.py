@@ -0,0 +1,38 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+import numpy as np
+import pytest
+
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.parallel.transpose import swap_first_axes, tiles
+
+
+@pytest.mark.parametrize("shape", [(7, 5, 3), (1, 9, 4), (30, 2, 1000), (3, 40, 2)])
+def test_tiles_cover_every_row_once(shape):
+    covered = np.zeros(shape[:2], dtype=int)
+    for image_start, image_stop, row_start, row_stop in tiles(shape, 4, tile_bytes=64):
+        covered[image_start:image_stop, row_start:row_stop] += 1
+
+    np.testing.assert_equal(covered, 1)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.uint16])
+def test_swap_first_axes_same_as_swapaxes(dtype):
+    source = (np.random.rand(11, 13, 6) * 100).astype(dtype)
+
+    output = swap_first_axes(source, cores=3)
+
+    np.testing.assert_equal(output, np.swapaxes(source, 0, 1))
+    assert pu.storage_of(output) == pu.StorageMode.SHARED
+
+
+def test_swap_first_axes_into_output():
+    source = np.random.rand(4, 6, 5)
+    output = np.zeros((6, 4, 5))
+
+    assert swap_first_axes(source, output) is output
+    np.testing.assert_equal(output, np.swapaxes(source, 0, 1))
+
+    with pytest.raises(ValueError):
+        swap_first_axes(source, np.zeros((4, 6, 5)))
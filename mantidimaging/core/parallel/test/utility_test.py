@@ -1,13 +1,24 @@
 # Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
 # SPDX - License - Identifier: GPL-3.0-or-later
 
+import os
+import time
+from multiprocessing.shared_memory import SharedMemory
+
 import numpy as np
 from typing import List, Tuple, Union
 from unittest import mock
 
 import pytest
 
-from mantidimaging.core.parallel.utility import _create_shared_array, execute_impl, multiprocessing_necessary
+from mantidimaging.core.parallel import manager, shared as ps
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.parallel.utility import (ExecutionBackend, MappedArrayHandle, StorageMode, _create_shared_array,
+                                                 _mapped_files, _segments, _unlinked_segments, attach_shared_array,
+                                                 calculate_chunksize, calibrate, create_array, execute_impl,
+                                                 free_shared_array, get_shared_array_handle, is_freed_array,
+                                                 is_shared_array, multiprocessing_necessary, storage_of)
+from mantidimaging.core.utility.progress_reporting import Progress
 
 
 @pytest.mark.parametrize(
@@ -30,27 +41,116 @@ def test_correctly_chooses_parallel(shape: Union[int, List, Tuple[int, int, int]
     assert multiprocessing_necessary(shape, cores) is should_be_parallel
 
 
-@mock.patch('mantidimaging.core.parallel.utility.Pool')
-def test_execute_impl_one_core(mock_pool):
+@mock.patch('mantidimaging.core.parallel.utility.manager.get_pool')
+def test_execute_impl_one_core(mock_get_pool):
     mock_partial = mock.Mock()
     mock_progress = mock.Mock()
     execute_impl(1, mock_partial, 1, 1, mock_progress, "Test")
     mock_partial.assert_called_once_with(0)
     mock_progress.update.assert_called_once_with(1, "Test")
+    mock_get_pool.assert_not_called()
 
 
-@mock.patch('mantidimaging.core.parallel.utility.Pool')
-def test_execute_impl_par(mock_pool):
+@mock.patch('mantidimaging.core.parallel.utility.manager.get_pool')
+def test_execute_impl_par(mock_get_pool):
     mock_partial = mock.Mock()
-    mock_progress = mock.Mock()
+    mock_progress = mock.Mock(should_cancel=False)
     mock_pool_instance = mock.Mock()
-    mock_pool_instance.imap.return_value = range(15)
-    mock_pool.return_value.__enter__.return_value = mock_pool_instance
+    mock_pool_instance.apply_async.return_value.get.return_value = 1
+    mock_get_pool.return_value = mock_pool_instance
     execute_impl(15, mock_partial, 10, 1, mock_progress, "Test")
-    mock_pool_instance.imap.assert_called_once()
+    mock_get_pool.assert_called_once_with(10)
+    assert [c[0][1][0] for c in mock_pool_instance.apply_async.call_args_list] == [(i, i + 1) for i in range(15)]
     assert mock_progress.update.call_count == 15
 
 
+@mock.patch('mantidimaging.core.parallel.utility.manager.get_pool')
+def test_execute_impl_serial_backend(mock_get_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock()
+    execute_impl(15, mock_partial, 10, 1, mock_progress, "Test", backend=ExecutionBackend.SERIAL)
+    assert mock_partial.call_count == 15
+    mock_get_pool.assert_not_called()
+
+
+@mock.patch('mantidimaging.core.parallel.utility.manager.get_pool')
+def test_execute_impl_thread_backend(mock_get_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock(should_cancel=False)
+    execute_impl(15, mock_partial, 4, 2, mock_progress, "Test", backend=ExecutionBackend.THREAD)
+    assert sorted(c[0][0] for c in mock_partial.call_args_list) == list(range(15))
+    assert sum(c[0][0] for c in mock_progress.update.call_args_list) == 15
+    mock_get_pool.assert_not_called()
+
+
+@mock.patch('mantidimaging.core.parallel.utility.manager.get_pool')
+def test_execute_impl_par_automatic_chunksize(mock_get_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock(should_cancel=False)
+    mock_pool_instance = mock.Mock()
+    mock_pool_instance.apply_async.return_value.get.return_value = 10
+    mock_get_pool.return_value = mock_pool_instance
+    # cheap kernel, all 16 calibration images are processed locally
+    execute_impl(100, mock_partial, 2, None, mock_progress, "Test")
+
+    assert mock_partial.call_count == 16
+    ranges = [c[0][1][0] for c in mock_pool_instance.apply_async.call_args_list]
+    assert ranges[0][0] == 16
+    assert ranges[-1][1] == 100
+    # capped so that each worker gets at least 4 tasks
+    assert all(stop - start == 10 for start, stop in ranges[:-1])
+
+
+@pytest.mark.parametrize(
+    'num_items,cores,seconds_per_item,expected',
+    (
+        [1000, 8, 0.001, 31],  # cheap: capped to leave 4 tasks per worker
+        [10000, 8, 0.001, 100],  # cheap: 0.1s worth of images per task
+        [1000, 8, 1.0, 1],  # expensive: one image per task
+        [10, 8, 0.0001, 1],  # fewer images than workers
+        [1000, 8, 0.0, 31],  # unmeasurably fast
+    ))
+def test_calculate_chunksize(num_items, cores, seconds_per_item, expected):
+    assert calculate_chunksize(num_items, cores, seconds_per_item) == expected
+
+
+def test_calibrate_stops_after_time_limit():
+    mock_partial = mock.Mock(side_effect=lambda i: time.sleep(0.03))
+    mock_progress = mock.Mock()
+    done, seconds_per_item = calibrate(mock_partial, 100, mock_progress, "Test")
+
+    assert done == 2
+    assert seconds_per_item >= 0.03
+    assert mock_progress.update.call_count == 2
+
+
+def _add_one(data):
+    data += 1
+
+
+def test_execute_in_pool():
+    data = create_array((40, 5, 5))
+    data[:] = 0
+    ps.execute(ps.create_partial(_add_one, ps.inplace1), data.shape[0], progress=Progress(), cores=2, arrays=[data])
+
+    np.testing.assert_equal(data, 1)
+
+
+@pytest.mark.parametrize('start_method', ['spawn', 'forkserver'])
+def test_execute_in_pool_with_start_method(start_method):
+    manager.set_start_method(start_method)
+    try:
+        # allocated after the pool is started, which a forked pool would not see
+        manager.get_pool(2)
+        data = create_array((40, 5, 5))
+        data[:] = 0
+        ps.execute(ps.create_partial(_add_one, ps.inplace1), data.shape[0], progress=Progress(), cores=2, arrays=[data])
+
+        np.testing.assert_equal(data, 1)
+    finally:
+        manager.set_start_method(None)
+
+
 @pytest.mark.parametrize('dtype,expected_dtype', [
     [np.uint8, np.uint8],
     ['uint8', np.uint8],
@@ -70,7 +170,200 @@ def test_create_shared_array(dtype, expected_dtype):
     assert arr.dtype == expected_dtype
 
 
+def test_is_shared_array():
+    arr = create_array((10, 10, 10))
+    assert is_shared_array(arr)
+    assert is_shared_array(arr[3])
+    assert is_shared_array(np.swapaxes(arr, 0, 1))
+    assert not is_shared_array(np.zeros((10, 10, 10)))
+    assert not is_shared_array(np.copy(arr))
+
+
+def test_attach_shared_array_view():
+    arr = create_array((4, 5, 6))
+    arr[:] = np.arange(arr.size).reshape(arr.shape)
+    view = np.swapaxes(arr, 0, 1)[2]
+
+    attached = attach_shared_array(get_shared_array_handle(view))
+    np.testing.assert_equal(attached, view)
+    attached[:] = -1
+    assert (arr[:, 2] == -1).all()
+
+
+def test_get_shared_array_handle_not_shared():
+    assert get_shared_array_handle(np.zeros((2, 2))) is None
+
+
+def test_segment_unlinked_when_array_collected():
+    arr = create_array((4, 5, 6))
+    name = get_shared_array_handle(arr).name
+    assert name in _segments
+
+    del arr
+    assert name not in _segments
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
+
+
+def test_free_shared_array():
+    arr = create_array((4, 5, 6))
+    name = get_shared_array_handle(arr).name
+
+    free_shared_array(arr)
+    assert not is_shared_array(arr)
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
+    # still usable in this process
+    arr[:] = 1
+    assert name in _unlinked_segments
+
+    del arr
+    assert name not in _unlinked_segments
+
+
+def test_execute_in_pool_on_freed_array_raises():
+    data = create_array((40, 5, 5))
+    data[:] = 0
+    free_shared_array(data)
+    assert is_freed_array(data)
+
+    # the workers would write to a copy, so the changes would be lost
+    with pytest.raises(RuntimeError, match="freed"):
+        ps.execute(ps.create_partial(_add_one, ps.inplace1), data.shape[0], progress=Progress(), cores=2, arrays=[data])
+    # the other backends work on the array directly
+    ps.execute(ps.create_partial(_add_one, ps.inplace1), data.shape[0], cores=2, arrays=[data], backend="thread")
+    np.testing.assert_equal(data, 1)
+
+
+@pytest.fixture
+def scratch_directory(tmp_path):
+    with mock.patch.object(pu, "SCRATCH_DIRECTORY", str(tmp_path)):
+        yield tmp_path
+
+
+def test_create_file_backed_array(scratch_directory):
+    arr = create_array((4, 5, 6), np.float32, StorageMode.FILE)
+
+    handle = get_shared_array_handle(np.swapaxes(arr, 0, 1)[2])
+    assert isinstance(handle, MappedArrayHandle)
+    assert os.path.dirname(handle.path) == str(scratch_directory)
+    assert os.path.getsize(handle.path) == arr.nbytes
+    assert is_shared_array(arr[1])
+    assert storage_of(arr[1]) == StorageMode.FILE
+    assert storage_of(create_array((2, 2))) == StorageMode.SHARED
+
+
+def test_attach_file_backed_array_view(scratch_directory):
+    arr = create_array((4, 5, 6), np.float32, StorageMode.FILE)
+    arr[:] = np.arange(arr.size).reshape(arr.shape)
+    view = np.swapaxes(arr, 0, 1)[2]
+
+    attached = attach_shared_array(get_shared_array_handle(view))
+    np.testing.assert_equal(attached, view)
+    attached[:] = -1
+    assert (arr[:, 2] == -1).all()
+
+
+def test_file_removed_when_array_collected(scratch_directory):
+    arr = create_array((4, 5, 6), np.float32, StorageMode.FILE)
+    view = arr[1:3]
+    path = get_shared_array_handle(arr).path
+
+    del arr
+    assert os.path.exists(path)
+    del view
+    assert path not in _mapped_files
+    assert not os.path.exists(path)
+
+
+def test_free_file_backed_array(scratch_directory):
+    arr = create_array((4, 5, 6), np.float32, StorageMode.FILE)
+    path = get_shared_array_handle(arr).path
+
+    free_shared_array(arr)
+    assert not os.path.exists(path)
+    assert not is_shared_array(arr)
+    assert is_freed_array(arr)
+    # still usable in this process
+    arr[:] = 1
+
+
+def test_remove_stale_scratch_files(scratch_directory):
+    arr = create_array((4, 5, 6), np.float32, StorageMode.FILE)
+    live = get_shared_array_handle(arr).path
+    stale = scratch_directory / "mantidimaging_123456_abcd.dat"
+    stale.write_bytes(b"0")
+    other = scratch_directory / "other_123456_abcd.dat"
+    other.write_bytes(b"0")
+
+    with mock.patch("psutil.pid_exists", side_effect=lambda pid: pid == os.getpid()):
+        removed = pu.remove_stale_scratch_files()
+
+    assert removed == [str(stale)]
+    assert os.path.exists(live)
+    assert other.exists()
+
+
+def test_create_file_backed_array_not_enough_space(scratch_directory):
+    with pytest.raises(RuntimeError, match="scratch directory"):
+        create_array((1024, 1024, 1024, 1024), np.float32, StorageMode.FILE)
+
+
+def test_execute_in_pool_on_file_backed_array(scratch_directory):
+    arr = create_array((12, 3, 3), np.float32, StorageMode.FILE)
+    ps.execute(ps.create_partial(_add_one, ps.inplace1), arr.shape[0], progress=Progress(), cores=2, arrays=[arr])
+
+    np.testing.assert_equal(arr, 1)
+
+
 if __name__ == "__main__":
     import pytest
 
     pytest.main([__file__])
+
+
+def test_allocation_listener_called_for_arrays_in_ram(scratch_directory):
+    listener = mock.Mock()
+    pu.set_allocation_listener(listener)
+    try:
+        create_array((2, 3, 4), np.float32)
+        create_array((2, 3, 4), np.float32, StorageMode.FILE)
+    finally:
+        pu.set_allocation_listener(None)
+
+    listener.assert_called_once_with(2 * 3 * 4 * 4)
+
+
+def test_shared_memory_in_use():
+    before = pu.shared_memory_in_use()
+    arr = create_array((10, 10, 10), np.float32)
+    assert pu.shared_memory_in_use() >= before + arr.nbytes
+
+    del arr
+    assert pu.shared_memory_in_use() == before
+
+
+def test_arrays_in_use_covers_views_of_the_same_memory():
+    arr = np.zeros((4, 5, 6), np.float32)
+    other = np.zeros((4, 5, 6), np.float32)
+
+    with pu.arrays_in_use([arr[1:3]]):
+        assert pu.is_array_in_use(arr)
+        assert pu.is_array_in_use(arr[2, ::-1])
+        assert not pu.is_array_in_use(arr[3])
+        assert not pu.is_array_in_use(other)
+
+    assert not pu.is_array_in_use(arr)
+
+
+def test_execute_marks_arrays_in_use():
+    arr = np.zeros((3, 4, 5), np.float32)
+    in_use = []
+
+    def record(image):
+        in_use.append(pu.is_array_in_use(arr))
+
+    ps.execute(ps.create_partial(record, ps.inplace1), 3, arrays=[arr], backend="serial")
+
+    assert in_use == [True, True, True]
+    assert not pu.is_array_in_use(arr)
@@ -0,0 +1,157 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Timings of the chunks of images processed by `utility.execute_impl`.
+
+Recording is enabled with `Progress.record_timings`. Every chunk records the process
+and thread that ran it, when it started and ended, and the indices it processed.
+The summary tells apart an operation limited by the kernel (high utilisation),
+by a few slow images (p99 much higher than p50), or by the executor (high idle fraction).
+
+Times are taken with time.time(), which is comparable between processes.
+"""
+import json
+import os
+import threading
+import time
+from logging import getLogger
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+LOG = getLogger(__name__)
+
+
+class ChunkTiming(NamedTuple):
+    pid: int
+    tid: int
+    start: float
+    end: float
+    first: int
+    stop: int
+
+    @property
+    def num_images(self) -> int:
+        return self.stop - self.first
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def worker(self) -> str:
+        return f"{self.pid}/{self.tid}"
+
+
+class TimingSummary(NamedTuple):
+    num_images: int
+    elapsed: float
+    throughput: float
+    # Fraction of the elapsed time each worker spent processing images, keyed by "pid/tid"
+    utilisation: Dict[str, float]
+    p50_latency: float
+    p99_latency: float
+    # Fraction of the time of all workers spent without processing images
+    idle_fraction: float
+    slowest_chunk: Tuple[int, int]
+
+    def __str__(self):
+        utilisation = ", ".join(f"{worker}: {value:.0%}" for worker, value in sorted(self.utilisation.items()))
+        return (f"{self.num_images} images in {self.elapsed:.3f}s ({self.throughput:.1f} images/s), "
+                f"chunk latency p50 {self.p50_latency * 1000:.1f}ms p99 {self.p99_latency * 1000:.1f}ms, "
+                f"slowest chunk {self.slowest_chunk[0]}-{self.slowest_chunk[1]}, "
+                f"idle {self.idle_fraction:.0%}, utilisation {utilisation}")
+
+
+def chunk_since(start: float, first: int, stop: int) -> ChunkTiming:
+    """
+    :return: The timing of images first to stop, processed by the current thread from start until now
+    """
+    return ChunkTiming(os.getpid(), threading.get_ident(), start, time.time(), first, stop)
+
+
+def run_timed(run_range: Callable[[Tuple[int, int]], int], bounds: Tuple[int, int]) -> ChunkTiming:
+    """
+    Runs the range of indices and records where and when it ran.
+    """
+    start = time.time()
+    run_range(bounds)
+    return chunk_since(start, bounds[0], bounds[1])
+
+
+class ExecutionTimings:
+    """
+    The chunks of one call of `execute_impl`.
+
+    :param msg: The message of the execution, used to name it in the summary and in traces
+    :param workers: The number of workers available to the execution, the idle fraction is relative to them
+    """
+    def __init__(self, msg: str, workers: int):
+        self.msg = msg
+        self.workers = workers
+        self.chunks: List[ChunkTiming] = []
+        self.start = time.time()
+        self.end = self.start
+
+    def add(self, chunk: ChunkTiming):
+        self.chunks.append(chunk)
+
+    def finish(self):
+        self.end = time.time()
+
+    def summary(self) -> TimingSummary:
+        elapsed = self.end - self.start
+        num_images = sum(chunk.num_images for chunk in self.chunks)
+        busy: Dict[str, float] = {}
+        for chunk in self.chunks:
+            busy[chunk.worker] = busy.get(chunk.worker, 0.0) + chunk.duration
+
+        durations = np.array([chunk.duration for chunk in self.chunks]) if self.chunks else np.zeros(1)
+        slowest = max(self.chunks, key=lambda chunk: chunk.duration) if self.chunks else None
+        return TimingSummary(
+            num_images=num_images,
+            elapsed=elapsed,
+            throughput=num_images / elapsed if elapsed > 0 else 0.0,
+            utilisation={worker: seconds / elapsed if elapsed > 0 else 0.0
+                         for worker, seconds in busy.items()},
+            p50_latency=float(np.percentile(durations, 50)),
+            p99_latency=float(np.percentile(durations, 99)),
+            idle_fraction=max(0.0, 1 - sum(busy.values()) / (elapsed * self.workers)) if elapsed > 0 else 0.0,
+            slowest_chunk=(slowest.first, slowest.stop) if slowest is not None else (0, 0))
+
+    def log_summary(self):
+        LOG.info(f"{self.msg}: {self.summary()}")
+
+    def trace_events(self) -> List[dict]:
+        """
+        :return: The chunks as complete events of the Chrome trace event format
+        """
+        return [{
+            "name": f"{self.msg} {chunk.first}-{chunk.stop}",
+            "cat": self.msg,
+            "ph": "X",
+            "ts": chunk.start * 1e6,
+            "dur": chunk.duration * 1e6,
+            "pid": chunk.pid,
+            "tid": chunk.tid,
+            "args": {
+                "first": chunk.first,
+                "stop": chunk.stop
+            }
+        } for chunk in self.chunks]
+
+
+def to_chrome_trace(executions: Iterable[ExecutionTimings]) -> dict:
+    """
+    :return: The chunks of all the executions in the Chrome trace event format,
+             which can be opened in chrome://tracing or https://ui.perfetto.dev
+    """
+    return {
+        "traceEvents": [event for execution in executions for event in execution.trace_events()],
+        "displayTimeUnit": "ms"
+    }
+
+
+def save_chrome_trace(executions: Iterable[ExecutionTimings], path: str):
+    with open(path, 'w') as f:
+        json.dump(to_chrome_trace(executions), f)
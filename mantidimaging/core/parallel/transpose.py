@@ -0,0 +1,76 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+"""
+Parallel copy of a stack with its first two axes swapped, turning projections into sinograms and vice versa.
+
+Swapping the first two axes keeps the rows of the images contiguous, but `np.swapaxes` copies them
+one at a time on a single core, reading every image of the stack for every sinogram. Here the stack
+is split into tiles of rows that fit in the cache, which are copied by all cores at the same time.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.parallel import shared as ps, utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+# Bytes copied by each tile, about the size of the per-core L2 cache
+TILE_BYTES = 1024 * 1024
+
+Tile = Tuple[int, int, int, int]
+
+
+def tiles(shape: Tuple[int, ...], itemsize: int, tile_bytes: int = TILE_BYTES) -> List[Tile]:
+    """
+    Splits the first two axes of the shape into blocks of about tile_bytes, as square as possible
+    so that both the rows read and the rows written are in long contiguous runs.
+
+    :return: The (start, stop) of the first axis and of the second axis of every tile
+    """
+    num_images, num_rows = shape[0], shape[1]
+    row_bytes = max(1, int(np.prod(shape[2:])) * itemsize)
+    rows_per_tile = max(1, tile_bytes // row_bytes)
+    side = max(1, math.isqrt(rows_per_tile))
+    image_step = min(num_images, side)
+    row_step = min(num_rows, max(1, rows_per_tile // image_step))
+    return [(i, min(i + image_step, num_images), r, min(r + row_step, num_rows)) for r in range(0, num_rows, row_step)
+            for i in range(0, num_images, image_step)]
+
+
+def _copy_tile(all_tiles: Tuple[Tile, ...], handles, i):
+    source, output = ps.get_array(handles[0]), ps.get_array(handles[1])
+    image_start, image_stop, row_start, row_stop = all_tiles[i]
+    output[row_start:row_stop, image_start:image_stop] = \
+        np.swapaxes(source[image_start:image_stop, row_start:row_stop], 0, 1)
+
+
+def swap_first_axes(source: np.ndarray,
+                    output: Optional[np.ndarray] = None,
+                    cores: Optional[int] = None,
+                    progress: Optional[Progress] = None) -> np.ndarray:
+    """
+    Copies the source into the output with the first two axes swapped, the same as
+    output[:] = np.swapaxes(source, 0, 1), using all cores.
+
+    :param output: The array to copy into, of shape (source.shape[1], source.shape[0], ...).
+                   Allocated with `pu.create_array` if None.
+    :return: The output array
+    """
+    shape = (source.shape[1], source.shape[0]) + source.shape[2:]
+    if output is None:
+        output = pu.create_array(shape, source.dtype)
+    elif output.shape != shape:
+        raise ValueError(f"The output shape {output.shape} is not the source shape {source.shape} with "
+                         f"the first two axes swapped")
+
+    all_tiles = tiles(source.shape, source.dtype.itemsize)
+    # the copy releases the GIL, threads avoid sending the tiles to other processes
+    ps.execute(ps.create_partial(tuple(all_tiles), _copy_tile),
+               len(all_tiles),
+               progress,
+               msg="Swapping axes",
+               cores=cores,
+               arrays=[source, output],
+               backend=pu.ExecutionBackend.THREAD)
+    return output
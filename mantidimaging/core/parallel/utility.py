@@ -1,93 +1,572 @@
 # Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
 # SPDX - License - Identifier: GPL-3.0-or-later
 
-import ctypes
 import multiprocessing
 import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from enum import Enum
 from functools import partial
+from itertools import islice
 from logging import getLogger
-from multiprocessing import Array
-from multiprocessing.pool import Pool
-from typing import Any, List, Tuple, Type, Union
+from multiprocessing.pool import AsyncResult
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type, Union
 
 import numpy as np
 
+from mantidimaging.core.parallel import manager
+from mantidimaging.core.parallel.timing import ChunkTiming, ExecutionTimings, chunk_since, run_timed
 from mantidimaging.core.utility.memory_usage import system_free_memory
-from mantidimaging.core.utility.progress_reporting import Progress
+from mantidimaging.core.utility.progress_reporting import Progress, TaskCancelled
 from mantidimaging.core.utility.size_calculator import full_size_KB
 
 LOG = getLogger(__name__)
 
-SimpleCType = Union[Type[ctypes.c_uint8], Type[ctypes.c_uint16], Type[ctypes.c_int32], Type[ctypes.c_int64],
-                    Type[ctypes.c_float], Type[ctypes.c_double]]
+# Images are timed in the main process for up to this long to measure the cost of the kernel
+CALIBRATION_SECONDS = 0.05
+MAX_CALIBRATION_ITEMS = 16
+# Aim for each worker task to take about this long, so the IPC cost per task is negligible
+TARGET_CHUNK_SECONDS = 0.1
+# Minimum number of tasks per worker, so slow images can be balanced across the other workers
+MIN_CHUNKS_PER_WORKER = 4
+# Tasks submitted ahead per worker. Tasks that have not been submitted are dropped straight away on cancel
+TASKS_AHEAD_PER_WORKER = 2
+# How often a running operation checks whether it has been cancelled
+CANCEL_POLL_SECONDS = 0.05
 
 NP_DTYPE = Type[np.single]
 
 
-def enough_memory(shape, dtype):
-    return full_size_KB(shape=shape, axis=0, dtype=dtype) < system_free_memory().kb()
+class ExecutionBackend(Enum):
+    """
+    How `execute_impl` runs the images in parallel.
+
+    PROCESS: in the worker processes of `parallel.manager`, the arrays must be in shared memory for changes to be kept
+    THREAD: in a pool of threads working on the arrays directly, for kernels that release the GIL
+    SERIAL: one image after another in the calling thread
+    """
+    PROCESS = "process"
+    THREAD = "thread"
+    SERIAL = "serial"
+
+
+class StorageMode(Enum):
+    """
+    Where `create_array` allocates the data. Both can be attached to by the worker processes.
+
+    SHARED: in a shared memory segment, kept in RAM
+    FILE: in a file in the scratch directory mapped into memory, the OS page cache decides which parts stay in RAM
+    """
+    SHARED = "shared"
+    FILE = "file"
+
+
+# Prefix for the names of the shared memory segments and files created by this application
+SHARED_MEMORY_PREFIX = "mantidimaging"
+SHARED_MEMORY_DIR = "/dev/shm"
+# Directory of the files backing the arrays created with StorageMode.FILE, the system temporary directory if None
+SCRATCH_DIRECTORY: Optional[str] = None
+
+
+class SharedArrayHandle(NamedTuple):
+    """
+    Picklable description of an array (or a view of one) allocated by `create_array`.
+
+    Any process can attach to the same memory with `attach_shared_array`,
+    without copying the data and independently of the start method used to create it.
+    """
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+    strides: Tuple[int, ...]
+    offset: int
+
+
+class MappedArrayHandle(NamedTuple):
+    """
+    Picklable description of an array (or a view of one) allocated by `create_array` with StorageMode.FILE.
+    Other processes attach to it with `attach_shared_array` by mapping the same file.
+    """
+    path: str
+    shape: Tuple[int, ...]
+    dtype: str
+    strides: Tuple[int, ...]
+    offset: int
+
+
+class _Segment(NamedTuple):
+    shared_memory: SharedMemory
+    address: int
+    size: int
+
+
+class _MappedFile(NamedTuple):
+    address: int
+    size: int
+
+
+# Segments created by this process that other processes can attach to, keyed by their name
+_segments: Dict[str, _Segment] = {}
+# Segments that have been unlinked but are still mapped, as the array using them is alive.
+# Closing the mapping before then would leave the array pointing to unmapped memory.
+_unlinked_segments: Dict[str, _Segment] = {}
+# Files backing the arrays created by this process with StorageMode.FILE, keyed by their path
+_mapped_files: Dict[str, _MappedFile] = {}
+# Files that have been removed but are still mapped, as the array using them is alive
+_unlinked_files: Dict[str, _MappedFile] = {}
+# Called with the size in bytes before `create_array` allocates an array in RAM, see `core.data.memory_manager`
+_allocation_listener: Optional[Callable[[int], None]] = None
+# The memory spans of the arrays being written, which must not be moved to other storage, see `arrays_in_use`
+_spans_in_use: List[Tuple[int, int]] = []
+_spans_in_use_lock = threading.Lock()
+
+
+def set_allocation_listener(listener: Optional[Callable[[int], None]]):
+    """
+    :param listener: Called with the size of every array `create_array` is about to allocate in RAM,
+                     before checking that there is enough memory for it. None removes the listener.
+    """
+    global _allocation_listener
+    _allocation_listener = listener
 
 
-def create_array(shape: Tuple[Any, ...], dtype: NP_DTYPE = np.float32) -> np.ndarray:
+def shared_memory_in_use() -> int:
+    """
+    :return: The bytes of the shared memory segments allocated by this process that are still mapped
     """
-    Create an array, either in a memory file (if name provided), or purely in memory (if name is None)
+    return sum(segment.size for segment in list(_segments.values()) + list(_unlinked_segments.values()))
+
+
+def scratch_directory() -> str:
+    return SCRATCH_DIRECTORY if SCRATCH_DIRECTORY is not None else tempfile.gettempdir()
+
+
+def enough_memory(shape, dtype, storage: StorageMode = StorageMode.SHARED):
+    size_kb = full_size_KB(shape=shape, axis=0, dtype=dtype)
+    if storage == StorageMode.FILE:
+        return size_kb < shutil.disk_usage(scratch_directory()).free / 1024
+    if os.path.isdir(SHARED_MEMORY_DIR) and size_kb >= shutil.disk_usage(SHARED_MEMORY_DIR).free / 1024:
+        return False
+    return size_kb < system_free_memory().kb()
+
+
+def create_array(shape: Tuple[Any, ...],
+                 dtype: NP_DTYPE = np.float32,
+                 storage: StorageMode = StorageMode.SHARED) -> np.ndarray:
+    """
+    Create an array in a named shared memory segment, or in a memory mapped file in the scratch directory,
+    which worker processes can attach to using the handle returned by `get_shared_array_handle`.
+
+    The segment or file is removed when the array (and every view of it) has been garbage collected,
+    or earlier with `free_shared_array`.
 
     :param shape: Shape of the array
     :param dtype: Dtype of the array
-    :param name: Name of the shared memory array. If None, a non-shared array will be created
-    :param random_name: Whether to randomise the name. Will discard anything in the `name` parameter
+    :param storage: Whether the array is kept in RAM or backed by a file
     :return: The created Numpy array
     """
-    if not enough_memory(shape, dtype):
+    storage = StorageMode(storage)
+    if storage == StorageMode.SHARED and _allocation_listener is not None:
+        _allocation_listener(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    if not enough_memory(shape, dtype, storage):
+        if storage == StorageMode.FILE:
+            raise RuntimeError(f"The scratch directory {scratch_directory()} does not have enough free space "
+                               "to allocate space for this data.")
         raise RuntimeError(
             "The machine does not have enough physical memory available to allocate space for this data.")
 
+    if storage == StorageMode.FILE:
+        return _create_mapped_array(shape, dtype)
     return _create_shared_array(shape, dtype)
 
 
-def _create_shared_array(shape, dtype: Union[str, np.dtype] = np.float32):
-    ctype: SimpleCType = ctypes.c_float  # default to numpy float32 / C type float
-    if dtype == np.uint8 or dtype == 'uint8':
-        ctype = ctypes.c_uint8
-        dtype = np.uint8
-    elif dtype == np.uint16 or dtype == 'uint16':
-        ctype = ctypes.c_uint16
-        dtype = np.uint16
-    elif dtype == np.int32 or dtype == 'int32':
-        ctype = ctypes.c_int32
-        dtype = np.int32
-    elif dtype == np.int64 or dtype == 'int64':
-        ctype = ctypes.c_int64
-        dtype = np.int64
-    elif dtype == np.float32 or dtype == 'float32':
-        ctype = ctypes.c_float
-        dtype = np.float32
-    elif dtype == np.float64 or dtype == 'float64':
-        ctype = ctypes.c_double
-        dtype = np.float64
+def _create_shared_array(shape, dtype: Union[str, NP_DTYPE, np.dtype] = np.float32) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) * dtype.itemsize
+    name = f"{SHARED_MEMORY_PREFIX}_{os.getpid()}_{secrets.token_hex(4)}"
+
+    LOG.info(f'Requested shared array with shape={shape}, size={size}, dtype={dtype}, name={name}')
+
+    # a segment can't be empty, the array still gets the requested (empty) shape
+    shared_memory = SharedMemory(name=name, create=True, size=max(size, 1))
+    data: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=shared_memory.buf)
+
+    _segments[name] = _Segment(shared_memory, data.__array_interface__['data'][0], shared_memory.size)
+    # views keep a reference to `data`, so this only runs once none of them are left
+    weakref.finalize(data, _release_segment, name)
+    return data
+
+
+def _create_mapped_array(shape, dtype: Union[str, NP_DTYPE, np.dtype] = np.float32) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) * dtype.itemsize
+    fd, path = tempfile.mkstemp(prefix=f"{SHARED_MEMORY_PREFIX}_{os.getpid()}_", suffix=".dat", dir=scratch_directory())
+    os.close(fd)
+
+    LOG.info(f'Requested file backed array with shape={shape}, size={size}, dtype={dtype}, path={path}')
+
+    # a file can't be mapped if it is empty, the array still gets the requested (empty) shape
+    mapped = np.memmap(path, dtype=np.uint8, mode="w+", shape=(max(size, 1), ))
+    data: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=mapped)
+
+    _mapped_files[path] = _MappedFile(data.__array_interface__['data'][0], mapped.size)
+    # views of `data` refer to `mapped` directly, so this only runs once none of them are left
+    weakref.finalize(mapped, _release_mapped_file, path)
+    return data
+
+
+def _release_mapped_file(path: str):
+    _mapped_files.pop(path, None)
+    _unlinked_files.pop(path, None)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_stale_scratch_files(directory: Optional[str] = None) -> List[str]:
+    """
+    Removes the files of arrays created with StorageMode.FILE by processes that are no longer running.
+    The files are only removed when their arrays are garbage collected, so a crash leaves them behind.
+
+    :param directory: The directory to sweep, the scratch directory if None
+    :return: The paths of the removed files
+    """
+    import psutil
 
-    length = 1
-    for axis_length in shape:
-        length *= axis_length
+    directory = directory if directory is not None else scratch_directory()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
 
-    size = ctypes.sizeof(ctype(1)) * length
+    # the files are named after the process that created them, see `_create_mapped_array`
+    pattern = re.compile(rf"{re.escape(SHARED_MEMORY_PREFIX)}_(\d+)_.*\.dat$")
+    removed = []
+    for name in names:
+        match = pattern.match(name)
+        if match is None or psutil.pid_exists(int(match.group(1))):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            os.remove(path)
+        except OSError as e:
+            LOG.warning(f"Could not remove the scratch file {path} left by a previous run: {e}")
+            continue
+        LOG.info(f"Removed the scratch file {path} left by process {match.group(1)}, which is no longer running")
+        removed.append(path)
+    return removed
 
-    LOG.info('Requested shared array with shape={}, length={}, size={}, ' 'dtype={}'.format(shape, length, size, dtype))
 
-    array = Array(ctype, length)
-    data = np.frombuffer(array.get_obj(), dtype=dtype)
+def _release_segment(name: str):
+    segment = _segments.pop(name, None) or _unlinked_segments.pop(name, None)
+    if segment is None:
+        return
+    segment.shared_memory.close()
+    try:
+        segment.shared_memory.unlink()
+    except FileNotFoundError:
+        pass
 
-    return data.reshape(shape)
+
+def _find_segment(array: np.ndarray) -> Optional[Tuple[str, _Segment]]:
+    address = array.__array_interface__['data'][0]
+    for name, segment in _segments.items():
+        if segment.address <= address < segment.address + segment.size:
+            return name, segment
+    return None
+
+
+def _find_mapped_file(array: np.ndarray) -> Optional[Tuple[str, _MappedFile]]:
+    address = array.__array_interface__['data'][0]
+    for path, mapped_file in _mapped_files.items():
+        if mapped_file.address <= address < mapped_file.address + mapped_file.size:
+            return path, mapped_file
+    return None
+
+
+def is_shared_array(array: np.ndarray) -> bool:
+    """
+    Checks whether the array (or the array it is a view of) was allocated by `create_array`,
+    and can therefore be attached to by other processes.
+    """
+    return isinstance(array, np.ndarray) and (_find_segment(array) is not None or _find_mapped_file(array) is not None)
+
+
+def is_freed_array(array: np.ndarray) -> bool:
+    """
+    Checks whether the array was allocated by `create_array` and has since been freed with `free_shared_array`,
+    so other processes can no longer attach to it
+    """
+    if not isinstance(array, np.ndarray):
+        return False
+    address = array.__array_interface__['data'][0]
+    freed = list(_unlinked_segments.values()) + list(_unlinked_files.values())
+    return any(memory.address <= address < memory.address + memory.size for memory in freed)
+
+
+def _byte_span(array: np.ndarray) -> Tuple[int, int]:
+    """
+    :return: The first and one past the last address of the memory the array (or view) covers
+    """
+    start = end = array.__array_interface__['data'][0]
+    if array.size == 0:
+        return start, start
+    for size, stride in zip(array.shape, array.strides):
+        if stride < 0:
+            start += (size - 1) * stride
+        else:
+            end += (size - 1) * stride
+    return start, end + array.itemsize
+
+
+@contextmanager
+def arrays_in_use(arrays: Iterable[np.ndarray]):
+    """
+    Marks the memory of the arrays as in use while the block runs, e.g. while an operation writes into them.
+    `core.data.memory_manager` doesn't move stacks whose data is in use, so the writes aren't lost.
+    """
+    spans = [_byte_span(array) for array in arrays if isinstance(array, np.ndarray)]
+    with _spans_in_use_lock:
+        _spans_in_use.extend(spans)
+    try:
+        yield
+    finally:
+        with _spans_in_use_lock:
+            for span in spans:
+                _spans_in_use.remove(span)
+
+
+def is_array_in_use(array: np.ndarray) -> bool:
+    """
+    Checks whether any of the memory of the array is marked in use by `arrays_in_use`
+    """
+    start, end = _byte_span(array)
+    with _spans_in_use_lock:
+        return any(used_start < end and start < used_end for used_start, used_end in _spans_in_use)
+
+
+def storage_of(array: np.ndarray) -> StorageMode:
+    """
+    :return: StorageMode.FILE if the array is backed by a file created by `create_array`, otherwise StorageMode.SHARED
+    """
+    return StorageMode.FILE if _find_mapped_file(array) is not None else StorageMode.SHARED
+
+
+def get_shared_array_handle(array: np.ndarray) -> Union[SharedArrayHandle, MappedArrayHandle, None]:
+    """
+    :return: The handle to attach to the memory of the array from another process,
+             or None if the array was not allocated by `create_array`
+    """
+    address = array.__array_interface__['data'][0]
+    found_file = _find_mapped_file(array)
+    if found_file is not None:
+        path, mapped_file = found_file
+        return MappedArrayHandle(path, array.shape, array.dtype.str, array.strides, address - mapped_file.address)
+    found = _find_segment(array)
+    if found is None:
+        return None
+    name, segment = found
+    return SharedArrayHandle(name, array.shape, array.dtype.str, array.strides, address - segment.address)
+
+
+def attach_shared_array(handle: Union[SharedArrayHandle, MappedArrayHandle]) -> np.ndarray:
+    """
+    Maps the memory described by the handle into this process, without copying it.
+
+    The mapping is closed when the returned array (and every view of it) has been garbage collected.
+    """
+    if isinstance(handle, MappedArrayHandle):
+        mapped = np.memmap(handle.path, dtype=np.uint8, mode="r+")
+        return np.ndarray(handle.shape,
+                          dtype=np.dtype(handle.dtype),
+                          buffer=mapped,
+                          offset=handle.offset,
+                          strides=handle.strides)
+
+    shared_memory = SharedMemory(name=handle.name)
+    array: np.ndarray = np.ndarray(handle.shape,
+                                   dtype=np.dtype(handle.dtype),
+                                   buffer=shared_memory.buf,
+                                   offset=handle.offset,
+                                   strides=handle.strides)
+    weakref.finalize(array, shared_memory.close)
+    return array
+
+
+def free_shared_array(array: np.ndarray):
+    """
+    Unlinks the shared memory segment or the file of the array, without waiting for it to be garbage collected.
+
+    The array stays usable in this process, but other processes can no longer attach to it.
+    The memory is returned to the system once every process has dropped its mapping.
+    """
+    found_file = _find_mapped_file(array)
+    if found_file is not None:
+        path = found_file[0]
+        _unlinked_files[path] = _mapped_files.pop(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    found = _find_segment(array)
+    if found is not None:
+        name, segment = found
+        _unlinked_segments[name] = _segments.pop(name)
+        try:
+            segment.shared_memory.unlink()
+        except FileNotFoundError:
+            pass
 
 
 def get_cores():
     return multiprocessing.cpu_count()
 
 
-def calculate_chunksize(cores):
-    # TODO possible proper calculation of chunksize, although best performance
-    # has been with 1
-    return 1
+def calculate_chunksize(num_items: int, cores: int, seconds_per_item: float) -> int:
+    """
+    Chooses how many consecutive images each worker task should process.
+
+    Cheap kernels are grouped so that a task takes around TARGET_CHUNK_SECONDS,
+    which amortises the IPC cost of sending the task. The size is capped so that
+    every worker gets at least MIN_CHUNKS_PER_WORKER tasks, leaving enough tasks in
+    the queue for the other workers to pick up if some images are much slower
+    than the ones that were timed.
+
+    :param num_items: Number of images left to process
+    :param cores: Number of worker processes
+    :param seconds_per_item: Measured time to process a single image
+    :return: The number of images per task, at least 1
+    """
+    if seconds_per_item > 0:
+        by_cost = int(TARGET_CHUNK_SECONDS / seconds_per_item)
+    else:
+        by_cost = num_items
+    by_balance = num_items // (cores * MIN_CHUNKS_PER_WORKER)
+    return max(1, min(by_cost, by_balance))
+
+
+def calibrate(partial_func: partial, num_items: int, progress: Progress, msg: str) -> Tuple[int, float]:
+    """
+    Processes images in this process until CALIBRATION_SECONDS have passed
+    (or MAX_CALIBRATION_ITEMS were processed) to measure the cost of the kernel.
+
+    :return: The number of images processed, and the average seconds per image
+    """
+    start = time.perf_counter()
+    done = 0
+    elapsed = 0.0
+    while done < min(num_items, MAX_CALIBRATION_ITEMS) and elapsed < CALIBRATION_SECONDS:
+        partial_func(done)
+        done += 1
+        progress.update(1, msg)
+        elapsed = time.perf_counter() - start
+
+    return done, elapsed / done if done else 0.0
+
+
+def _run_index_range(partial_func: partial, bounds: Tuple[int, int]) -> int:
+    for i in range(bounds[0], bounds[1]):
+        partial_func(i)
+    return bounds[1] - bounds[0]
+
+
+ArrayDescriptor = Union[SharedArrayHandle, MappedArrayHandle, np.ndarray]
+
+
+def _describe_arrays(arrays: Dict[int, np.ndarray]) -> Dict[int, ArrayDescriptor]:
+    """
+    Replaces the arrays allocated by `create_array` with their handles, so they are not pickled into
+    the workers. Any other array is sent by value, and changes made to it in the workers are lost.
+
+    :raises RuntimeError: If an array has been freed, as the changes made by the workers would be lost
+    """
+    descriptors: Dict[int, ArrayDescriptor] = {}
+    for key, array in arrays.items():
+        if is_freed_array(array):
+            raise RuntimeError("The memory of the data has been freed, e.g. by closing a stack that shares it, "
+                               "so it can't be processed by the worker processes")
+        handle = get_shared_array_handle(array) if isinstance(array, np.ndarray) else None
+        if handle is None:
+            LOG.warning("Array is not in shared memory and will be copied into every worker task")
+            descriptors[key] = array
+        else:
+            descriptors[key] = handle
+    return descriptors
+
+
+def _run_index_range_in_worker(partial_func: partial, descriptors: Dict[int, ArrayDescriptor],
+                               bounds: Tuple[int, int]) -> int:
+    """
+    Attaches to the shared arrays described by the handles and registers them in `parallel.shared`
+    under the same keys as in the main process for the duration of the task.
+    """
+    from mantidimaging.core.parallel import shared
+
+    for key, descriptor in descriptors.items():
+        if isinstance(descriptor, (SharedArrayHandle, MappedArrayHandle)):
+            descriptor = attach_shared_array(descriptor)
+        shared.register(descriptor, key)
+    try:
+        return _run_index_range(partial_func, bounds)
+    finally:
+        # the attached arrays are unmapped once nothing references them
+        for key in descriptors:
+            shared.unregister(key)
+
+
+def _wait_future(future: Future, timeout: float) -> Union[int, ChunkTiming, None]:
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        return None
+
+
+def _wait_async_result(result: AsyncResult, timeout: float) -> Union[int, ChunkTiming, None]:
+    try:
+        return result.get(timeout)
+    except multiprocessing.TimeoutError:
+        return None
+
+
+def _run_ranges(submit: Callable[[Tuple[int, int]], Any], wait: Callable[[Any, float], Union[int, ChunkTiming, None]],
+                ranges: List[Tuple[int, int]], tasks_ahead: int, progress: Progress, msg: str,
+                timings: Optional[ExecutionTimings]) -> List[Any]:
+    """
+    Runs the index ranges, with at most tasks_ahead of them submitted at a time,
+    and checks for cancellation while waiting for them.
+
+    :param submit: Starts running a range, returns the task
+    :param wait: Waits up to the timeout for a task and returns its result, or None if it isn't done.
+                 The result is the number of images processed, or the timing of the range if it was timed.
+    :param timings: Where the timings of the ranges are added, if they are timed
+    :return: The tasks that were submitted but not finished when the progress was cancelled, empty if it wasn't
+    """
+    remaining = iter(ranges)
+    pending = deque(submit(bounds) for bounds in islice(remaining, tasks_ahead))
+    while pending:
+        result = wait(pending[0], CANCEL_POLL_SECONDS)
+        if progress.should_cancel:
+            return list(pending)
+        if result is not None:
+            pending.popleft()
+            pending.extend(submit(bounds) for bounds in islice(remaining, 1))
+            if isinstance(result, ChunkTiming):
+                if timings is not None:
+                    timings.add(result)
+                result = result.num_images
+            progress.update(result, msg, force_continue=True)
+    return []
 
 
 def multiprocessing_necessary(shape: Union[int, Tuple[int, int, int], List], cores) -> bool:
@@ -114,16 +593,95 @@ def multiprocessing_necessary(shape: Union[int, Tuple[int, int, int], List], cor
     return True
 
 
-def execute_impl(img_num: int, partial_func: partial, cores: int, chunksize: int, progress: Progress, msg: str):
-    task_name = f"{msg} {cores}c {chunksize}chs"
+def execute_impl(img_num: int,
+                 partial_func: partial,
+                 cores: int,
+                 chunksize: Optional[int],
+                 progress: Progress,
+                 msg: str,
+                 shared_arrays: Optional[Dict[int, np.ndarray]] = None,
+                 backend: ExecutionBackend = ExecutionBackend.PROCESS):
+    """
+    Runs partial_func for every index in range(img_num).
+
+    When run in parallel the images are sent to the workers as ranges of indices.
+    If chunksize is None the size of the ranges is chosen by timing the first
+    few images in this process, see `calibrate` and `calculate_chunksize`.
+
+    The progress is checked for cancellation while the images are processed. When cancelled,
+    the images that have not been started are dropped and the worker processes are terminated,
+    so that nothing is written to the arrays after this returns. The images already processed
+    keep their new values, the ones processed at the time of the cancellation may be partially written.
+
+    If the progress has record_timings set, the time taken by every chunk of images is recorded,
+    summarised in the log and added to progress.execution_timings, see `parallel.timing`.
+
+    :param shared_arrays: The arrays used by partial_func, keyed by their handle in `parallel.shared`
+    :param backend: Whether to run in the worker processes, in threads, or serially
+    :raises TaskCancelled: If the progress was cancelled
+    """
+    task_name = f"{msg} {cores}c {chunksize if chunksize else 'auto'}chs {backend.value}"
     progress = Progress.ensure_instance(progress, num_steps=img_num, task_name=task_name)
     indices_list = range(img_num)
-    if multiprocessing_necessary(img_num, cores):
-        with Pool(cores) as pool:
-            for _ in pool.imap(partial_func, indices_list, chunksize=chunksize):
-                progress.update(1, msg)
+    parallel = backend != ExecutionBackend.SERIAL and multiprocessing_necessary(img_num, cores)
+    timings = None
+    # not every progress has the attribute, e.g. mocked ones
+    if getattr(progress, "record_timings", False) is True:
+        timings = ExecutionTimings(msg, cores if parallel else 1)
+
+    if parallel:
+        if backend == ExecutionBackend.PROCESS:
+            # described before anything runs, so an array the workers can't attach to is left untouched
+            descriptors = _describe_arrays(shared_arrays if shared_arrays is not None else {})
+        start = 0
+        if chunksize is None:
+            calibration_start = time.time()
+            start, seconds_per_item = calibrate(partial_func, img_num, progress, msg)
+            if timings is not None:
+                timings.add(chunk_since(calibration_start, 0, start))
+            chunksize = calculate_chunksize(img_num - start, cores, seconds_per_item)
+            LOG.info(f"Measured {seconds_per_item:.6f}s per image, using {chunksize} images per task")
+
+        ranges = [(i, min(i + chunksize, img_num)) for i in range(start, img_num, chunksize)]
+        tasks_ahead = cores * TASKS_AHEAD_PER_WORKER
+        if backend == ExecutionBackend.THREAD:
+            # the threads see the arrays in the registry of this process, nothing is copied
+            with ThreadPoolExecutor(cores) as executor:
+                run_range: Callable = partial(_run_index_range, partial_func)
+                if timings is not None:
+                    run_range = partial(run_timed, run_range)
+                running = _run_ranges(partial(executor.submit, run_range), _wait_future, ranges, tasks_ahead, progress,
+                                      msg, timings)
+                # threads can't be stopped, leaving the executor waits for the ranges they have started
+                for future in running:
+                    future.cancel()
+        else:
+            with manager.use_pool(cores) as pool:
+                run_range = partial(_run_index_range_in_worker, partial_func, descriptors)
+                if timings is not None:
+                    run_range = partial(run_timed, run_range)
+                running = _run_ranges(lambda bounds: pool.apply_async(run_range, (bounds, )), _wait_async_result,
+                                      ranges, tasks_ahead, progress, msg, timings)
+                if running and not manager.terminate_pool():
+                    LOG.info("Pool is used by another operation, waiting for the running tasks to finish")
+                    for result in running:
+                        result.wait()
+        _finish_timings(progress, timings)
+        if progress.should_cancel:
+            raise TaskCancelled(f"{msg} has been cancelled")
     else:
         for ind in indices_list:
+            image_start = time.time()
             partial_func(ind)
+            if timings is not None:
+                timings.add(chunk_since(image_start, ind, ind + 1))
             progress.update(1, msg)
+        _finish_timings(progress, timings)
     progress.mark_complete()
+
+
+def _finish_timings(progress: Progress, timings: Optional[ExecutionTimings]):
+    if timings is not None:
+        timings.finish()
+        timings.log_summary()
+        progress.execution_timings.append(timings)
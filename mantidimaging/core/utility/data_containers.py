@@ -14,6 +14,8 @@ from typing import Optional
 
 import numpy
 
+from mantidimaging.core.parallel.utility import StorageMode
+
 
 @dataclass
 class SingleValue:
@@ -123,6 +125,13 @@ class ImageParameters:
     prefix: str
     indices: Optional[Indices] = None
     log_file: Optional[str] = None
+    storage: StorageMode = StorageMode.SHARED
+    # decode the images when they are first used, see LazyImages
+    lazy: bool = False
+    # number of files read at once, chosen for the storage the files are on if None
+    readers: Optional[int] = None
+    # load only the mean or median of the images, see img_loader.REFERENCE_METHODS
+    reference: Optional[str] = None
 
 
 class LoadingParameters:
@@ -27,6 +27,15 @@ def system_free_memory():
     return Value(meminfo.available - meminfo.total * MEMORY_CAP_PERCENTAGE)
 
 
+def system_total_memory() -> int:
+    """
+    :return: The physical memory of the system in bytes
+    """
+    import psutil
+
+    return psutil.virtual_memory().total
+
+
 def get_memory_usage_linux(kb=False, mb=False):
     """
     :param kb: Return the value in Kilobytes
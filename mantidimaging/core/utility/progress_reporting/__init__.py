@@ -1,5 +1,5 @@
 # Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
 # SPDX - License - Identifier: GPL-3.0-or-later
 
-from .progress import Progress, ProgressHandler  # noqa: F401
+from .progress import Progress, ProgressHandler, TaskCancelled  # noqa: F401
 from .console_progress_bar import ConsoleProgressBar  # noqa: F401
@@ -5,15 +5,25 @@ import threading
 import time
 from collections import namedtuple
 from logging import getLogger
-from typing import List
+from typing import List, TYPE_CHECKING
 
 import numpy
 
 from mantidimaging.core.utility.memory_usage import get_memory_usage_linux_str
 
+if TYPE_CHECKING:
+    from mantidimaging.core.parallel.timing import ExecutionTimings  # pragma: no cover
+
 ProgressHistory = namedtuple('ProgressHistory', ['time', 'step', 'msg'])
 
 
+class TaskCancelled(RuntimeError):
+    """
+    Raised in the task when its progress has been cancelled.
+    """
+    pass
+
+
 class ProgressHandler(object):
     def __init__(self):
         self.progress = None
@@ -74,6 +84,11 @@ class Progress(object):
         # Flag to indicate cancellation of the current task
         self.cancel_msg = None
 
+        # Whether the parallel executions of the task record the timings of their chunks,
+        # and the recorded timings, see parallel.timing
+        self.record_timings = False
+        self.execution_timings: List['ExecutionTimings'] = []
+
         # Add initial step to history
         self.update(0, 'init')
 
@@ -208,7 +223,7 @@ class Progress(object):
 
         # Force cancellation on progress update
         if self.should_cancel and not force_continue:
-            raise RuntimeError('Task has been cancelled')
+            raise TaskCancelled('Task has been cancelled')
 
     def cancel(self, msg='cancelled'):
         """
@@ -6,7 +6,7 @@ from logging import getLogger
 from enum import Enum
 from PyQt5 import Qt
 
-from mantidimaging.core.utility.progress_reporting import ProgressHandler
+from mantidimaging.core.utility.progress_reporting import ProgressHandler, TaskCancelled
 
 from .model import AsyncTaskDialogModel
 
@@ -53,10 +53,22 @@ class AsyncTaskDialogPresenter(Qt.QObject, ProgressHandler):
         self.model.do_execute_async()
         self.view.show()
 
+    def stop_processing(self):
+        """
+        Cancels the task, it stops at the next check of its progress.
+        """
+        if self.progress is not None and self.task_is_running:
+            self.progress.cancel("Cancelled")
+            self.view.set_cancelling()
+
     @property
     def task_is_running(self):
         return self.model.task_is_running
 
+    @property
+    def task_was_cancelled(self):
+        return isinstance(self.model.task.error, TaskCancelled)
+
     def progress_update(self):
         msg = self.progress.last_status_message()
         self.progress_updated.emit(self.progress.completion(), msg if msg is not None else '')
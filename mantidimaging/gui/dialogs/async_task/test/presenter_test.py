@@ -6,6 +6,7 @@ import unittest
 
 from unittest import mock
 
+from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.gui.dialogs.async_task import (AsyncTaskDialogPresenter, AsyncTaskDialogView)
 from mantidimaging.gui.dialogs.async_task.presenter import Notification
 
@@ -29,3 +30,34 @@ class AsyncTaskDialogPresenterTest(unittest.TestCase):
 
         p.model.task.wait()
         self.assertFalse(p.task_is_running)
+
+    def test_stop_processing_cancels_task(self):
+        def f(progress):
+            while True:
+                time.sleep(0.01)
+                progress.update()
+
+        v = mock.create_autospec(AsyncTaskDialogView)
+        p = AsyncTaskDialogPresenter(v)
+        progress = Progress()
+        progress.add_progress_handler(p)
+        p.set_task(f)
+        p.set_parameters(progress=progress)
+
+        p.notify(Notification.START)
+        p.stop_processing()
+        p.model.task.wait()
+
+        self.assertTrue(p.task_was_cancelled)
+        v.set_cancelling.assert_called_once()
+
+    def test_stop_processing_when_not_running(self):
+        v = mock.create_autospec(AsyncTaskDialogView)
+        p = AsyncTaskDialogPresenter(v)
+        progress = Progress()
+        progress.add_progress_handler(p)
+
+        p.stop_processing()
+
+        self.assertFalse(progress.should_cancel)
+        v.set_cancelling.assert_not_called()
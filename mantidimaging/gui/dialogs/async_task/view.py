@@ -23,20 +23,31 @@ class AsyncTaskDialogView(BaseDialogView):
 
         self.progress_text = self.infoText.text()
 
+        self.cancelButton.clicked.connect(self.presenter.stop_processing)
+
     def reject(self):
-        # Do not close the dialog when processing is still ongoing
-        if not self.presenter.task_is_running:
+        # Do not close the dialog when processing is still ongoing, cancel the task instead
+        if self.presenter.task_is_running:
+            self.presenter.stop_processing()
+        else:
             super(AsyncTaskDialogView, self).reject()
 
+    def set_cancelling(self):
+        self.cancelButton.setEnabled(False)
+        self.infoText.setText("Cancelling...")
+
     def handle_completion(self, successful):
         """
         Updates the UI after the task has been completed.
 
         :param successful: If the task was successful
         """
+        self.cancelButton.setEnabled(False)
         if successful:
             # Set info text to "Complete"
             self.infoText.setText("Complete")
+        elif self.presenter.task_was_cancelled:
+            self.infoText.setText("Cancelled")
         else:
             self.infoText.setText("Task failed.")
 
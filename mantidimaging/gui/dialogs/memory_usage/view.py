@@ -0,0 +1,95 @@
+# Copyright (C) 2021 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+
+from PyQt5.QtCore import QSettings
+from PyQt5.QtWidgets import (QDialog, QGridLayout, QHeaderView, QLabel, QPushButton, QSpinBox, QTableWidget,
+                             QTableWidgetItem)
+
+from mantidimaging.core.data.memory_manager import MB, memory_manager
+from mantidimaging.core.operation_history import undo_journal
+from mantidimaging.core.parallel import utility as pu
+
+BUDGET_SETTING = "memory/budget_mb"
+UNDO_BUDGET_SETTING = "memory/undo_budget_mb"
+
+
+def load_budget_setting():
+    """
+    Sets the budget of the memory manager from the settings, a budget of 0 means the default budget.
+    Also sets the disk budget of the undo history, a budget of 0 means undo is off.
+    """
+    budget_mb = QSettings().value(BUDGET_SETTING, defaultValue=0, type=int)
+    memory_manager.budget_mb = budget_mb if budget_mb > 0 else None
+    undo_journal.set_undo_disk_budget(QSettings().value(UNDO_BUDGET_SETTING, defaultValue=0, type=int))
+
+
+class MemoryUsageDialog(QDialog):
+    COLUMNS = ["Stack", "Size (MB)", "Stored in", "In use"]
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Memory usage")
+
+        layout = QGridLayout()
+        self.setLayout(layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table, 0, 0, 1, 3)
+
+        self.total_label = QLabel(self)
+        layout.addWidget(self.total_label, 1, 0, 1, 3)
+
+        layout.addWidget(QLabel("Memory budget (MB)", self), 2, 0)
+        self.budget = QSpinBox(self)
+        self.budget.setRange(0, 2**31 - 1)
+        self.budget.setSpecialValueText("Default")
+        self.budget.setToolTip("The memory the stacks can take in RAM before the least recently used ones are "
+                               "moved to the scratch directory. Default is 80% of the physical memory.")
+        self.budget.setValue(int(memory_manager.budget_mb or 0))
+        self.budget.valueChanged.connect(self.set_budget)
+        layout.addWidget(self.budget, 2, 1)
+
+        self.refresh_button = QPushButton("Refresh", self)
+        self.refresh_button.clicked.connect(self.refresh)
+        layout.addWidget(self.refresh_button, 2, 2)
+
+        layout.addWidget(QLabel("Undo history (MB)", self), 3, 0)
+        self.undo_budget = QSpinBox(self)
+        self.undo_budget.setRange(0, 2**31 - 1)
+        self.undo_budget.setSpecialValueText("Off")
+        self.undo_budget.setToolTip("The disk space in the scratch directory the snapshots of each stack can take, "
+                                    "so that the last operations applied to it can be undone. A snapshot is taken "
+                                    "every time an operation is applied, which makes operations slower.")
+        self.undo_budget.setValue(int(undo_journal.UNDO_DISK_BUDGET_MB))
+        self.undo_budget.valueChanged.connect(self.set_undo_budget)
+        layout.addWidget(self.undo_budget, 3, 1)
+
+        self.resize(500, 300)
+        self.refresh()
+
+    def set_budget(self, budget_mb: int):
+        QSettings().setValue(BUDGET_SETTING, budget_mb)
+        memory_manager.budget_mb = budget_mb if budget_mb > 0 else None
+        self.refresh()
+
+    def set_undo_budget(self, budget_mb: int):
+        QSettings().setValue(UNDO_BUDGET_SETTING, budget_mb)
+        undo_journal.set_undo_disk_budget(budget_mb)
+
+    def refresh(self):
+        usage = memory_manager.usage()
+        self.table.setRowCount(len(usage))
+        for row, stack in enumerate(usage):
+            cells = [
+                stack.name, f"{stack.nbytes / MB:.1f}", "RAM" if stack.storage == pu.StorageMode.SHARED else "File",
+                "Yes" if stack.in_use else ""
+            ]
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+        self.total_label.setText(f"In RAM: {memory_manager.in_memory_bytes() / MB:.1f}MB of "
+                                 f"{memory_manager.budget_bytes / MB:.0f}MB budget")
@@ -5,6 +5,7 @@ from typing import Iterable
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.operation_history.operations import ops_to_partials, ImageOperation
+from mantidimaging.core.operations.pipeline import run_pipeline
 
 
 class OpHistoryCopyDialogModel:
@@ -15,7 +16,6 @@ class OpHistoryCopyDialogModel:
         if copy:
             self.images = self.images.copy()
 
-        to_apply = ops_to_partials(ops)
-        for op in to_apply:
-            op(self.images)
+        # the operations that work image by image are applied in a single pass over the stack
+        self.images = run_pipeline(self.images, ops_to_partials(ops))
         return self.images
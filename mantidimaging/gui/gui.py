@@ -9,6 +9,7 @@ import traceback
 import pyqtgraph
 from PyQt5.Qt import QApplication
 
+from mantidimaging.core.parallel import manager as pm, utility as pu
 from mantidimaging.gui.windows.main import MainWindowView
 
 
@@ -24,6 +25,9 @@ def execute():
     # all data will be row-major, so this needs to be specified as the default is col-major
     pyqtgraph.setConfigOptions(imageAxisOrder="row-major")
 
+    # start the worker processes before Qt is started, the first operation will not have to wait for them
+    pm.create_and_start_pool(pu.get_cores())
+
     # create the GUI event loop
     q_application, application_window = setup_application()
 
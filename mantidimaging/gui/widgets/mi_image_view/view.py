@@ -5,10 +5,13 @@ from time import sleep
 from typing import Callable, Optional, Tuple
 
 from PyQt5 import QtCore
+from PyQt5.QtGui import QTransform
 from PyQt5.QtWidgets import QApplication, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QAction
-from pyqtgraph import ROI, ImageItem, ImageView
+from pyqtgraph import ROI, ImageItem, ImageView, ViewBox
 from pyqtgraph.GraphicsScene.mouseEvents import HoverEvent
 
+from mantidimaging.core.data.lazy_images import LazyStack
+from mantidimaging.core.data.pyramid import ImagePyramid
 from mantidimaging.core.utility.close_enough_point import CloseEnoughPoint
 from mantidimaging.core.utility.histogram import set_histogram_log_scale
 from mantidimaging.core.utility.sensible_roi import SensibleROI
@@ -36,6 +39,9 @@ class MIImageView(ImageView):
     imageItem: ImageItem
 
     roi_changed_callback: Optional[Callable[[SensibleROI], None]] = None
+    pyramid: Optional[ImagePyramid] = None
+    # The reduction factor of the drawn image
+    display_factor = 1
 
     def __init__(self,
                  parent=None,
@@ -96,7 +102,10 @@ class MIImageView(ImageView):
         self.roi.hide()
         self.roi.sigRegionChangeFinished.connect(self.roiChanged)
         self.extend_roi_plot_mouse_press_handler()
+        # zoomed out stacks are drawn from the reduced images of their pyramid instead, see `set_pyramid`
         self.imageItem.setAutoDownsample(False)
+        if isinstance(self.view, ViewBox):
+            self.view.sigRangeChanged.connect(self._on_view_range_changed)
 
         self._last_mouse_hover_location = CloseEnoughPoint([0, 0])
 
@@ -134,6 +143,15 @@ class MIImageView(ImageView):
             # is outside of the new bounds. To prevent this happening again just reset back to 0, 0
             self._last_mouse_hover_location = CloseEnoughPoint([0, 0])
 
+    def quickMinMax(self, data):
+        """
+        Re-implements quickMinMax to only use the current image of a lazy stack,
+        as sampling the whole stack would decode most of its images.
+        """
+        if isinstance(data, LazyStack):
+            data = data[self.currentIndex]
+        return super().quickMinMax(data)
+
     def roiChanged(self):
         """
         Re-implements the roiChanged function to expect only 3D data,
@@ -150,6 +168,47 @@ class MIImageView(ImageView):
         if self.roi_changed_callback and roi is not None:
             self.roi_changed_callback(roi)
 
+    def set_pyramid(self, pyramid: Optional[ImagePyramid]):
+        """
+        Draws the images from the reduced level of the pyramid that matches the zoom.
+        The pyramid is only used while it has the same shape as the displayed image.
+        """
+        self.pyramid = pyramid
+        self.updateImage(autoHistogramRange=False)
+
+    def _factor_for_view(self) -> int:
+        if self.pyramid is None or self.image is None or self.image.ndim != 3 \
+                or self.pyramid.shape != self.image.shape or not isinstance(self.view, ViewBox):
+            return 1
+        pixel_size = self.view.viewPixelSize()
+        return self.pyramid.factor_for(min(pixel_size))
+
+    def _on_view_range_changed(self):
+        if self._factor_for_view() != self.display_factor:
+            self.updateImage(autoHistogramRange=False)
+
+    def updateImage(self, autoHistogramRange=True):
+        """
+        Re-implements updateImage to draw the current image from the pyramid when zoomed out,
+        scaled back up so that the view, ROI and hover coordinates are still of the full images
+        """
+        factor = self._factor_for_view()
+        if factor == 1:
+            if self.display_factor != 1:
+                self.imageItem.resetTransform()
+                self.display_factor = 1
+            return super().updateImage(autoHistogramRange)
+
+        if autoHistogramRange:
+            self.ui.histogram.setHistogramRange(self.levelMin, self.levelMax)
+        self.ui.roiPlot.show()
+        image = self.pyramid.image(self.currentIndex, factor)
+        if self.imageItem.axisOrder == 'col-major':
+            image = image.T
+        self.imageItem.setTransform(QTransform.fromScale(factor, factor))
+        self.display_factor = factor
+        self.imageItem.updateImage(image)
+
     def timeLineChanged(self):
         """
         Re-implements timeLineChanged function, and the only change
@@ -171,6 +230,11 @@ class MIImageView(ImageView):
         # image indices are in order [Z, X, Y]
         left, right = roi_pos.x, roi_pos.x + roi_size.x
         top, bottom = roi_pos.y, roi_pos.y + roi_size.y
+        if isinstance(self.image, LazyStack):
+            # the curve over the stack would decode every image, only the current one is averaged
+            region_avg = self.image[self.currentIndex, top:bottom, left:right].mean()
+            self.roiString = f"({left}, {top}, {right}, {bottom}) | region avg={region_avg:.6f}"
+            return SensibleROI(left, top, right, bottom)
         data = self.image[:, top:bottom, left:right]
         if data is not None:
             while data.ndim > 1:
@@ -200,7 +264,8 @@ class MIImageView(ImageView):
     def image_hover_event(self, event: HoverEvent):
         if event.exit:
             return
-        pt = CloseEnoughPoint(event.pos())
+        pos = event.pos()
+        pt = CloseEnoughPoint([pos.x() * self.display_factor, pos.y() * self.display_factor])
         self._last_mouse_hover_location = pt
         self._update_message(pt)
 
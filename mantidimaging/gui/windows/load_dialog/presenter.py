@@ -9,8 +9,10 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
 from mantidimaging.core.io.loader import load_log
+from mantidimaging.core.io.loader.img_loader import REFERENCE_MEAN, REFERENCE_MEDIAN
 from mantidimaging.core.io.loader.loader import read_in_file_information, FileInformation
 from mantidimaging.core.io.utility import get_file_extension, get_prefix, find_images, find_log, find_180deg_proj
+from mantidimaging.core.parallel.utility import StorageMode
 from mantidimaging.core.utility.data_containers import LoadingParameters, ImageParameters
 from mantidimaging.gui.windows.load_dialog.field import Field
 
@@ -18,6 +20,9 @@ if TYPE_CHECKING:
     from mantidimaging.gui.windows.load_dialog import MWLoadDialog  # pragma: no cover
 logger = getLogger(__name__)
 
+# Options of the flat and dark images combo box that load only a reference image
+FLAT_DARK_REFERENCES = {"Mean": REFERENCE_MEAN, "Median": REFERENCE_MEDIAN}
+
 
 class Notification(Enum):
     UPDATE_ALL_FIELDS = auto()
@@ -130,7 +135,8 @@ class LoadPresenter:
                                     format=self.image_format,
                                     prefix=get_prefix(self.view.sample.path_text()),
                                     indices=self.view.sample.indices,
-                                    log_file=sample_log)
+                                    log_file=sample_log,
+                                    lazy=self.view.load_on_demand.isChecked())
 
         lp.name = self.view.sample.file()
         lp.pixel_size = self.view.pixelSize.value()
@@ -170,6 +176,16 @@ class LoadPresenter:
         lp.sinograms = self.view.images_are_sinograms.isChecked()
         lp.pixel_size = self.view.pixelSize.value()
 
+        storage = StorageMode.FILE if self.view.images_file_backed.isChecked() else StorageMode.SHARED
+        for parameters in [lp.sample, lp.flat_before, lp.flat_after, lp.dark_before, lp.dark_after, lp.proj_180deg]:
+            if parameters is not None:
+                parameters.storage = storage
+
+        reference = FLAT_DARK_REFERENCES.get(self.view.flat_dark_reference.currentText())
+        for parameters in [lp.flat_before, lp.flat_after, lp.dark_before, lp.dark_after]:
+            if parameters is not None:
+                parameters.reference = reference
+
         return lp
 
     def _update_field_action(self, field: Field, file_name):
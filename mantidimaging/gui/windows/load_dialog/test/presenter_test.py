@@ -6,6 +6,7 @@ from pathlib import Path
 from unittest import mock
 
 from mantidimaging.core.io.loader.loader import FileInformation
+from mantidimaging.core.parallel.utility import StorageMode
 from mantidimaging.core.utility.imat_log_file_parser import IMATLogFile
 from mantidimaging.gui.windows.load_dialog.presenter import LoadPresenter, Notification, logger
 
@@ -276,6 +277,9 @@ class LoadDialogPresenterTest(unittest.TestCase):
         self.v.dark_after.directory.return_value = dark_directory
         self.v.pixel_bit_depth.currentText.return_value = dtype
         self.v.images_are_sinograms.isChecked.return_value = sinograms
+        self.v.images_file_backed.isChecked.return_value = True
+        self.v.flat_dark_reference.currentText.return_value = "Median"
+        self.v.load_on_demand.isChecked.return_value = True
         self.v.proj_180deg.path_text.return_value = proj180deg_file
         self.v.proj_180deg.directory.return_value = proj180deg_directory
         self.v.sample.path_text.return_value = sample_path_text
@@ -288,6 +292,7 @@ class LoadDialogPresenterTest(unittest.TestCase):
         self.assertEqual(lp.sample.format, image_format)
         self.assertEqual(lp.sample.prefix, "/path")
         self.assertEqual(lp.sample.indices, sample_indices)
+        self.assertTrue(lp.sample.lazy)
         self.assertEqual(lp.name, sample_file_name)
         self.assertEqual(lp.pixel_size, pixel_size)
         self.assertEqual(lp.flat_before.prefix, "/path")
@@ -309,6 +314,11 @@ class LoadDialogPresenterTest(unittest.TestCase):
         self.assertEqual(lp.proj_180deg.format, image_format)
         self.assertEqual(lp.dtype, dtype)
         self.assertEqual(lp.sinograms, sinograms)
+        for parameters in [lp.sample, lp.flat_before, lp.flat_after, lp.dark_before, lp.dark_after, lp.proj_180deg]:
+            self.assertEqual(parameters.storage, StorageMode.FILE)
+        for parameters in [lp.flat_before, lp.flat_after, lp.dark_before, lp.dark_after]:
+            self.assertEqual(parameters.reference, "median")
+        self.assertIsNone(lp.sample.reference)
         self.assertEqual(lp.pixel_size, pixel_size)
         self.assertTrue(mock.call(sample_path_text) in get_prefix.call_args_list)
         self.assertTrue(mock.call(flat_file_name) in get_prefix.call_args_list)
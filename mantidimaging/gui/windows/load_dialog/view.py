@@ -18,6 +18,9 @@ class MWLoadDialog(Qt.QDialog):
     tree: QTreeWidget
     pixel_bit_depth: QComboBox
     images_are_sinograms: QCheckBox
+    images_file_backed: QCheckBox
+    load_on_demand: QCheckBox
+    flat_dark_reference: QComboBox
 
     pixelSize: QSpinBox
 
@@ -118,7 +121,7 @@ class MWLoadDialog(Qt.QDialog):
         :return: True: If a file has been selected, False otherwise
         """
         if image_file:
-            file_filter = "Images (*.png *.jpg *.tif *.tiff *.fit *.fits)"
+            file_filter = "Images (*.png *.jpg *.tif *.tiff *.fit *.fits *.nxs)"
         else:
             # Assume text file
             file_filter = "Log File (*.txt *.log *.csv)"
@@ -10,6 +10,7 @@ from PyQt5.QtWidgets import QDockWidget
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.data.memory_manager import memory_manager
 from mantidimaging.core.io import loader, saver
 from mantidimaging.core.utility.data_containers import LoadingParameters, ProjectionAngles
 from mantidimaging.gui.windows.stack_visualiser import StackVisualiserView
@@ -23,6 +24,8 @@ class MainWindowModel(object):
         super(MainWindowModel, self).__init__()
 
         self.active_stacks: Dict[uuid.UUID, QDockWidget] = {}
+        # the stacks of flat and dark images loaded with each sample stack, by their name in a Dataset
+        self.references: Dict[uuid.UUID, Dict[str, uuid.UUID]] = {}
 
     def do_load_stack(self, parameters: LoadingParameters, progress):
         ds = Dataset(loader.load_p(parameters.sample, parameters.dtype, progress))
@@ -55,7 +58,8 @@ class MainWindowModel(object):
     def load_stack(file_path: str, progress) -> Images:
         return loader.load_stack(file_path, progress)
 
-    def do_saving(self, stack_uuid, output_dir, name_prefix, image_format, overwrite, pixel_depth, progress):
+    def do_saving(self, stack_uuid, output_dir, name_prefix, image_format, overwrite, pixel_depth, progress,
+                  nexus_chunking, nexus_compression):
         svp = self.get_stack_visualiser(stack_uuid).presenter
         filenames = saver.save(svp.images,
                                output_dir=output_dir,
@@ -63,7 +67,10 @@ class MainWindowModel(object):
                                overwrite_all=overwrite,
                                out_format=image_format,
                                pixel_depth=pixel_depth,
-                               progress=progress)
+                               progress=progress,
+                               references=self.get_references(stack_uuid),
+                               nexus_chunking=nexus_chunking,
+                               nexus_compression=nexus_compression)
         svp.images.filenames = filenames
         return True
 
@@ -96,8 +103,24 @@ class MainWindowModel(object):
     def add_stack(self, stack_visualiser: StackVisualiserView):
         stack_visualiser.uuid = uuid.uuid1()
         self.active_stacks[stack_visualiser.uuid] = stack_visualiser
+        memory_manager.register(stack_visualiser.presenter.images, lambda: stack_visualiser.name)
         logger.debug(f"Active stacks: {self.active_stacks}")
 
+    def set_references(self, sample_uuid: uuid.UUID, references: Dict[str, uuid.UUID]):
+        """
+        :param references: The stacks of flat and dark images loaded with the sample, by their name in a Dataset
+        """
+        self.references[sample_uuid] = references
+
+    def get_references(self, sample_uuid: uuid.UUID) -> Dict[str, Images]:
+        """
+        :return: The current images of the flat and dark stacks loaded with the sample that are still open
+        """
+        return {
+            name: self.active_stacks[stack_uuid].presenter.images  # type:ignore
+            for name, stack_uuid in self.references.get(sample_uuid, {}).items() if stack_uuid in self.active_stacks
+        }
+
     def get_stack(self, stack_uuid: uuid.UUID) -> QDockWidget:
         """
         :param stack_uuid: The unique ID of the stack that will be retrieved.
@@ -116,7 +139,9 @@ class MainWindowModel(object):
             stack.image_view.setImage(images.data)
 
             # Free previous images stack before reassignment
+            memory_manager.unregister(stack.presenter.images)
             stack.presenter.images = images
+            memory_manager.register(images, lambda: stack.name)
 
     def get_stack_by_name(self, search_name: str) -> Optional[QDockWidget]:
         for stack_id in self.stack_list:
@@ -136,7 +161,9 @@ class MainWindowModel(object):
         :param stack_uuid: The unique ID of the stack that will be retrieved.
         :return The Stack Visualiser widget that contains the data.
         """
-        return self.active_stacks[stack_uuid]  # type:ignore
+        stack_visualiser = self.active_stacks[stack_uuid]
+        memory_manager.touch(stack_visualiser.presenter.images)
+        return stack_visualiser  # type:ignore
 
     def get_all_stack_visualisers(self) -> List[StackVisualiserView]:
         return [stack for stack in self.active_stacks.values()]  # type:ignore
@@ -156,7 +183,9 @@ class MainWindowModel(object):
 
         :param stack_uuid: The unique ID of the stack that will be removed.
         """
+        memory_manager.unregister(self.active_stacks[stack_uuid].presenter.images)
         del self.active_stacks[stack_uuid]
+        self.references.pop(stack_uuid, None)
 
     @property
     def have_active_stacks(self) -> bool:
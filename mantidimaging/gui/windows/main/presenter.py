@@ -10,7 +10,7 @@ from uuid import UUID
 from PyQt5.QtWidgets import QTabBar, QApplication
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.data.dataset import REFERENCE_STACKS, Dataset
 from mantidimaging.core.io.loader.loader import create_loading_parameters_for_file_path
 from mantidimaging.core.utility.data_containers import ProjectionAngles, LoadingParameters
 from mantidimaging.gui.dialogs.async_task import start_async_task_view
@@ -110,6 +110,7 @@ class MainWindowPresenter(BasePresenter):
         stack_visualiser = self.view.create_stack_window(images, title=f"{name}")
         self.model.add_stack(stack_visualiser)
         self.view.tabifyDockWidget(sample_dock, stack_visualiser)
+        return stack_visualiser
 
     def create_new_stack(self, container: Union[Images, Dataset], title: str):
         title = self.model.create_name(title)
@@ -123,14 +124,12 @@ class MainWindowPresenter(BasePresenter):
             self.view.tabifyDockWidget(current_stack_visualisers[0], sample_stack_vis)
 
         if isinstance(container, Dataset):
-            if container.flat_before and container.flat_before.filenames:
-                self._add_stack(container.flat_before, container.flat_before.filenames[0], sample_stack_vis)
-            if container.flat_after and container.flat_after.filenames:
-                self._add_stack(container.flat_after, container.flat_after.filenames[0], sample_stack_vis)
-            if container.dark_before and container.dark_before.filenames:
-                self._add_stack(container.dark_before, container.dark_before.filenames[0], sample_stack_vis)
-            if container.dark_after and container.dark_after.filenames:
-                self._add_stack(container.dark_after, container.dark_after.filenames[0], sample_stack_vis)
+            references = {}
+            for name in REFERENCE_STACKS:
+                images = getattr(container, name)
+                if images and images.filenames:
+                    references[name] = self._add_stack(images, images.filenames[0], sample_stack_vis).uuid
+            self.model.set_references(sample_stack_vis.uuid, references)
             if container.sample.has_proj180deg() and container.sample.proj180deg.filenames:
                 self._add_stack(container.sample.proj180deg, container.sample.proj180deg.filenames[0], sample_stack_vis)
 
@@ -153,7 +152,9 @@ class MainWindowPresenter(BasePresenter):
             'name_prefix': self.view.save_dialogue.name_prefix(),
             'image_format': self.view.save_dialogue.image_format(),
             'overwrite': self.view.save_dialogue.overwrite(),
-            'pixel_depth': self.view.save_dialogue.pixel_depth()
+            'pixel_depth': self.view.save_dialogue.pixel_depth(),
+            'nexus_chunking': self.view.save_dialogue.nexus_chunking(),
+            'nexus_compression': self.view.save_dialogue.nexus_compression()
         }
         start_async_task_view(self.view, self.model.do_saving, self._on_save_done, kwargs)
 
@@ -4,7 +4,8 @@
 from PyQt5 import Qt
 
 from mantidimaging.core.io.loader import supported_formats
-from mantidimaging.core.io.utility import DEFAULT_IO_FILE_FORMAT
+from mantidimaging.core.io.loader.loader import NEXUS_FORMATS
+from mantidimaging.core.io.utility import DEFAULT_IO_FILE_FORMAT, NEXUS_CHUNKINGS, NEXUS_COMPRESSIONS
 from mantidimaging.gui.utility import (compile_ui, select_directory)
 from mantidimaging.gui.windows.main.model import StackId
 
@@ -31,8 +32,14 @@ class MWSaveDialog(Qt.QDialog):
         formats = supported_formats()
         self.formats.addItems(formats)
 
+        # the chunks and compression only apply to NeXus files
+        self.nexusChunking.addItems(NEXUS_CHUNKINGS)
+        self.nexusCompression.addItems(NEXUS_COMPRESSIONS)
+        self.formats.currentTextChanged.connect(self.enable_nexus_options)
+
         # set the default to tiff
         self.formats.setCurrentIndex(formats.index(DEFAULT_IO_FILE_FORMAT))
+        self.enable_nexus_options(self.formats.currentText())
 
         if stack_list:  # we will just show an empty drop down if no stacks
             # Sort stacknames using Recon and Tomo as preference
@@ -46,6 +53,10 @@ class MWSaveDialog(Qt.QDialog):
 
         self.selected_stack = None
 
+    def enable_nexus_options(self, image_format: str):
+        for widget in (self.nexusChunking, self.nexusChunkingLabel, self.nexusCompression, self.nexusCompressionLabel):
+            widget.setEnabled(image_format in NEXUS_FORMATS)
+
     def save_all(self):
         self.selected_stack = self.stack_uuids[self.stackNames.currentIndex()]
         self.parent().execute_save()
@@ -70,3 +81,9 @@ class MWSaveDialog(Qt.QDialog):
 
     def pixel_depth(self):
         return str(self.pixelDepth.currentText())
+
+    def nexus_chunking(self):
+        return str(self.nexusChunking.currentText())
+
+    def nexus_compression(self):
+        return str(self.nexusCompression.currentText())
@@ -100,6 +100,40 @@ class MainWindowModelTest(unittest.TestCase):
         self.model.do_remove_stack(uid)
         self.assertEqual(0, len(self.model.stack_list))
 
+    def test_get_references_of_open_stacks(self):
+        sample_uuid, flat_uuid, dark_uuid = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        sample_mock, flat_mock = mock.Mock(), mock.Mock()
+        self.model.active_stacks = {sample_uuid: sample_mock, flat_uuid: flat_mock}
+
+        self.model.set_references(sample_uuid, {"flat_before": flat_uuid, "dark_before": dark_uuid})
+
+        # the dark stack has been closed
+        self.assertEqual({"flat_before": flat_mock.presenter.images}, self.model.get_references(sample_uuid))
+        self.assertEqual({}, self.model.get_references(flat_uuid))
+
+        self.model.do_remove_stack(sample_uuid)
+        self.assertNotIn(sample_uuid, self.model.references)
+
+    @mock.patch('mantidimaging.gui.windows.main.model.saver')
+    def test_do_saving_passes_references(self, saver_mock: mock.Mock):
+        sample_uuid, flat_uuid = uuid.uuid4(), uuid.uuid4()
+        sample_mock, flat_mock = mock.Mock(), mock.Mock()
+        self.model.active_stacks = {sample_uuid: sample_mock, flat_uuid: flat_mock}
+        self.model.set_references(sample_uuid, {"flat_before": flat_uuid})
+
+        self.model.do_saving(sample_uuid, "dir", "prefix", "nxs", False, "float32", None, "sinograms", "lzf")
+
+        saver_mock.save.assert_called_once_with(sample_mock.presenter.images,
+                                                output_dir="dir",
+                                                name_prefix="prefix",
+                                                overwrite_all=False,
+                                                out_format="nxs",
+                                                pixel_depth="float32",
+                                                progress=None,
+                                                references={"flat_before": flat_mock.presenter.images},
+                                                nexus_chunking="sinograms",
+                                                nexus_compression="lzf")
+
     def test_have_active_stacks(self):
         uid, _, _ = self._add_mock_widget()
         self.assertTrue(self.model.have_active_stacks)
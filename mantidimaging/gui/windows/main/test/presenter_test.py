@@ -139,9 +139,11 @@ class MainWindowPresenterTest(unittest.TestCase):
         ds.flat_after.filenames = ["filename"] * 10
         ds.dark_after.filenames = ["filename"] * 10
 
-        self.presenter.create_new_stack(ds, "My title")
+        sample_vis = self.presenter.create_new_stack(ds, "My title")
 
         self.assertEqual(5, len(self.presenter.model.stack_list))
+        self.assertEqual(["flat_before", "flat_after", "dark_before", "dark_after"],
+                         list(self.presenter.model.references[sample_vis.uuid]))
         self.view.active_stacks_changed.emit.assert_called_once()
 
     def test_wizard_action_load(self):
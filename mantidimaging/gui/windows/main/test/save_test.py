@@ -43,3 +43,13 @@ class SaveDialogQtTest(unittest.TestCase):
         self.assertEqual(mwsd.stack_uuids[0], stack_list[4].id)
         # the Tomo stack is 2nd choice
         self.assertEqual(mwsd.stack_uuids[1], stack_list[3].id)
+
+    def test_nexus_options_only_enabled_for_nexus(self):
+        mwsd = MWSaveDialog(None, [])
+
+        self.assertFalse(mwsd.nexusChunking.isEnabled())
+        mwsd.formats.setCurrentText("nxs")
+        self.assertTrue(mwsd.nexusChunking.isEnabled())
+        self.assertTrue(mwsd.nexusCompression.isEnabled())
+        self.assertEqual("projections", mwsd.nexus_chunking())
+        self.assertEqual("gzip", mwsd.nexus_compression())
@@ -12,9 +12,11 @@ from PyQt5.QtGui import QIcon, QDragEnterEvent, QDropEvent
 from PyQt5.QtWidgets import QAction, QDialog, QLabel, QMessageBox, QMenu, QFileDialog
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.memory_manager import memory_manager
 from mantidimaging.core.utility import finder
 from mantidimaging.core.utility.projection_angle_parser import ProjectionAngleFileParser
 from mantidimaging.core.utility.version_check import versions
+from mantidimaging.gui.dialogs.memory_usage.view import MemoryUsageDialog, load_budget_setting
 from mantidimaging.gui.dialogs.multiple_stack_select.view import MultipleStackSelect
 from mantidimaging.gui.mvp_base import BaseMainWindowView
 from mantidimaging.gui.utility.qt_helpers import populate_menu
@@ -41,6 +43,7 @@ class MainWindowView(BaseMainWindowView):
     filter_applied = pyqtSignal()
     recon_applied = pyqtSignal()
     backend_message = pyqtSignal(bytes)
+    stack_moved = pyqtSignal(Images)
 
     menuFile: QMenu
     menuWorkflow: QMenu
@@ -78,6 +81,13 @@ class MainWindowView(BaseMainWindowView):
         self.setup_shortcuts()
         self.update_shortcuts()
 
+        load_budget_setting()
+        memory_manager.install()
+        # stacks can be moved out of memory from the threads of operations, the signal refreshes them in the GUI thread
+        self._stack_moved_callback = self.stack_moved.emit
+        memory_manager.moved_callbacks.append(self._stack_moved_callback)
+        self.stack_moved.connect(self.update_stack_with_images)
+
         self.setAcceptDrops(True)
         base_path = os.path.join(finder.get_external_location(__file__), finder.ROOT_PACKAGE)
 
@@ -117,6 +127,7 @@ class MainWindowView(BaseMainWindowView):
         self.actionRecon.triggered.connect(self.show_recon_window)
 
         self.actionCompareImages.triggered.connect(self.show_stack_select_dialog)
+        self.actionMemoryUsage.triggered.connect(self.show_memory_usage_dialog)
 
         self.active_stacks_changed.connect(self.update_shortcuts)
 
@@ -344,6 +355,8 @@ class MainWindowView(BaseMainWindowView):
             should_close = msg_box == QtWidgets.QMessageBox.Yes
 
         if should_close:
+            if self._stack_moved_callback in memory_manager.moved_callbacks:
+                memory_manager.moved_callbacks.remove(self._stack_moved_callback)
             # Pass close event to parent
             super(MainWindowView, self).closeEvent(event)
 
@@ -366,6 +379,11 @@ class MainWindowView(BaseMainWindowView):
 
             return stack_choice
 
+    def show_memory_usage_dialog(self):
+        dialog = MemoryUsageDialog(self)
+        dialog.show()
+        return dialog
+
     def set_images_in_stack(self, uuid: UUID, images: Images):
         self.presenter.set_images_in_stack(uuid, images)
 
@@ -2,8 +2,9 @@
 # SPDX - License - Identifier: GPL-3.0-or-later
 
 from functools import partial
-from typing import Callable, TYPE_CHECKING, List, Any, Dict
+from typing import Callable, TYPE_CHECKING, List, Any, Dict, Optional
 
+from mantidimaging.core.data.memory_manager import memory_manager
 from mantidimaging.core.operations.base_filter import BaseFilter, FilterGroup
 from mantidimaging.core.operations.loader import load_filter_packages
 from mantidimaging.gui.dialogs.async_task import start_async_task_view
@@ -97,15 +98,26 @@ class FiltersWindowModel(object):
         self.selected_filter = self.filters[filter_idx]
         self.filter_widget_kwargs = filter_widget_kwargs
 
-    def apply_to_stacks(self, stacks: List['StackVisualiserView'], progress=None):
+    def apply_to_stacks(self,
+                        stacks: List['StackVisualiserView'],
+                        progress=None,
+                        before_apply: Optional[Callable[[Any], None]] = None,
+                        after_apply: Optional[Callable[[Any], None]] = None):
         """
         Applies the selected filter to a given image stack.
 
         It gets the image reference out of the StackVisualiserView and forwards
         it to the function that actually processes the images.
+
+        :param before_apply: Called with the progress before the filter is applied, in the same task
+        :param after_apply: Called with the progress once the filter has been applied to all the stacks
         """
+        if before_apply is not None:
+            before_apply(progress)
         for stack in stacks:
             self.apply_to_images(stack.presenter.images, progress=progress)
+        if after_apply is not None:
+            after_apply(progress)
 
     def apply_to_images(self, images, progress=None):
         input_kwarg_widgets = self.filter_widget_kwargs.copy()
@@ -117,7 +129,14 @@ class FiltersWindowModel(object):
         # Run filter
         exec_func: partial = self.selected_filter.execute_wrapper(**input_kwarg_widgets)
         exec_func.keywords["progress"] = progress
-        exec_func(images)
+        # the stack can't be moved out of memory while the operation writes into its array
+        with memory_manager.in_use(images):
+            self.selected_filter.prepare_dtype(images)
+            try:
+                exec_func(images)
+            finally:
+                # the operation changes the data in place, even if it fails or is cancelled
+                images.invalidate_caches()
         # store the executed filter in history if it executed successfully
         images.record_operation(
             self.selected_filter.__name__,  # type: ignore
@@ -125,7 +144,11 @@ class FiltersWindowModel(object):
             *exec_func.args,
             **exec_func.keywords)
 
-    def do_apply_filter(self, stacks: List['StackVisualiserView'], post_filter: Callable[[Any], None]):
+    def do_apply_filter(self,
+                        stacks: List['StackVisualiserView'],
+                        post_filter: Callable[[Any], None],
+                        before_apply: Optional[Callable[[Any], None]] = None,
+                        after_apply: Optional[Callable[[Any], None]] = None):
         """
         Applies the selected filter to the selected stack.
         """
@@ -134,7 +157,7 @@ class FiltersWindowModel(object):
 
         # Get auto parameters
         # Generate sub-stack and run filter
-        apply_func = partial(self.apply_to_stacks, stacks)
+        apply_func = partial(self.apply_to_stacks, stacks, before_apply=before_apply, after_apply=after_apply)
         start_async_task_view(self.presenter.view, apply_func, post_filter)
 
     def do_apply_filter_sync(self, stacks: List['StackVisualiserView'], post_filter: Callable[[Any], None]):
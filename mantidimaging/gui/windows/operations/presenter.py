@@ -6,7 +6,7 @@ from enum import Enum, auto
 from functools import partial
 from logging import getLogger
 from time import sleep
-from typing import List, TYPE_CHECKING, Optional, Tuple, Union
+from typing import List, TYPE_CHECKING, Optional, Tuple
 from uuid import UUID
 
 import numpy as np
@@ -14,10 +14,11 @@ from PyQt5.QtWidgets import QApplication, QLineEdit
 from pyqtgraph import ImageItem
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.snapshot import ImagesSnapshot
 from mantidimaging.core.operation_history.const import OPERATION_HISTORY, OPERATION_DISPLAY_NAME
+from mantidimaging.core.utility.progress_reporting import TaskCancelled
 from mantidimaging.gui.mvp_base import BasePresenter
 from mantidimaging.gui.utility import BlockQtSignals
-from mantidimaging.gui.utility.common import operation_in_progress
 from mantidimaging.gui.windows.stack_choice.presenter import StackChoicePresenter
 from mantidimaging.gui.windows.stack_visualiser.view import StackVisualiserView
 
@@ -52,7 +53,8 @@ class FiltersWindowPresenter(BasePresenter):
         self.model = FiltersWindowModel(self)
         self._main_window = main_window
 
-        self.original_images_stack: Union[List[Tuple[Images, UUID]]] = []
+        # The snapshots of the stacks taken before the operation, set to None by the stack choice when it is used up
+        self.original_images_stack: Optional[List[Tuple[ImagesSnapshot, UUID]]] = []
         self.applying_to_all = False
         self.filter_is_running = False
 
@@ -142,10 +144,6 @@ class FiltersWindowPresenter(BasePresenter):
             if not self.view.ask_confirmation(REPEAT_FLAT_FIELDING_MSG):
                 return
 
-        if self.view.safeApply.isChecked():
-            with operation_in_progress("Safe Apply: Copying Data", "-------------------------------------", self.view):
-                self.original_images_stack = self.stack.presenter.images.copy()
-
         # if is a 180degree stack and a user says no, cancel apply filter.
         if self.is_a_proj180deg(self.stack) \
             and not self.view.ask_confirmation("Operations applied to the sample are also automatically applied to the "
@@ -156,25 +154,47 @@ class FiltersWindowPresenter(BasePresenter):
 
         apply_to = [self.stack]
 
-        self._do_apply_filter(apply_to)
+        self._do_apply_filter(apply_to, self._stacks_to_snapshot(apply_to))
 
     def do_apply_filter_to_all(self):
         confirmed = self.view.ask_confirmation("Are you sure you want to apply this filter to \n\nALL OPEN STACKS?")
         if not confirmed:
             return
         stacks = self.main_window.get_all_stack_visualisers()
-        if self.view.safeApply.isChecked():
-            with operation_in_progress("Safe Apply: Copying Data", "-------------------------------------", self.view):
-                self.original_images_stack = []
-                for stack in stacks:
-                    self.original_images_stack.append((stack.presenter.images.copy(), stack.uuid))
 
         if len(stacks) > 0:
             self.applying_to_all = True
-        self._do_apply_filter(stacks)
+        self._do_apply_filter(stacks, self._stacks_to_snapshot(stacks))
+
+    def _stacks_to_snapshot(self, stacks: List[StackVisualiserView]) -> List[StackVisualiserView]:
+        """
+        :return: The stacks that need a snapshot before the operation, for Safe Apply or for undoing the operation later
+        """
+        safe_apply = self.view.safeApply.isChecked()
+        return [stack for stack in stacks if safe_apply or stack.presenter.undo_journal.fits(stack.presenter.images)]
+
+    def _take_snapshots(self, stacks: List[StackVisualiserView], progress=None):
+        """
+        Takes a snapshot of the stacks before the operation. Runs in the task of the operation, as it reads the stacks.
+        """
+        snapshots: List[Tuple[ImagesSnapshot, UUID]] = []
+        # kept as they are taken, so that they are closed if the operation is cancelled part way through
+        self.original_images_stack = snapshots
+        for stack in stacks:
+            snapshots.append((ImagesSnapshot(stack.presenter.images, progress=progress), stack.uuid))
+
+    def _discard_unchanged(self, stacks: List[StackVisualiserView], progress=None):
+        """
+        Drops the images the operation didn't change from the snapshots, as only those are needed to show and
+        restore the original. Runs in the task of the operation, after it has been applied.
+        """
+        for stack in stacks:
+            snapshot = self._snapshot_of(stack.uuid)
+            if snapshot is not None:
+                snapshot.discard_unchanged(stack.presenter.images, progress=progress)
 
     def _wait_for_stack_choice(self, new_stack: Images, stack_uuid: UUID):
-        stack_choice = StackChoicePresenter(self.original_images_stack, new_stack, self, stack_uuid)
+        stack_choice = StackChoicePresenter(self.original_images_stack or [], new_stack, self, stack_uuid)
         stack_choice.show()
 
         while not stack_choice.done:
@@ -193,25 +213,68 @@ class FiltersWindowPresenter(BasePresenter):
                 return True
         return False
 
+    def _snapshot_of(self, stack_uuid: UUID) -> Optional[ImagesSnapshot]:
+        """
+        :return: The snapshot of the stack taken before the operation, if there is one
+        """
+        for snapshot, uuid in self.original_images_stack or []:
+            if uuid == stack_uuid:
+                return snapshot
+        return None
+
+    def _restore_snapshot(self, stack: StackVisualiserView) -> Optional[Images]:
+        """
+        :return: The stack as it was before the operation, if a snapshot of it was taken
+        """
+        snapshot = self._snapshot_of(stack.uuid)
+        if snapshot is None:
+            return None
+        return snapshot.restore(stack.presenter.images)
+
+    def _record_undo(self, stack: StackVisualiserView, snapshot: ImagesSnapshot):
+        """
+        Hands the snapshot over to the undo journal of the stack, after the operation's result has been kept
+        """
+        self.original_images_stack = [(other, uuid) for other, uuid in self.original_images_stack or []
+                                      if uuid != stack.uuid]
+        stack.presenter.undo_journal.record(snapshot, stack.presenter.images)
+
+    def _close_snapshots(self):
+        for snapshot, _ in self.original_images_stack or []:
+            snapshot.close()
+        self.original_images_stack = []
+
     def _post_filter(self, updated_stacks: List[StackVisualiserView], task):
         do_180deg = True
         attempt_repair = task.error is not None
+        cancelled = isinstance(task.error, TaskCancelled)
+        restored = False
         for stack in updated_stacks:
             # If the operation encountered an error during processing,
             # try to restore the original data else continue processing as usual
             if attempt_repair:
-                self.main_window.presenter.model.set_images_in_stack(stack.uuid, stack.presenter.images)
+                # a cancelled operation leaves the images partially processed, go back to the snapshot
+                original = self._restore_snapshot(stack) if cancelled else None
+                restored = original is not None
+                if original is None:
+                    self.main_window.presenter.model.set_images_in_stack(stack.uuid, stack.presenter.images)
+                else:
+                    self.main_window.presenter.model.set_images_in_stack(stack.uuid, original)
+                    # the snapshot is restored into the same images, which the stack still has to show
+                    self.main_window.update_stack_with_images(original)
             # Ensure there is no error if we are to continue with safe apply and 180 degree.
             elif task.error is None:
+                snapshot = self._snapshot_of(stack.uuid)
                 # otherwise check with user which one to keep
                 if self.view.safeApply.isChecked():
                     do_180deg = self._wait_for_stack_choice(stack.presenter.images, stack.uuid)
+                if do_180deg and snapshot is not None:
+                    self._record_undo(stack, snapshot)
                 # if the stack that was kept happened to have a proj180 stack - then apply the filter to that too
                 if stack.presenter.images.has_proj180deg() and do_180deg and not self.applying_to_all:
                     self.view.clear_previews()
-                    # Apply to proj180 synchronously - this function is already running async
-                    # and running another async instance causes a race condition in the parallel module
-                    # where the shared data can be removed in the middle of the operation of another operation
+                    # Apply to proj180 synchronously - this function is already running async,
+                    # and the stack is only updated once the filter has also been applied to the 180 projection
                     self._do_apply_filter_sync(
                         [self.view.main_window.get_stack_with_images(stack.presenter.images.proj180deg)])
                     self.view.main_window.update_stack_with_images(stack.presenter.images.proj180deg)
@@ -224,7 +287,11 @@ class FiltersWindowPresenter(BasePresenter):
         self.applying_to_all = False
         self.do_update_previews()
 
-        if task.error is not None:
+        # the snapshots that were not restored or kept for undo are no longer needed
+        self._close_snapshots()
+        if cancelled:
+            self.view.show_operation_cancelled(self.model.selected_filter.filter_name, restored)
+        elif task.error is not None:
             # task failed, show why
             self.view.show_error_dialog(f"Operation failed: {task.error}")
         else:
@@ -235,14 +302,21 @@ class FiltersWindowPresenter(BasePresenter):
         self.view.filter_applied.emit()
         self.filter_is_running = False
 
-    def _do_apply_filter(self, apply_to):
+    def _do_apply_filter(self, apply_to, snapshot: Optional[List[StackVisualiserView]] = None):
+        """
+        :param snapshot: The stacks to take a snapshot of before the operation, see `_stacks_to_snapshot`
+        """
         self.filter_is_running = True
         # Record the previous button states
         self.prev_apply_single_state = self.view.applyButton.isEnabled()
         self.prev_apply_all_state = self.view.applyToAllButton.isEnabled()
         # Disable the apply buttons
         self._set_apply_buttons_enabled(False, False)
-        self.model.do_apply_filter(apply_to, partial(self._post_filter, apply_to))
+        snapshot = snapshot or []
+        self.model.do_apply_filter(apply_to,
+                                   partial(self._post_filter, apply_to),
+                                   before_apply=partial(self._take_snapshots, snapshot),
+                                   after_apply=partial(self._discard_unchanged, snapshot))
 
     def _do_apply_filter_sync(self, apply_to):
         self.model.do_apply_filter_sync(apply_to, partial(self._post_filter, apply_to))
@@ -138,6 +138,23 @@ class FiltersWindowModelTest(unittest.TestCase):
             mock.call(mock_stack_visualisers[1].presenter.images, progress=mock_progress)
         ])
 
+    @mock.patch("mantidimaging.gui.windows.operations.model.FiltersWindowModel.apply_to_images")
+    def test_apply_filter_to_stacks_runs_hooks_around_filter(self, apply_to_images_mock: mock.Mock):
+        calls = mock.Mock()
+        apply_to_images_mock.side_effect = calls.apply_to_images
+        mock_progress = mock.Mock()
+
+        self.model.apply_to_stacks([self.sv_view],
+                                   mock_progress,
+                                   before_apply=calls.before_apply,
+                                   after_apply=calls.after_apply)
+
+        self.assertEqual([
+            mock.call.before_apply(mock_progress),
+            mock.call.apply_to_images(self.sv_view.presenter.images, progress=mock_progress),
+            mock.call.after_apply(mock_progress)
+        ], calls.mock_calls)
+
     def test_apply_filter_to_images(self):
         """
         When no 180deg projection is loaded the filter is only
@@ -10,7 +10,9 @@ from unittest.mock import DEFAULT, Mock
 
 from parameterized import parameterized
 
+from mantidimaging.core.data.snapshot import ImagesSnapshot
 from mantidimaging.core.operation_history.const import OPERATION_HISTORY, OPERATION_DISPLAY_NAME
+from mantidimaging.core.utility.progress_reporting import TaskCancelled
 from mantidimaging.gui.windows.main import MainWindowView
 from mantidimaging.gui.windows.operations import FiltersWindowPresenter
 from mantidimaging.gui.windows.operations.presenter import REPEAT_FLAT_FIELDING_MSG, FLAT_FIELDING
@@ -57,6 +59,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         presenter = mock.Mock()
         stack.presenter = presenter
         presenter.images.has_proj180deg.return_value = False
+        presenter.undo_journal.fits.return_value = False
         self.presenter.stack = stack
         self.presenter.view.safeApply.isChecked.return_value = False
         self.presenter.do_apply_filter()
@@ -64,10 +67,11 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         expected_apply_to = [stack]
         assert_called_once_with(apply_filter_mock, expected_apply_to,
                                 partial(self.presenter._post_filter, expected_apply_to))
+        self.assertEqual([], apply_filter_mock.call_args[1]["before_apply"].args[0])
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
+    @mock.patch("mantidimaging.gui.windows.operations.presenter.ImagesSnapshot")
     @mock.patch('mantidimaging.gui.windows.operations.presenter.FiltersWindowModel.do_apply_filter')
-    def test_apply_filter_to_all(self, apply_filter_mock: mock.Mock, _):
+    def test_apply_filter_to_all(self, apply_filter_mock: mock.Mock, images_snapshot: mock.Mock):
         self.view.ask_confirmation.return_value = False
         self.presenter.do_apply_filter_to_all()
 
@@ -84,6 +88,9 @@ class FiltersWindowPresenterTest(unittest.TestCase):
 
         assert_called_once_with(apply_filter_mock, mock_stack_visualisers,
                                 partial(self.presenter._post_filter, mock_stack_visualisers))
+        apply_filter_mock.call_args[1]["before_apply"](None)
+        self.assertEqual([(images_snapshot.return_value, stack.uuid) for stack in mock_stack_visualisers],
+                         self.presenter.original_images_stack)
 
     @mock.patch.multiple('mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
                          do_update_previews=DEFAULT,
@@ -128,6 +135,43 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         do_update_previews.assert_called_once()
         self.presenter.main_window.presenter.model.set_images_in_stack.assert_called_once()
 
+    @mock.patch.multiple('mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
+                         do_update_previews=DEFAULT)
+    def test_post_filter_cancelled_restores_safe_apply_copy(self, do_update_previews: Mock = Mock()):
+        self.presenter.view.safeApply.isChecked.return_value = True
+        self.presenter.main_window.presenter = mock.Mock()
+        stack = mock.Mock()
+        other_snapshot = mock.create_autospec(ImagesSnapshot, instance=True)
+        snapshot = mock.create_autospec(ImagesSnapshot, instance=True)
+        self.presenter.original_images_stack = [(other_snapshot, mock.Mock()), (snapshot, stack.uuid)]
+        mock_task = mock.Mock()
+        mock_task.error = TaskCancelled()
+        self.presenter._post_filter([stack], mock_task)
+
+        other_snapshot.restore.assert_not_called()
+        self.presenter.main_window.presenter.model.set_images_in_stack.assert_called_once_with(
+            stack.uuid, snapshot.restore.return_value)
+        self.view.show_operation_cancelled.assert_called_once_with(self.presenter.model.selected_filter.filter_name,
+                                                                   True)
+        self.view.show_error_dialog.assert_not_called()
+        other_snapshot.close.assert_called_once()
+        self.assertEqual([], self.presenter.original_images_stack)
+
+    @mock.patch.multiple('mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
+                         do_update_previews=DEFAULT)
+    def test_post_filter_cancelled_without_safe_apply(self, do_update_previews: Mock = Mock()):
+        self.presenter.view.safeApply.isChecked.return_value = False
+        self.presenter.main_window.presenter = mock.Mock()
+        stack = mock.Mock()
+        mock_task = mock.Mock()
+        mock_task.error = TaskCancelled()
+        self.presenter._post_filter([stack], mock_task)
+
+        self.presenter.main_window.presenter.model.set_images_in_stack.assert_called_once_with(
+            stack.uuid, stack.presenter.images)
+        self.view.show_operation_cancelled.assert_called_once_with(self.presenter.model.selected_filter.filter_name,
+                                                                   False)
+
     @mock.patch.multiple(
         'mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
         _do_apply_filter=DEFAULT,
@@ -256,18 +300,82 @@ class FiltersWindowPresenterTest(unittest.TestCase):
 
         stack_choice_presenter.assert_not_called()
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_original_stack_assigned_when_safe_apply_checked(self, _):
+    @mock.patch("mantidimaging.gui.windows.operations.presenter.ImagesSnapshot")
+    def test_original_stack_assigned_when_safe_apply_checked(self, images_snapshot: Mock):
         stack = mock.MagicMock()
+        stack.presenter.undo_journal.fits.return_value = False
         self.presenter.stack = stack
-        stack_data = "THIS IS USEFUL STACK DATA"
-        stack.presenter.images.copy.return_value = stack_data
-        self.presenter._do_apply_filter = mock.MagicMock()
 
-        self.presenter.do_apply_filter()
+        with mock.patch.object(self.presenter, "_do_apply_filter") as do_apply_filter:
+            self.presenter.do_apply_filter()
+
+        do_apply_filter.assert_called_once_with([stack], [stack])
+        # the snapshot is taken in the task of the operation
+        images_snapshot.assert_not_called()
+        stack.presenter.images.copy.assert_not_called()
+
+    def test_no_snapshot_when_stack_does_not_fit_undo_budget(self):
+        self.presenter.view.safeApply.isChecked.return_value = False
+        small_stack, large_stack = mock.Mock(), mock.Mock()
+        small_stack.presenter.undo_journal.fits.return_value = True
+        large_stack.presenter.undo_journal.fits.return_value = False
+
+        self.assertEqual([small_stack], self.presenter._stacks_to_snapshot([small_stack, large_stack]))
+        large_stack.presenter.undo_journal.fits.assert_called_once_with(large_stack.presenter.images)
+
+    @mock.patch("mantidimaging.gui.windows.operations.presenter.ImagesSnapshot")
+    def test_snapshots_taken_in_operation_task(self, images_snapshot: Mock):
+        stack = mock.Mock()
+        progress = mock.Mock()
+
+        with mock.patch.object(self.presenter.model, "do_apply_filter") as do_apply_filter:
+            self.presenter._do_apply_filter([stack], [stack])
+        images_snapshot.assert_not_called()
+
+        do_apply_filter.call_args[1]["before_apply"](progress)
+        images_snapshot.assert_called_once_with(stack.presenter.images, progress=progress)
+        self.assertEqual([(images_snapshot.return_value, stack.uuid)], self.presenter.original_images_stack)
+
+        do_apply_filter.call_args[1]["after_apply"](progress)
+        images_snapshot.return_value.discard_unchanged.assert_called_once_with(stack.presenter.images,
+                                                                               progress=progress)
+
+    @mock.patch.multiple('mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
+                         do_update_previews=DEFAULT)
+    def test_post_filter_records_undo(self, do_update_previews: Mock = Mock()):
+        self.presenter.view.safeApply.isChecked.return_value = False
+        stack = mock.Mock()
+        stack.presenter.images.has_proj180deg.return_value = False
+        snapshot = mock.create_autospec(ImagesSnapshot, instance=True)
+        self.presenter.original_images_stack = [(snapshot, stack.uuid)]
+        mock_task = mock.Mock()
+        mock_task.error = None
+        self.presenter._post_filter([stack], mock_task)
+
+        # the unchanged images were already discarded in the task of the operation
+        snapshot.discard_unchanged.assert_not_called()
+        stack.presenter.undo_journal.record.assert_called_once_with(snapshot, stack.presenter.images)
+        snapshot.close.assert_not_called()
+        self.assertEqual([], self.presenter.original_images_stack)
+
+    @mock.patch.multiple('mantidimaging.gui.windows.operations.presenter.FiltersWindowPresenter',
+                         do_update_previews=DEFAULT)
+    def test_post_filter_cancelled_restores_snapshot_in_place(self, do_update_previews: Mock = Mock()):
+        self.presenter.view.safeApply.isChecked.return_value = True
+        self.presenter.main_window.presenter = mock.Mock()
+        stack = mock.Mock()
+        snapshot = mock.create_autospec(ImagesSnapshot, instance=True)
+        self.presenter.original_images_stack = [(snapshot, stack.uuid)]
+        mock_task = mock.Mock()
+        mock_task.error = TaskCancelled()
+        self.presenter._post_filter([stack], mock_task)
 
-        stack.presenter.images.copy.assert_called_once()
-        self.assertEqual(stack_data, self.presenter.original_images_stack)
+        snapshot.restore.assert_called_once_with(stack.presenter.images)
+        self.presenter.main_window.presenter.model.set_images_in_stack.assert_called_once_with(
+            stack.uuid, snapshot.restore.return_value)
+        self.main_window.update_stack_with_images.assert_called_once_with(snapshot.restore.return_value)
+        snapshot.close.assert_called_once()
+        self.assertEqual([], self.presenter.original_images_stack)
 
     def test_set_filter_by_name(self):
         NAME = "ROI Normalisation"
@@ -278,8 +386,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.model._find_filter_index_from_filter_name.assert_called_with(NAME)
         self.view.filterSelector.setCurrentIndex.assert_called_with(INDEX)
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_warning_when_flat_fielding_is_run_twice(self, _):
+    def test_warning_when_flat_fielding_is_run_twice(self):
         """
         Test that a warning is displayed if the user is trying to run flat-fielding again.
         """
@@ -294,8 +401,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.do_apply_filter()
         self.view.ask_confirmation.assert_called_once_with(REPEAT_FLAT_FIELDING_MSG)
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_no_warning_when_flat_fielding_isnt_run(self, _):
+    def test_no_warning_when_flat_fielding_isnt_run(self):
         """
         Test no warning is created if the user isn't running flat fielding.
         """
@@ -305,8 +411,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.do_apply_filter()
         self.view.ask_confirmation.assert_not_called()
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_no_warning_when_flat_fielding_is_first_operation(self, _):
+    def test_no_warning_when_flat_fielding_is_first_operation(self):
         """
         Test that no warning is created when flat fielding is the first operation the user runs, and no operation
         history exists.
@@ -317,8 +422,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.do_apply_filter()
         self.view.ask_confirmation.assert_not_called()
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_no_warning_when_flat_fielding_is_run_for_first_time(self, _):
+    def test_no_warning_when_flat_fielding_is_run_for_first_time(self):
         """
         Test that no warning is created if an operation history exists but flat fielding isn't in it.
         """
@@ -333,8 +437,7 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.do_apply_filter()
         self.view.ask_confirmation.assert_not_called()
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_no_operation_run_when_user_cancels_flat_fielding(self, _):
+    def test_no_operation_run_when_user_cancels_flat_fielding(self):
         """
         Test that pressing "Cancel" when the flat-fielding warning is displayed means that no operation is run.
         """
@@ -350,15 +453,13 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.presenter.do_apply_filter()
         self.presenter._do_apply_filter.assert_not_called()
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_buttons_disabled_while_filter_is_running(self, _):
+    def test_buttons_disabled_while_filter_is_running(self):
         self.presenter.model.do_apply_filter = mock.MagicMock()
         self.presenter._do_apply_filter(None)
         self.presenter.view.applyButton.setEnabled.assert_called_once_with(False)
         self.presenter.view.applyToAllButton.setEnabled.assert_called_once_with(False)
 
-    @mock.patch("mantidimaging.gui.windows.operations.presenter.operation_in_progress")
-    def test_running_operation_records_previous_button_states(self, _):
+    def test_running_operation_records_previous_button_states(self):
         self.presenter.view.applyButton.isEnabled.return_value = prev_apply_single_state = True
         self.presenter.view.applyToAllButton.isEnabled.return_value = prev_apply_all_state = False
         self.presenter.model.do_apply_filter = mock.MagicMock()
@@ -218,6 +218,14 @@ class FiltersWindowView(BaseMainWindowView):
         self.notification_icon.setPixmap(QApplication.style().standardPixmap(QStyle.SP_DialogYesButton))
         self.notification_text.setText(f"{operation_name} completed successfully!")
 
+    def show_operation_cancelled(self, operation_name, restored):
+        self.notification_text.show()
+        self.notification_icon.setPixmap(QApplication.style().standardPixmap(QStyle.SP_MessageBoxInformation))
+        if restored:
+            self.notification_text.setText(f"{operation_name} cancelled, the original data has been restored")
+        else:
+            self.notification_text.setText(f"{operation_name} cancelled, the data may have been partially processed")
+
     def open_help_webpage(self):
         filter_id = self.presenter.model._find_filter_index_from_filter_name(self.filterSelector.currentText())
         filter_module_path = self.presenter.get_filter_module_name(filter_id)
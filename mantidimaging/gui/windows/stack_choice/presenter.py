@@ -2,10 +2,11 @@
 # SPDX - License - Identifier: GPL-3.0-or-later
 
 import traceback
-from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple, Union
 from uuid import UUID
 
 from mantidimaging.core.data.images import Images
+from mantidimaging.core.data.snapshot import ImagesSnapshot
 from mantidimaging.gui.windows.stack_choice.presenter_base import StackChoicePresenterMixin
 from mantidimaging.gui.windows.stack_choice.view import Notification, StackChoiceView
 
@@ -22,20 +23,24 @@ def _get_stack_from_uuid(original_stack, stack_uuid):
 
 class StackChoicePresenter(StackChoicePresenterMixin):
     def __init__(self,
-                 original_stack: Union[List[Tuple[Images, UUID]], Images],
+                 original_stack: Union[Sequence[Tuple[Union[Images, ImagesSnapshot], UUID]], Images, ImagesSnapshot],
                  new_stack: Images,
                  operations_presenter: 'FiltersWindowPresenter',
                  stack_uuid: Optional[UUID],
                  view: Optional[StackChoiceView] = None):
         self.operations_presenter = operations_presenter
+        self.new_stack = new_stack
+
+        # Check if multiple stacks to choose from
+        if isinstance(original_stack, list):
+            self.stack = _get_stack_from_uuid(original_stack, stack_uuid)
+        else:
+            self.stack = original_stack
 
         if view is None:
-            # Check if multiple stacks to choose from
-            if isinstance(original_stack, list):
-                self.stack = _get_stack_from_uuid(original_stack, stack_uuid)
-            else:
-                self.stack = original_stack
-            view = StackChoiceView(self.stack, new_stack, self, parent=operations_presenter.view)
+            original_images = self.stack.original_images(new_stack) if isinstance(self.stack, ImagesSnapshot) \
+                else self.stack
+            view = StackChoiceView(original_images, new_stack, self, parent=operations_presenter.view)
 
         self.view = view
         self.stack_uuid = stack_uuid
@@ -68,7 +73,13 @@ class StackChoicePresenter(StackChoicePresenterMixin):
             self.operations_presenter.original_images_stack = None
 
     def do_reapply_original_data(self):
-        self.operations_presenter.main_window.presenter.model.set_images_in_stack(self.stack_uuid, self.stack)
+        # a snapshot is written back into the new stack in place, instead of replacing it
+        if isinstance(self.stack, ImagesSnapshot):
+            original = self.stack.restore(self.new_stack)
+            self.stack.close()
+        else:
+            original = self.stack
+        self.operations_presenter.main_window.presenter.model.set_images_in_stack(self.stack_uuid, original)
         self._clean_up_original_images_stack()
         self.view.choice_made = True
         self.close_view()
@@ -7,6 +7,7 @@ from unittest.mock import DEFAULT, MagicMock, Mock, patch
 from uuid import uuid4
 
 import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data.snapshot import ImagesSnapshot
 from mantidimaging.gui.windows.stack_choice.presenter import StackChoicePresenter
 from mantidimaging.gui.windows.stack_choice.view import Notification
 
@@ -86,6 +87,20 @@ class StackChoicePresenterTest(unittest.TestCase):
         self.assertTrue(self.v.choice_made)
         self.p.close_view.assert_called_once()
 
+    def test_do_reapply_original_data_restores_snapshot(self):
+        snapshot = mock.create_autospec(ImagesSnapshot, instance=True)
+        self.op_p.original_images_stack = snapshot
+        self.p.stack = snapshot
+        self.p.close_view = mock.MagicMock()
+
+        self.p.do_reapply_original_data()
+
+        snapshot.restore.assert_called_once_with(self.new_stack)
+        self.op_p.main_window.presenter.model.set_images_in_stack.assert_called_once_with(
+            self.uuid, snapshot.restore.return_value)
+        snapshot.close.assert_called_once()
+        self.assertIsNone(self.op_p.original_images_stack)
+
     def test_do_clean_up_original_data(self):
         self.p.stack = mock.MagicMock()
         self.p._clean_up_original_images_stack = mock.MagicMock()
@@ -10,6 +10,7 @@ from PyQt5.QtWidgets import QCheckBox, QMainWindow, QMessageBox, QPushButton, QS
 from pyqtgraph import ViewBox
 
 from mantidimaging.core.data.images import Images
+from mantidimaging.core.data.lazy_images import LazyImages
 from mantidimaging.gui.mvp_base import BaseMainWindowView
 from mantidimaging.gui.widgets.mi_image_view.view import MIImageView
 
@@ -45,7 +46,9 @@ class StackChoiceView(BaseMainWindowView):
         self.new_stack = MIImageView(detailsSpanAllCols=True)
         self.new_stack.name = "New Stack"
 
-        self._setup_stack_for_view(self.original_stack, original_stack.data)
+        # the original stack of Safe Apply is decoded from its snapshot as the images are viewed
+        original_data = original_stack.lazy_stack if isinstance(original_stack, LazyImages) else original_stack.data
+        self._setup_stack_for_view(self.original_stack, original_data)
         self._setup_stack_for_view(self.new_stack, new_stack.data)
 
         self.topVerticalOriginal.addWidget(self.original_stack)
@@ -5,10 +5,14 @@ import numpy as np
 import traceback
 from enum import IntEnum, auto
 from logging import getLogger
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.lazy_images import LazyImages
+from mantidimaging.core.data.memory_manager import memory_manager
+from mantidimaging.core.data.pyramid import ImagePyramid
 from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history.undo_journal import UndoJournal
 from mantidimaging.core.utility.sensible_roi import SensibleROI
 from mantidimaging.gui.mvp_base import BasePresenter
 from .model import SVModel
@@ -48,6 +52,7 @@ class StackVisualiserPresenter(BasePresenter):
         self._current_image_index = 0
         self.image_mode: SVImageMode = SVImageMode.NORMAL
         self.summed_image = None
+        self.undo_journal = UndoJournal()
 
     def notify(self, signal):
         try:
@@ -66,14 +71,34 @@ class StackVisualiserPresenter(BasePresenter):
             getLogger(__name__).exception("Notification handler failed")
 
     def delete_data(self):
+        self.undo_journal.clear()
+        if self.images is not None:
+            self.images.free_memory()
         self.images = None
 
     def get_image(self, index) -> Images:
         return self.images.index_as_images(index)
 
+    def displayed_data(self):
+        """
+        :return: The data of the stack, or a view that decodes the images as they are shown if it hasn't been loaded
+        """
+        if isinstance(self.images, LazyImages) and not self.images.is_materialised:
+            return self.images.lazy_stack
+        return self.images.data
+
+    def displayed_pyramid(self) -> Optional[ImagePyramid]:
+        """
+        :return: The reduced images to draw the stack from when zoomed out, None for a stack that hasn't been loaded
+        """
+        if isinstance(self.images, LazyImages) and not self.images.is_materialised:
+            return None
+        return self.images.pyramid
+
     def refresh_image(self):
+        memory_manager.touch(self.images)
         self.view.image = self.summed_image if self.image_mode is SVImageMode.SUMMED \
-            else self.images.data
+            else self.displayed_data()
 
     def get_parameter_value(self, parameter: SVParameters):
         """
@@ -117,6 +142,18 @@ class StackVisualiserPresenter(BasePresenter):
             new_images = self.images.copy_roi(SensibleROI.from_points(*self.view.image_view.get_roi()))
             self.view.parent_create_stack(new_images, self.view.name)
 
+    def revertible_operations(self) -> int:
+        return self.undo_journal.revertible(self.images)
+
+    def undo_operations(self, count: int):
+        """
+        Reverts the last count operations applied to the stack, from the snapshots kept by the undo journal
+        """
+        with operation_in_progress("Undoing operations", f"Reverting the last {count} operations", self.view):
+            self.undo_journal.revert(self.images, count)
+        self.summed_image = None
+        self.refresh_image()
+
     def get_num_images(self) -> int:
         return self.images.num_projections
 
@@ -11,6 +11,10 @@ from mantidimaging.gui.windows.stack_visualiser.presenter import SVParameters
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.lazy_images import LazyImages, LazyStack
+from mantidimaging.core.data.snapshot import ImagesSnapshot
+from mantidimaging.core.operation_history.undo_journal import UndoJournal
+from mantidimaging.core.parallel import utility as pu
 from mantidimaging.gui.windows.stack_visualiser import StackVisualiserPresenter, StackVisualiserView, SVNotification, \
     SVImageMode
 
@@ -41,11 +45,59 @@ class StackVisualiserPresenterTest(unittest.TestCase):
         self.presenter.delete_data()
         self.assertIsNone(self.presenter.images, None)
 
+    @mock.patch("mantidimaging.gui.windows.stack_visualiser.presenter.operation_in_progress")
+    def test_undo_operations(self, _):
+        self.presenter.undo_journal = UndoJournal(disk_budget_mb=100)
+        original = np.copy(self.test_data.data)
+        snapshot = ImagesSnapshot(self.test_data)
+        self.test_data.data[2] += 1
+        self.test_data.record_operation("op", "Op")
+        self.presenter.undo_journal.record(snapshot, self.test_data)
+
+        self.assertEqual(1, self.presenter.revertible_operations())
+        self.presenter.undo_operations(1)
+
+        npt.assert_equal(self.test_data.data, original)
+        self.assertEqual(0, self.presenter.revertible_operations())
+        self.assertIs(self.test_data.data, self.view.image)
+
+    def test_delete_data_frees_shared_memory(self):
+        images = th.generate_images()
+        self.presenter.images = images
+        self.assertTrue(pu.is_shared_array(images.data))
+        self.presenter.delete_data()
+        self.assertFalse(pu.is_shared_array(images.data))
+
     def test_notify_refresh_image_normal_image_mode(self):
         self.presenter.image_mode = SVImageMode.NORMAL
         self.presenter.notify(SVNotification.REFRESH_IMAGE)
         self.assertIs(self.view.image, self.presenter.images.data, "Image should have been set as sample images")
 
+    def test_notify_refresh_image_lazy_stack(self):
+        source = th.generate_images()
+        lazy = LazyImages(lambda name: source.data[int(name)], [str(i) for i in range(source.num_images)],
+                          source.data.shape[1:])
+        self.presenter.images = lazy
+        self.presenter.image_mode = SVImageMode.NORMAL
+
+        self.presenter.notify(SVNotification.REFRESH_IMAGE)
+        self.assertIsInstance(self.view.image, LazyStack)
+        self.assertFalse(lazy.is_materialised)
+
+        lazy.materialise()
+        self.presenter.notify(SVNotification.REFRESH_IMAGE)
+        self.assertIs(self.view.image, lazy.data)
+
+    def test_displayed_pyramid(self):
+        self.assertIs(self.presenter.images.pyramid, self.presenter.displayed_pyramid())
+
+        source = th.generate_images()
+        lazy = LazyImages(lambda name: source.data[int(name)], [str(i) for i in range(source.num_images)],
+                          source.data.shape[1:])
+        self.presenter.images = lazy
+        self.assertIsNone(self.presenter.displayed_pyramid())
+        self.assertFalse(lazy.is_materialised)
+
     def test_notify_refresh_image_averaged_image_mode(self):
         self.presenter.image_mode = SVImageMode.SUMMED
         self.presenter.notify(SVNotification.REFRESH_IMAGE)
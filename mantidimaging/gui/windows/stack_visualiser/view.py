@@ -8,6 +8,7 @@ from PyQt5.QtGui import QGuiApplication
 from PyQt5.QtWidgets import QAction, QDockWidget, QInputDialog, QMenu, QMessageBox, QVBoxLayout, QWidget
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.lazy_images import LazyImages
 from mantidimaging.core.utility.sensible_roi import SensibleROI
 from mantidimaging.gui.dialogs.op_history_copy.view import OpHistoryCopyDialogView
 from mantidimaging.gui.widgets.mi_image_view.view import MIImageView
@@ -31,8 +32,8 @@ class StackVisualiserView(QDockWidget):
     layout: QVBoxLayout
 
     def __init__(self, parent: 'MainWindowView', title: str, images: Images):
-        # enforce not showing a single image
-        assert images.data.ndim == 3, \
+        # enforce not showing a single image, lazy stacks are always 3D and are not loaded to check
+        assert isinstance(images, LazyImages) or images.data.ndim == 3, \
             "Data does NOT have 3 dimensions! Dimensions found: {0}".format(images.data.ndim)
 
         # We set the main window as the parent, the effect is the same as
@@ -53,7 +54,8 @@ class StackVisualiserView(QDockWidget):
                          ("Duplicate whole data", lambda: self.presenter.notify(SVNotification.DUPE_STACK)),
                          ("Duplicate current ROI of data",
                           lambda: self.presenter.notify(SVNotification.DUPE_STACK_ROI)),
-                         ("Mark as projections/sinograms", self.mark_as_sinograms), ("", None),
+                         ("Mark as projections/sinograms", self.mark_as_sinograms),
+                         ("Undo operations", self.undo_operations), ("", None),
                          ("Toggle averaged image", lambda: self.presenter.notify(SVNotification.TOGGLE_IMAGE_MODE)),
                          ("Create sinograms from stack", lambda: self.presenter.notify(SVNotification.SWAP_AXES)),
                          ("Set ROI", self.set_roi), ("Copy ROI to clipboard", self.copy_roi_to_clipboard), ("", None),
@@ -68,7 +70,8 @@ class StackVisualiserView(QDockWidget):
         self.actionCloseStack.setShortcut("Ctrl+W")
 
         self.addAction(self.actionCloseStack)
-        self.image_view.setImage(self.presenter.images.data)
+        self.image_view.setImage(self.presenter.displayed_data())
+        self.image_view.set_pyramid(self.presenter.displayed_pyramid())
         self.image_view.roi_changed_callback = self.roi_changed_callback
         self.layout.addWidget(self.image_view)
 
@@ -91,6 +94,7 @@ class StackVisualiserView(QDockWidget):
     @image.setter
     def image(self, to_display):
         self.image_view.setImage(to_display)
+        self.image_view.set_pyramid(self.presenter.displayed_pyramid())
 
     @property
     def main_window(self) -> 'MainWindowView':
@@ -199,6 +203,16 @@ class StackVisualiserView(QDockWidget):
         dialog = OpHistoryCopyDialogView(self, self.presenter.images, self.main_window)
         dialog.show()
 
+    def undo_operations(self):
+        revertible = self.presenter.revertible_operations()
+        if revertible == 0:
+            QMessageBox.information(self, "Undo operations", "There are no operations that can be undone.")
+            return
+        count, accepted = QInputDialog.getInt(self, "Undo operations", "Number of operations to undo:", 1, 1,
+                                              revertible)
+        if accepted:
+            self.presenter.undo_operations(count)
+
     def mark_as_sinograms(self):
         # 1 is position of sinograms, 0 is projections
         current = 1 if self.presenter.images._is_sinograms else 0
@@ -50,6 +50,10 @@ def main():
     h.initialise_logging(logging.getLevelName(args.log_level))
     startup_checks()
 
+    # files backing the stacks of a run that crashed are not removed by it
+    from mantidimaging.core.parallel import utility as pu
+    pu.remove_stale_scratch_files()
+
     from mantidimaging import gui
     gui.execute()
 